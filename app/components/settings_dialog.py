@@ -1,13 +1,23 @@
 # main.py
 
-from typing import Optional
+from typing import List, Optional
 
+from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtWidgets import QPushButton, QComboBox, QWidget, QVBoxLayout, QHBoxLayout, QFileDialog
-from PyQt6.QtWidgets import QDialog, QFormLayout, QLineEdit, QSpinBox, QDialogButtonBox
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QDialog,
+    QDialogButtonBox,
+    QFormLayout,
+    QLineEdit,
+    QListWidget,
+    QSpinBox,
+)
 
 from app.config import Config
 
-from app.utils.devices import get_controller_devices  # returns List[SystemDevices]
+from app.services.device_service import DeviceService, get_device_service
+from app.utils.devices import SystemDevice
 
 """ #for reference
 class SystemDevice(BaseModel):
@@ -20,11 +30,30 @@ class SystemDevice(BaseModel):
 """
 
 
+class DeviceListSignal(QObject):
+    """Carries device list updates from the device service thread to the UI thread."""
+
+    changed = pyqtSignal(list)
+
+
 class SettingsDialog(QDialog):
-    def __init__(self, config: Config, parent: Optional[QWidget] = None):
+    def __init__(
+        self,
+        config: Config,
+        parent: Optional[QWidget] = None,
+        device_service: Optional[DeviceService] = None,
+    ):
         super().__init__(parent)
         self.config = config
+        self.device_service = device_service or get_device_service()
+        self.device_updates = DeviceListSignal(self)
         self.init_ui()
+        self.device_updates.changed.connect(self.show_devices)
+        # Keep the bound emit so the same object can be removed again in done()
+        self._device_listener = self.device_updates.changed.emit
+        self.device_service.add_listener(self._device_listener)
+        self.device_service.start()
+        self.show_devices(self.device_service.devices())
 
     def init_ui(self):
         self.setWindowTitle("Settings")
@@ -95,6 +124,20 @@ class SettingsDialog(QDialog):
         self.modifier_key_line_edit = QLineEdit(self.config.modifier_key)
         form_layout.addRow("Modifier Key:", self.modifier_key_line_edit)
 
+        # Export formatting
+        self.preserve_export_formatting_check_box = QCheckBox()
+        self.preserve_export_formatting_check_box.setChecked(
+            self.config.preserve_export_formatting
+        )
+        form_layout.addRow(
+            "Preserve Export Formatting:", self.preserve_export_formatting_check_box
+        )
+
+        # Connected controllers, served from the device service's cached list
+        self.devices_list_widget = QListWidget()
+        self.devices_list_widget.setMaximumHeight(100)
+        form_layout.addRow("Detected Controllers:", self.devices_list_widget)
+
         self.layout.addLayout(form_layout)
 
         # OK and Cancel buttons
@@ -105,6 +148,24 @@ class SettingsDialog(QDialog):
         button_box.rejected.connect(self.reject)
         self.layout.addWidget(button_box)
 
+    def show_devices(self, devices: List[SystemDevice]) -> None:
+        self.devices_list_widget.clear()
+        if not devices:
+            ready = self.device_service.ready
+            self.devices_list_widget.addItem(
+                "No controllers found" if ready else "Detecting controllers..."
+            )
+            return
+        for device in devices:
+            self.devices_list_widget.addItem(
+                f"{device.instance}: {device.name} "
+                f"({device.num_buttons} buttons, {device.num_axes} axes)"
+            )
+
+    def done(self, result: int) -> None:
+        self.device_service.remove_listener(self._device_listener)
+        super().done(result)
+
     def browse_installation_path(self):
         directory = QFileDialog.getExistingDirectory(
             self, "Select Installation Directory", self.installation_path_line_edit.text()
@@ -129,5 +190,8 @@ class SettingsDialog(QDialog):
             self.joystick_side_identifier_right_line_edit.text()
         )
         self.config.modifier_key = self.modifier_key_line_edit.text()
+        self.config.preserve_export_formatting = (
+            self.preserve_export_formatting_check_box.isChecked()
+        )
         self.config.save()
         super().accept()
@@ -40,6 +40,7 @@ class Config(BaseSettings):
     joystick_side_identifier_left: str = "L"
     joystick_side_identifier_right: str = "R"
     modifier_key: str = "rctrl"
+    preserve_export_formatting: bool = False
 
     def save(self) -> None:
         _ensure_config_dir()
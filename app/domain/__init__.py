@@ -4,6 +4,7 @@ from .models import (
     ActionDefinition,
     ActionIdentifier,
     Binding,
+    BindingKey,
     BindingPlan,
     BindingSet,
     ControlProfile,
@@ -17,6 +18,7 @@ __all__ = [
     "ActionDefinition",
     "ActionIdentifier",
     "Binding",
+    "BindingKey",
     "BindingPlan",
     "BindingSet",
     "ControlProfile",
@@ -3,17 +3,33 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Iterable, Optional, Sequence, Tuple
+from typing import FrozenSet, Iterable, Optional, Sequence, Tuple
 
+FINGERPRINT_MASK = (1 << 64) - 1
 
-@dataclass(frozen=True)
+BindingKey = Tuple[str, str, bool, bool, bool]
+
+
+@dataclass(frozen=True, slots=True)
 class ActionIdentifier:
-    """Uniquely identifies an action within Star Citizen."""
+    """Uniquely identifies an action within Star Citizen.
+
+    Use ``intern`` when creating many identifiers so equal values share one
+    instance.
+    """
 
     name: str
     main_category: str
     sub_category: str
 
+    @classmethod
+    def intern(cls, name: str, main_category: str, sub_category: str) -> "ActionIdentifier":
+        key = (name, main_category, sub_category)
+        identifier = _ACTION_IDENTIFIERS.get(key)
+        if identifier is None:
+            identifier = _ACTION_IDENTIFIERS.setdefault(key, cls(*key))
+        return identifier
+
 
 @dataclass
 class ActionDefinition:
@@ -25,20 +41,33 @@ class ActionDefinition:
     default_inputs: Tuple[str, ...] = ()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class InputSlot:
-    """Specific input slot (button or axis) on a device side."""
+    """Specific input slot (button or axis) on a device side.
+
+    Use ``intern`` when creating many slots so equal values share one instance.
+    """
 
     device_uid: str
     side: str
     slot_id: str
 
+    @classmethod
+    def intern(cls, device_uid: str, side: str, slot_id: str) -> "InputSlot":
+        key = (device_uid, side, slot_id)
+        slot = _INPUT_SLOTS.get(key)
+        if slot is None:
+            slot = _INPUT_SLOTS.setdefault(key, cls(*key))
+        return slot
+
     def with_modifier(self, modifier_suffix: str) -> "InputSlot":
-        return InputSlot(
-            device_uid=self.device_uid,
-            side=self.side,
-            slot_id=f"{self.slot_id}+{modifier_suffix}",
-        )
+        return InputSlot.intern(self.device_uid, self.side, f"{self.slot_id}+{modifier_suffix}")
+
+
+# Intern tables. Both domains are bounded by the game's action list and the
+# connected devices' inputs, so entries are kept for the process lifetime.
+_ACTION_IDENTIFIERS: dict[Tuple[str, str, str], ActionIdentifier] = {}
+_INPUT_SLOTS: dict[Tuple[str, str, str], InputSlot] = {}
 
 
 @dataclass
@@ -50,46 +79,100 @@ class DeviceLayout:
     display_name: str
     slots: dict[str, InputSlot]
     metadata: dict[str, str] = field(default_factory=dict)
+    # Slot id -> (x, y) of the slot's label on the device image.
+    positions: dict[str, Tuple[int, int]] = field(default_factory=dict)
 
     def get_slot(self, slot_id: str) -> Optional[InputSlot]:
         return self.slots.get(slot_id)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Binding:
-    """Mapping between an action and a specific input slot."""
+    """Mapping between an action and a specific input slot.
+
+    Bindings are immutable; ``key`` and ``fingerprint`` are computed once on
+    construction.
+    """
 
     action: ActionIdentifier
     slot: InputSlot
     modifier: bool = False
     hold: bool = False
     multitap: bool = False
-    tags: set[str] = field(default_factory=set)
+    tags: FrozenSet[str] = field(default=frozenset(), hash=False)
+    _key: BindingKey = field(init=False, repr=False, compare=False, hash=False)
+    _fingerprint: int = field(init=False, repr=False, compare=False, hash=False)
+
+    def __post_init__(self) -> None:
+        action, slot = self.action, self.slot
+        object.__setattr__(
+            self,
+            "_key",
+            (action.name, slot.slot_id, self.modifier, self.hold, self.multitap),
+        )
+        object.__setattr__(
+            self,
+            "_fingerprint",
+            hash(
+                (
+                    action.name,
+                    action.main_category,
+                    action.sub_category,
+                    slot.device_uid,
+                    slot.side,
+                    slot.slot_id,
+                    self.modifier,
+                    self.hold,
+                    self.multitap,
+                )
+            )
+            & FINGERPRINT_MASK,
+        )
 
     @property
-    def key(self) -> str:
-        parts = [self.action.name, self.slot.slot_id]
-        if self.modifier:
-            parts.append("modifier")
-        if self.hold:
-            parts.append("hold")
-        if self.multitap:
-            parts.append("multitap")
-        return "|".join(parts)
+    def key(self) -> BindingKey:
+        """``(action name, slot id, modifier, hold, multitap)``; unique within a side."""
+        return self._key
+
+    @property
+    def fingerprint(self) -> int:
+        """Hash of everything that ends up in an export (tags are UI-only).
+
+        Fingerprints use ``hash`` and are only comparable within one process.
+        """
+        return self._fingerprint
 
 
 @dataclass
 class BindingSet:
-    """Collection of bindings for a single physical device side."""
+    """Collection of bindings for a single physical device side.
+
+    ``fingerprint`` is the modular sum of the member bindings' fingerprints,
+    so it is independent of insertion order and updated in O(1) by ``add``
+    and ``remove``. Mutate ``bindings`` through those methods only.
+    """
 
     side: str
-    bindings: dict[str, Binding] = field(default_factory=dict)
+    bindings: dict[BindingKey, Binding] = field(default_factory=dict)
+    fingerprint: int = field(default=0, init=False, compare=False)
+    device_uid: str = ""
 
-    def add(self, binding: Binding) -> None:
-        self.bindings[binding.key] = binding
+    def __post_init__(self) -> None:
+        for binding in self.bindings.values():
+            self.fingerprint = (self.fingerprint + binding.fingerprint) & FINGERPRINT_MASK
 
-    def remove(self, key: str) -> None:
-        self.bindings.pop(key, None)
+    def add(self, binding: Binding) -> None:
+        key = binding.key
+        previous = self.bindings.get(key)
+        if previous is not None:
+            self.fingerprint = (self.fingerprint - previous.fingerprint) & FINGERPRINT_MASK
+        self.bindings[key] = binding
+        self.fingerprint = (self.fingerprint + binding.fingerprint) & FINGERPRINT_MASK
+
+    def remove(self, key: BindingKey) -> None:
+        previous = self.bindings.pop(key, None)
+        if previous is not None:
+            self.fingerprint = (self.fingerprint - previous.fingerprint) & FINGERPRINT_MASK
 
     def find_by_action(self, action_name: str) -> list[Binding]:
         return [b for b in self.bindings.values() if b.action.name == action_name]
@@ -97,16 +180,68 @@ class BindingSet:
 
 @dataclass
 class ControlProfile:
-    """Aggregates bindings and metadata for an exported profile."""
+    """Aggregates bindings and metadata for an exported profile.
+
+    ``devices`` holds one ``BindingSet`` per device, keyed by device uid
+    (``js1``, ``js5``, ...), so a profile covers any number of sticks,
+    throttles, pedals or button boxes. The set's ``side`` is the device's
+    role, such as ``left``, ``right`` or ``throttle``. Add bindings through
+    ``add`` so each one lands in the set of its slot's device.
+    """
 
     profile_name: str
-    left: BindingSet
-    right: BindingSet
+    devices: dict[str, BindingSet] = field(default_factory=dict)
     metadata: dict[str, str] = field(default_factory=dict)
 
+    @classmethod
+    def from_bindings(
+        cls,
+        profile_name: str,
+        bindings: Iterable[Binding],
+        metadata: Optional[dict[str, str]] = None,
+    ) -> "ControlProfile":
+        profile = cls(profile_name=profile_name, metadata=dict(metadata or {}))
+        for binding in bindings:
+            profile.add(binding)
+        return profile
+
+    def binding_set(self, device_uid: str, side: str = "") -> BindingSet:
+        """Return the set of ``device_uid``, creating it with ``side`` if needed."""
+        bindings = self.devices.get(device_uid)
+        if bindings is None:
+            bindings = self.devices[device_uid] = BindingSet(side=side, device_uid=device_uid)
+        return bindings
+
+    def add(self, binding: Binding) -> None:
+        slot = binding.slot
+        self.binding_set(slot.device_uid, slot.side).add(binding)
+
+    def remove(self, binding: Binding) -> None:
+        bindings = self.devices.get(binding.slot.device_uid)
+        if bindings is not None:
+            bindings.remove(binding.key)
+
+    def get(self, device_uid: str, key: BindingKey) -> Optional[Binding]:
+        bindings = self.devices.get(device_uid)
+        return bindings.bindings.get(key) if bindings is not None else None
+
+    def side_bindings(self, side: str) -> list[Binding]:
+        """Return the bindings of every device with role ``side``."""
+        return [
+            binding
+            for bindings in self.devices.values()
+            if bindings.side == side
+            for binding in bindings.bindings.values()
+        ]
+
     def iter_bindings(self) -> Iterable[Binding]:
-        yield from self.left.bindings.values()
-        yield from self.right.bindings.values()
+        for bindings in self.devices.values():
+            yield from bindings.bindings.values()
+
+    @property
+    def fingerprint(self) -> int:
+        """Order-independent content hash of all bindings in the profile."""
+        return sum(bindings.fingerprint for bindings in self.devices.values()) & FINGERPRINT_MASK
 
 
 @dataclass
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from typing import List, Literal
 
@@ -19,10 +20,23 @@ class StarCitizenInstallation(BaseModel):
 
 
 APP_PATH = Path(__file__).parent
+APP_NAME = "citizenbindvkb"
 localization_file_path = APP_PATH / "data" / "Localization" / "english" / "global.ini"
 localization_file = LocalizationFile.from_file(localization_file_path)
 
 
+def user_cache_dir() -> Path:
+    """Return the per-user directory for caches the app can always rebuild."""
+    if sys.platform == "win32":
+        local_app_data = os.environ.get("LOCALAPPDATA")
+        base = Path(local_app_data) if local_app_data else Path.home() / "AppData" / "Local"
+        return base / APP_NAME / "Cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / APP_NAME
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    return (Path(xdg_cache_home) if xdg_cache_home else Path.home() / ".cache") / APP_NAME
+
+
 def get_installation(
     sc_folder: str, installation_type: Literal["PTU", "LIVE", "EPTU"]
 ) -> StarCitizenInstallation | None:
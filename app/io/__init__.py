@@ -1,5 +1,22 @@
 """I/O abstractions for persistence and external data loading."""
 
+from .control_map_template import ControlMapTemplate, ControlMapWorkingCopy
+from .export_writer import WriteBehindExporter, atomic_write
+from .fragment_writer import ActionFragmentWriter
+from .profile_export import ProfileExportResult
 from .repositories import ActionMapsRepository, DeviceLayoutRepository
+from .splice_writer import SplicedControlMapWriter
+from .xml_writer import write_action_maps
 
-__all__ = ["ActionMapsRepository", "DeviceLayoutRepository"]
+__all__ = [
+    "ActionFragmentWriter",
+    "ActionMapsRepository",
+    "ControlMapTemplate",
+    "ControlMapWorkingCopy",
+    "DeviceLayoutRepository",
+    "ProfileExportResult",
+    "SplicedControlMapWriter",
+    "WriteBehindExporter",
+    "atomic_write",
+    "write_action_maps",
+]
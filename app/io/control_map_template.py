@@ -0,0 +1,117 @@
+"""Copy-on-write working copies of a parsed control map.
+
+Exports are rebuilt from the loaded control map on every edit. Deep-copying
+the full ``ExportedActionMapsFile`` each time duplicates thousands of pydantic
+objects even though an edit only touches a handful of actions. A
+``ControlMapTemplate`` keeps the parsed map as a read-only source and hands out
+``ControlMapWorkingCopy`` objects that share every ``ActionMap`` and ``Action``
+with the template until they are modified.
+"""
+
+from __future__ import annotations
+
+import itertools
+from pathlib import Path
+from typing import List, Optional, Set
+
+from app.io.splice_writer import SplicedControlMapWriter
+from app.models.exported_configmap_xml import Action, ActionMap, ExportedActionMapsFile, Rebind
+
+
+class ControlMapTemplate:
+    """Read-only parsed control map used as the base for exports.
+
+    The template takes ownership of ``source``; callers must not mutate it
+    afterwards. All modifications go through ``working_copy``. When
+    ``source_path`` is given, the template can also produce a
+    ``SplicedControlMapWriter`` that preserves the original file formatting.
+    Every template gets a process-unique ``generation`` so export fingerprints
+    can tell templates apart.
+    """
+
+    _generations = itertools.count(1)
+
+    def __init__(
+        self, source: ExportedActionMapsFile, source_path: Optional[Path] = None
+    ) -> None:
+        self._source = source
+        self.source_path = source_path
+        self._splice_writer: Optional[SplicedControlMapWriter] = None
+        self.generation = next(self._generations)
+
+    @property
+    def source(self) -> ExportedActionMapsFile:
+        return self._source
+
+    def working_copy(self) -> "ControlMapWorkingCopy":
+        return ControlMapWorkingCopy(self)
+
+    def splice_writer(self) -> Optional[SplicedControlMapWriter]:
+        """Return the byte-preserving writer for the source file, if there is one."""
+
+        if self._splice_writer is None and self.source_path is not None:
+            self._splice_writer = SplicedControlMapWriter.from_file(self.source_path, self._source)
+        return self._splice_writer
+
+
+class ControlMapWorkingCopy:
+    """Structurally shared view of a template that copies only what it changes.
+
+    ``control_map`` can be read freely. Mutations must use the methods on this
+    class so the touched ``ActionMap``/``Action`` objects are duplicated first
+    and the template stays untouched.
+    """
+
+    def __init__(self, template: ControlMapTemplate) -> None:
+        source = template.source
+        control_map = source.model_copy()
+        control_map.actionmap = list(source.actionmap)
+        self.template = template
+        self.control_map = control_map
+        self._owned_actionmaps: Set[int] = set()
+        self._owned_actions: Set[int] = set()
+
+    @property
+    def copied_actionmaps(self) -> int:
+        return len(self._owned_actionmaps)
+
+    @property
+    def copied_actions(self) -> int:
+        return len(self._owned_actions)
+
+    def _own_actionmap(self, map_index: int) -> ActionMap:
+        actionmap = self.control_map.actionmap[map_index]
+        if id(actionmap) in self._owned_actionmaps:
+            return actionmap
+        copy = actionmap.model_copy()
+        copy.action = list(actionmap.action)
+        self.control_map.actionmap[map_index] = copy
+        self._owned_actionmaps.add(id(copy))
+        return copy
+
+    def _own_action(self, map_index: int, action_index: int) -> Action:
+        actionmap = self._own_actionmap(map_index)
+        action = actionmap.action[action_index]
+        if id(action) in self._owned_actions:
+            return action
+        copy = action.model_copy()
+        copy.rebind = list(action.rebind)
+        actionmap.action[action_index] = copy
+        self._owned_actions.add(id(copy))
+        return copy
+
+    def set_rebinds(self, map_index: int, action_index: int, rebinds: List[Rebind]) -> None:
+        """Replace the rebinds of one action."""
+
+        self._own_action(map_index, action_index).rebind = rebinds
+
+    def remove_action(self, map_index: int, action_index: int) -> None:
+        """Drop an action from an action map."""
+
+        del self._own_actionmap(map_index).action[action_index]
+
+    def append_action(self, map_index: int, action: Action) -> None:
+        """Add a new action owned by the working copy to an action map."""
+
+        self._own_actionmap(map_index).action.append(action)
+        self._owned_actions.add(id(action))
@@ -0,0 +1,228 @@
+"""Background, coalescing writer for exported control maps."""
+
+from __future__ import annotations
+
+import logging
+import os
+import secrets
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Generic, Optional, TextIO, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+TData = TypeVar("TData")
+
+Serializer = Callable[[TData, TextIO], None]
+
+
+def atomic_write(
+    destination: Path, write: Callable[[TextIO], None], *, newline: Optional[str] = None
+) -> None:
+    """Write a file through ``write`` and atomically move it over ``destination``.
+
+    The content is written to a temporary file in the destination folder, so
+    readers either see the previous file or the complete new one. The file
+    keeps the permissions of the one it replaces, or gets the usual default
+    for a new file. ``newline`` is passed to ``open``; the default translates
+    ``\n`` like ``open(path, "w")`` does.
+    """
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = _create_temp_file(destination)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline=newline) as handle:
+            write(handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        try:
+            os.chmod(temp_name, stat.S_IMODE(destination.stat().st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(temp_name, destination)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _create_temp_file(destination: Path) -> Tuple[int, str]:
+    # Unlike mkstemp, which creates the file as 0600, this lets the kernel
+    # apply the umask to 0666 like open(path, "w") does; the umask itself is
+    # process-wide and must not be changed from a worker thread.
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        name = str(destination.parent / f".{destination.name}.{secrets.token_hex(4)}.tmp")
+        try:
+            return os.open(name, flags, 0o666), name
+        except FileExistsError:
+            continue
+
+
+class WriteBehindExporter(Generic[TData]):
+    """Serialises the latest submitted snapshot on a background thread.
+
+    ``submit`` only records the snapshot and returns immediately. The worker
+    waits until no new snapshot arrived for ``quiet_period`` seconds, then
+    writes the most recent one, so a burst of edits results in a single write.
+    Submitted snapshots are handed over to the exporter and must not be
+    mutated by the caller afterwards.
+
+    Snapshots may carry a content fingerprint. A snapshot whose fingerprint
+    matches the content the file already holds, or is about to hold, is
+    dropped instead of rewriting an identical file. ``newline`` is passed on
+    to ``atomic_write``.
+    """
+
+    def __init__(
+        self,
+        destination: Path,
+        serializer: Serializer[TData],
+        *,
+        quiet_period: float = 0.25,
+        newline: Optional[str] = None,
+    ) -> None:
+        self.destination = destination
+        self.serializer = serializer
+        self.quiet_period = quiet_period
+        self.newline = newline
+        self.write_count = 0
+        self.skipped_count = 0
+        self.last_error: Optional[BaseException] = None
+
+        self._condition = threading.Condition()
+        self._pending: Optional[TData] = None
+        self._pending_fingerprint: Optional[int] = None
+        self._written_fingerprint: Optional[int] = None
+        self._writing_fingerprint: Optional[int] = None
+        self._writing = False
+        self._has_pending = False
+        self._last_submit = 0.0
+        self._submitted = 0
+        self._written = 0
+        self._flush_requested = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, data: TData, fingerprint: Optional[int] = None) -> bool:
+        """Schedule ``data`` to be written once edits go quiet.
+
+        Returns ``False`` when ``fingerprint`` equals ``target_fingerprint``,
+        i.e. the file will hold this content anyway, so no write is needed.
+        """
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Exporter has been shut down.")
+            if fingerprint is not None and fingerprint == self._target_fingerprint():
+                self.skipped_count += 1
+                return False
+            self._pending = data
+            self._pending_fingerprint = fingerprint
+            self._has_pending = True
+            self._submitted += 1
+            self._last_submit = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="WriteBehindExporter", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify_all()
+            return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write any pending snapshot now and wait for it to reach disk.
+
+        Returns ``False`` if ``timeout`` expired before the write completed.
+        """
+
+        with self._condition:
+            target = self._submitted
+            if self._written >= target:
+                return True
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: self._written >= target, timeout)
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Flush pending work and stop the worker thread."""
+
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def pending(self) -> bool:
+        with self._condition:
+            return self._has_pending
+
+    @property
+    def target_fingerprint(self) -> Optional[int]:
+        """Fingerprint of the content the file holds once queued work is written."""
+
+        with self._condition:
+            return self._target_fingerprint()
+
+    def _target_fingerprint(self) -> Optional[int]:
+        if self._has_pending:
+            return self._pending_fingerprint
+        if self._writing:
+            return self._writing_fingerprint
+        return self._written_fingerprint
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._has_pending or self._closed)
+                if not self._has_pending:
+                    return
+                while not (self._flush_requested or self._closed):
+                    remaining = self._last_submit + self.quiet_period - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                data = self._pending
+                fingerprint = self._pending_fingerprint
+                target = self._submitted
+                self._pending = None
+                self._pending_fingerprint = None
+                self._has_pending = False
+                self._flush_requested = False
+                if fingerprint is not None and fingerprint == self._written_fingerprint:
+                    self.skipped_count += 1
+                    self._written = target
+                    self._condition.notify_all()
+                    continue
+                self._writing = True
+                self._writing_fingerprint = fingerprint
+
+            error: Optional[BaseException] = None
+            try:
+                atomic_write(
+                    self.destination,
+                    lambda handle: self.serializer(data, handle),
+                    newline=self.newline,
+                )
+            except Exception as exc:
+                logger.exception("Failed to export control map to %s", self.destination)
+                error = exc
+
+            with self._condition:
+                self.last_error = error
+                if error is None:
+                    self.write_count += 1
+                    self._written_fingerprint = fingerprint
+                else:
+                    self._written_fingerprint = None
+                self._writing = False
+                self._writing_fingerprint = None
+                self._written = target
+                self._condition.notify_all()
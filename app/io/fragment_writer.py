@@ -0,0 +1,115 @@
+"""Bulk rendering of configured joystick actions as Star Citizen XML fragments.
+
+``JoyAction.to_xml`` used to build an ElementTree element, a ``<rebind>``
+sub-element and a ``tostring`` call per action. ``ActionFragmentWriter``
+renders whole lists of actions in one pass instead: every action falls into
+one of four (modifier, multitap) shapes, each shape has a format string with
+the modifier key already baked in, and all fragments are appended to one
+shared buffer. The output is identical to ``ElementTree.tostring``.
+"""
+
+from __future__ import annotations
+
+import io
+import re
+from typing import Dict, Iterable, List, Protocol, TextIO, Tuple
+
+_ATTRIBUTE_ESCAPES = str.maketrans(
+    {
+        "&": "&amp;",
+        "<": "&lt;",
+        ">": "&gt;",
+        '"': "&quot;",
+        "\r": "&#13;",
+        "\n": "&#10;",
+        "\t": "&#09;",
+    }
+)
+_NEEDS_ESCAPE = re.compile(r'[&<>"\r\n\t]').search
+
+
+class ActionLike(Protocol):
+    name: str
+    input: str
+    modifier: bool
+    multitap: bool
+
+
+class SectionedAction(ActionLike, Protocol):
+    @property
+    def actionmap_section(self) -> str: ...
+
+
+def escape_attribute(value: str) -> str:
+    """Escape an attribute value the way ``ElementTree`` does."""
+
+    if _NEEDS_ESCAPE(value) is None:
+        return value
+    return value.translate(_ATTRIBUTE_ESCAPES)
+
+
+class ActionFragmentWriter:
+    """Renders ``<action>`` and ``<actionmap>`` fragments for many actions at once.
+
+    The modifier key is read once when the writer is created; create a new
+    writer when the configured key changes.
+    """
+
+    def __init__(self, modifier_key: str) -> None:
+        self.modifier_key = modifier_key
+        # Baked into %-format templates, so a literal "%" has to be doubled
+        modifier = escape_attribute(modifier_key).replace("%", "%%")
+        self._templates: Dict[Tuple[bool, bool], str] = {
+            (False, False): '<action name="%s"><rebind input="%s" /></action>',
+            (False, True): '<action name="%s"><rebind input="%s" multiTap="2" /></action>',
+            (True, False): f'<action name="%s"><rebind input="%s_{modifier}+%s" /></action>',
+            (True, True): (
+                f'<action name="%s"><rebind input="%s_{modifier}+%s" multiTap="2" /></action>'
+            ),
+        }
+
+    def _fragments(self, actions: Iterable[ActionLike]) -> Iterable[str]:
+        templates = self._templates
+        for action in actions:
+            name = escape_attribute(action.name)
+            if action.modifier:
+                device, button = action.input.split("_", 1)
+                yield templates[True, action.multitap] % (
+                    name,
+                    escape_attribute(device),
+                    escape_attribute(button),
+                )
+            else:
+                yield templates[False, action.multitap] % (name, escape_attribute(action.input))
+
+    def render_action(self, action: ActionLike) -> str:
+        """Render a single ``<action>`` element."""
+
+        return next(iter(self._fragments((action,))))
+
+    def write_actions(self, actions: Iterable[ActionLike], output: TextIO) -> None:
+        """Write one ``<action>`` element per action, back to back, into ``output``."""
+
+        output.write("".join(self._fragments(actions)))
+
+    def write_actionmap(self, name: str, actions: Iterable[ActionLike], output: TextIO) -> None:
+        """Write an ``<actionmap>`` element containing ``actions`` into ``output``."""
+
+        output.write(f'<actionmap name="{escape_attribute(name)}">')
+        self.write_actions(actions, output)
+        output.write("</actionmap>")
+
+    def write_profile(self, actions: Iterable[SectionedAction], output: TextIO) -> None:
+        """Write one ``<actionmap>`` per ``actionmap_section``, in first-seen order."""
+
+        sections: Dict[str, List[SectionedAction]] = {}
+        for action in actions:
+            sections.setdefault(action.actionmap_section, []).append(action)
+        for name, section_actions in sections.items():
+            self.write_actionmap(name, section_actions, output)
+
+    def render_actions(self, actions: Iterable[ActionLike]) -> str:
+        buffer = io.StringIO()
+        self.write_actions(actions, buffer)
+        return buffer.getvalue()
+
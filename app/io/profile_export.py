@@ -0,0 +1,164 @@
+"""Rendering of domain ``ControlProfile`` objects into exported action maps."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.domain import Binding, ControlProfile, ValidationIssue, ValidationReport
+from app.io.control_map_template import ControlMapTemplate, ControlMapWorkingCopy
+from app.io.export_writer import atomic_write
+from app.io.xml_writer import write_action_maps
+from app.models.exported_configmap_xml import Action, Rebind, get_action_maps_object
+from app.services.binding_planner import BindingPlanner, BindingPlannerContext
+
+
+@dataclass
+class ProfileExportResult:
+    """Outcome of writing one ``ControlProfile`` to disk."""
+
+    profile_name: str
+    destination: Path
+    elapsed: float
+    report: ValidationReport = field(default_factory=ValidationReport)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def binding_input(binding: Binding, modifier_key: str) -> str:
+    """Return the Star Citizen ``input`` attribute for a binding."""
+
+    device_uid = binding.slot.device_uid
+    if binding.modifier:
+        return f"{device_uid}_{modifier_key}+{binding.slot.slot_id}"
+    return f"{device_uid}_{binding.slot.slot_id}"
+
+
+def render_control_profile(
+    template: ControlMapTemplate,
+    profile: ControlProfile,
+    modifier_key: str,
+) -> Tuple[ControlMapWorkingCopy, ValidationReport]:
+    """Replace the template's rebinds for the profile's devices with its bindings.
+
+    Bindings are placed in the action map named after their sub-category, the
+    same way the UI exports edits. Bindings whose action map does not exist in
+    the template are reported as warnings.
+    """
+
+    planner = BindingPlanner(BindingPlannerContext())
+    report = planner.validate_plan(planner.plan_from_profile(profile))
+    working = template.working_copy()
+    bindings = list(profile.iter_bindings())
+
+    prefixes = tuple(sorted({f"{binding.slot.device_uid}_" for binding in bindings}))
+    if prefixes:
+        for map_index, actionmap in enumerate(working.control_map.actionmap):
+            for action_index, action in enumerate(actionmap.action):
+                if any(rebind.input.startswith(prefixes) for rebind in action.rebind):
+                    working.set_rebinds(
+                        map_index,
+                        action_index,
+                        [rb for rb in action.rebind if not rb.input.startswith(prefixes)],
+                    )
+
+    map_indexes: Dict[str, int] = {}
+    for map_index, actionmap in enumerate(working.control_map.actionmap):
+        map_indexes.setdefault(actionmap.name, map_index)
+    # Action name -> index per action map, built when a map is first written to.
+    action_indexes: Dict[int, Dict[str, int]] = {}
+
+    for binding in bindings:
+        section = binding.action.sub_category or binding.action.main_category
+        map_index = map_indexes.get(section)
+        if map_index is None:
+            report.add(
+                ValidationIssue(
+                    level="warning",
+                    message=f"Action map {section} not found for action {binding.action.name}.",
+                    action=binding.action,
+                    slot=binding.slot,
+                )
+            )
+            continue
+
+        input_value = binding_input(binding, modifier_key)
+        payload: Dict[str, object] = {"@input": input_value}
+        if binding.multitap:
+            payload["@multiTap"] = 2
+        new_rebind = Rebind.model_validate(payload)
+
+        actions = working.control_map.actionmap[map_index].action
+        action_names = action_indexes.get(map_index)
+        if action_names is None:
+            action_names = action_indexes[map_index] = {}
+            for index, action in enumerate(actions):
+                action_names.setdefault(action.name, index)
+        action_index = action_names.get(binding.action.name)
+        if action_index is None:
+            action_names[binding.action.name] = len(actions)
+            working.append_action(
+                map_index,
+                Action.model_validate({"@name": binding.action.name, "rebind": [new_rebind]}),
+            )
+            continue
+        prefix = f"{binding.slot.device_uid}_"
+        rebinds = [rb for rb in actions[action_index].rebind if not rb.input.startswith(prefix)]
+        rebinds.append(new_rebind)
+        working.set_rebinds(map_index, action_index, rebinds)
+
+    return working, report
+
+
+def export_control_profile(
+    template: ControlMapTemplate,
+    profile: ControlProfile,
+    destination: Path,
+    modifier_key: str,
+) -> ProfileExportResult:
+    """Render ``profile`` against ``template`` and write it atomically."""
+
+    started = time.perf_counter()
+    report = ValidationReport()
+    try:
+        working, report = render_control_profile(template, profile, modifier_key)
+        atomic_write(
+            destination,
+            lambda handle: write_action_maps(
+                working.control_map, handle, pretty=True, indent=" ", short_empty_elements=True
+            ),
+        )
+    except Exception as exc:  # reported back to the caller per profile
+        return ProfileExportResult(
+            profile_name=profile.profile_name,
+            destination=destination,
+            elapsed=time.perf_counter() - started,
+            report=report,
+            error=f"{type(exc).__name__}: {exc}",
+        )
+    return ProfileExportResult(
+        profile_name=profile.profile_name,
+        destination=destination,
+        elapsed=time.perf_counter() - started,
+        report=report,
+    )
+
+
+_worker_template: Optional[ControlMapTemplate] = None
+
+
+def _init_export_worker(template_path: Path) -> None:
+    global _worker_template
+    _worker_template = ControlMapTemplate(get_action_maps_object(str(template_path)))
+
+
+def _export_in_worker(
+    profile: ControlProfile, destination: Path, modifier_key: str
+) -> ProfileExportResult:
+    assert _worker_template is not None, "export worker was not initialised"
+    return export_control_profile(_worker_template, profile, destination, modifier_key)
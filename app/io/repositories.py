@@ -2,31 +2,183 @@
 
 from __future__ import annotations
 
+import json
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, TextIO, Tuple
 
-from app.domain import ControlProfile, DeviceLayout
+from app.config import Config
+from app.domain import (
+    ActionIdentifier,
+    Binding,
+    ControlProfile,
+    DeviceLayout,
+    InputSlot,
+)
+from app.globals import APP_PATH
+from app.io.control_map_template import ControlMapTemplate
+from app.io.export_writer import atomic_write
+from app.io.profile_export import (
+    ProfileExportResult,
+    _export_in_worker,
+    _init_export_worker,
+    export_control_profile,
+)
+from app.models.exported_configmap_xml import Rebind, get_action_maps_object
+from app.models.full_game_control_options import GameAction, get_all_defined_game_actions
+
+DEFAULT_TEMPLATE_PATH = APP_PATH / "data" / "SCBindsDefault.xml"
+DEFAULT_LAYOUTS_PATH = APP_PATH / "data" / "layouts"
+LAYOUT_CACHE_FORMAT = 1
+
+logger = logging.getLogger(__name__)
+
+# One device of a compiled layout: side, device uid, display name, metadata
+# and (button name, x, y) rows in file order.
+CompiledDevice = Tuple[str, str, str, Dict[str, str], List[Tuple[str, int, int]]]
 
 
 class ActionMapsRepository:
     """Loads and persists control maps from Star Citizen export files."""
 
-    def __init__(self, root: Path) -> None:
+    def __init__(
+        self,
+        root: Path,
+        template_path: Path = DEFAULT_TEMPLATE_PATH,
+        modifier_key: Optional[str] = None,
+        joystick_sides: Optional[Mapping[int, str]] = None,
+    ) -> None:
         self.root = root
+        self.template_path = template_path
+        self.modifier_key = modifier_key
+        self.joystick_sides = joystick_sides
+        self._game_action_cache: Optional[Dict[str, List[GameAction]]] = None
 
     def load_control_profile(self, path: Path) -> ControlProfile:
         """Parse an exported XML file into a ControlProfile.
 
-        Placeholder implementation; this will be replaced with real parsing
-        logic that leverages ``app.models.exported_configmap_xml``.
+        Only joystick rebinds of the instances in ``joystick_sides`` are
+        loaded, one ``BindingSet`` per instance with the mapped name as its
+        side, e.g. ``{1: "left", 2: "right", 3: "throttle"}``. Categories and
+        hold mode come from the game's action definitions, falling back to
+        the action map name for unknown actions.
+        Relative paths are resolved against the repository root.
+        """
+
+        control_map = get_action_maps_object(str(self._resolve(path)))
+        sides = self._joystick_sides()
+        profile = ControlProfile(profile_name=control_map.profileName or path.stem)
+        for actionmap in control_map.actionmap:
+            for action in actionmap.action:
+                for rebind in action.rebind:
+                    binding = self._binding_from_rebind(actionmap.name, action.name, rebind, sides)
+                    if binding is not None:
+                        profile.add(binding)
+        return profile
+
+    def _binding_from_rebind(
+        self, actionmap_name: str, action_name: str, rebind: Rebind, sides: Dict[int, str]
+    ) -> Optional[Binding]:
+        device_input, modifier, slot_id = rebind.input.rpartition("+")
+        device_uid = (device_input or slot_id).split("_", 1)[0]
+        if not device_input:
+            slot_id = slot_id.partition("_")[2]
+        if not device_uid.startswith("js") or not slot_id.strip():
+            return None
+        try:
+            side = sides.get(int(device_uid[2:]))
+        except ValueError:
+            return None
+        if side is None:
+            return None
+
+        main_category = sub_category = actionmap_name
+        hold = False
+        game_actions = self._game_actions().get(action_name, [])
+        game_action = next(
+            (ga for ga in game_actions if ga.sub_category == actionmap_name),
+            game_actions[0] if game_actions else None,
+        )
+        if game_action is not None:
+            main_category = game_action.main_category or actionmap_name
+            sub_category = game_action.sub_category or actionmap_name
+            hold = game_action.on_hold == "1"
+        return Binding(
+            action=ActionIdentifier.intern(action_name, main_category, sub_category),
+            slot=InputSlot.intern(device_uid, side, slot_id),
+            modifier=bool(modifier),
+            hold=hold,
+            multitap=rebind.multitap is not None,
+        )
+
+    def _joystick_sides(self) -> Dict[int, str]:
+        if self.joystick_sides is not None:
+            return dict(self.joystick_sides)
+        config = Config.get_config()
+        return {config.joystick_instance_left: "left", config.joystick_instance_right: "right"}
+
+    def _game_actions(self) -> Dict[str, List[GameAction]]:
+        if self._game_action_cache is None:
+            self._game_action_cache = get_all_defined_game_actions()
+        return self._game_action_cache
+
+    def save_control_profile(
+        self, profile: ControlProfile, destination: Path
+    ) -> ProfileExportResult:
+        """Write a ControlProfile to disk in Star Citizen's XML format.
+
+        The profile's bindings replace the template's rebinds for the devices
+        it uses; everything else in the template is kept. Relative
+        destinations are resolved against the repository root.
+        """
+
+        template = ControlMapTemplate(get_action_maps_object(str(self.template_path)))
+        return export_control_profile(
+            template, profile, self._resolve(destination), self._modifier_key()
+        )
+
+    def save_control_profiles(
+        self,
+        jobs: Sequence[Tuple[ControlProfile, Path]],
+        max_workers: Optional[int] = None,
+    ) -> List[ProfileExportResult]:
+        """Export several profiles concurrently against one parsed template.
+
+        Each worker process parses the template once and reuses it for every
+        profile it renders. Files are written atomically and results are
+        returned in the order of ``jobs``; failures are reported per result
+        instead of aborting the batch.
         """
 
-        raise NotImplementedError("Control profile loading is not implemented yet.")
+        modifier_key = self._modifier_key()
+        resolved = [(profile, self._resolve(destination)) for profile, destination in jobs]
+        if len(resolved) <= 1 or max_workers == 1:
+            template = ControlMapTemplate(get_action_maps_object(str(self.template_path)))
+            return [
+                export_control_profile(template, profile, destination, modifier_key)
+                for profile, destination in resolved
+            ]
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_export_worker,
+            initargs=(self.template_path,),
+        ) as executor:
+            futures = [
+                executor.submit(_export_in_worker, profile, destination, modifier_key)
+                for profile, destination in resolved
+            ]
+            return [future.result() for future in futures]
 
-    def save_control_profile(self, profile: ControlProfile, destination: Path) -> None:
-        """Write a ControlProfile to disk in Star Citizen's XML format."""
+    def _resolve(self, destination: Path) -> Path:
+        return destination if destination.is_absolute() else self.root / destination
 
-        raise NotImplementedError("Control profile persistence is not implemented yet.")
+    def _modifier_key(self) -> str:
+        if self.modifier_key is not None:
+            return self.modifier_key
+        return Config.get_config().modifier_key
 
     def list_available_maps(self) -> Iterable[Path]:
         """Yield all control-map files under the configured root."""
@@ -37,17 +189,171 @@ class ActionMapsRepository:
 
 
 class DeviceLayoutRepository:
-    """Provides access to device button layouts and metadata."""
+    """Provides access to device button layouts and metadata.
 
-    def __init__(self, root: Path) -> None:
+    Layouts are JSON files under ``root``, in the format of
+    ``app/data/vkb_new.json``: layout names mapped to ``{"devices": {...}}``
+    with one entry per stick. With a ``cache_dir``, each file is compiled
+    once to a compact form stored there, together with an index of the
+    layout names each file defines. A file is recompiled when its size or
+    modification time changes. Listing layouts then reads only the index,
+    and loading a layout reads only the compiled file that defines it.
+    Files that are new or changed are compiled only when a layout is not
+    found in the index, so adding a layout file costs nothing until it is
+    used.
+    """
+
+    def __init__(self, root: Path = DEFAULT_LAYOUTS_PATH, cache_dir: Optional[Path] = None) -> None:
         self.root = root
+        self.cache_dir = cache_dir
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._compiled: Dict[str, Dict[str, List[CompiledDevice]]] = {}
+        # Files missing from the index, or changed since it was written
+        self._unindexed: List[Path] = []
 
     def load_layout(self, device_name: str, side: str) -> Optional[DeviceLayout]:
         """Load a DeviceLayout by key; returns None when not found."""
 
-        raise NotImplementedError("Device layout loading is not implemented yet.")
+        return self.load_layouts(device_name).get(side)
+
+    def load_layouts(self, device_name: str) -> Dict[str, DeviceLayout]:
+        """Return the DeviceLayout of each side defined by a layout."""
+
+        devices = self._compiled_layout(device_name)
+        if devices is None:
+            return {}
+        layouts: Dict[str, DeviceLayout] = {}
+        for side, device_uid, display_name, metadata, buttons in devices:
+            layouts[side] = DeviceLayout(
+                device_uid=device_uid,
+                side=side,
+                display_name=display_name,
+                slots={name: InputSlot.intern(device_uid, side, name) for name, _, _ in buttons},
+                metadata={"layout": device_name, **metadata},
+                positions={name: (x, y) for name, x, y in buttons},
+            )
+        return layouts
 
     def list_layouts(self) -> Iterable[str]:
         """Return the identifiers for all known layouts."""
 
-        raise NotImplementedError("Listing layouts is not implemented yet.")
+        index = self._fresh_index()
+        while self._unindexed:
+            self._index_file(self._unindexed.pop(0))
+        return sorted(name for entry in index.values() for name in entry["layouts"])
+
+    def _compiled_layout(self, layout_name: str) -> Optional[List[CompiledDevice]]:
+        for file_name, entry in self._fresh_index().items():
+            if layout_name in entry["layouts"]:
+                compiled = self._compiled.get(file_name)
+                if compiled is None:
+                    compiled = self._read_compiled(file_name) or self._compile(
+                        self.root / file_name
+                    )
+                    self._compiled[file_name] = compiled
+                return compiled.get(layout_name)
+        # Not in the index: compile new or changed files until one defines it,
+        # starting with the file named after the layout ("VKB New" -> vkb_new.json).
+        stem = re.sub(r"\W+", "_", layout_name).strip("_").lower()
+        self._unindexed.sort(key=lambda path: path.stem.lower() != stem)
+        while self._unindexed:
+            compiled = self._index_file(self._unindexed.pop(0))
+            if layout_name in compiled:
+                return compiled[layout_name]
+        return None
+
+    def _fresh_index(self) -> Dict[str, Dict[str, Any]]:
+        """Return the index entries still valid for the files under ``root``.
+
+        Only file sizes and modification times are checked here. New or
+        changed files are left in ``_unindexed`` and compiled on demand.
+        """
+
+        if self._index is not None:
+            return self._index
+        stored = self._read_cache("index.json").get("files", {})
+        index: Dict[str, Dict[str, Any]] = {}
+        for path in sorted(self.root.glob("*.json")):
+            stat = path.stat()
+            entry = stored.get(path.name)
+            if entry is not None and entry.get("signature") == [stat.st_mtime_ns, stat.st_size]:
+                index[path.name] = entry
+            else:
+                self._unindexed.append(path)
+        if index != stored:
+            self._write_index(index)
+        self._index = index
+        return index
+
+    def _index_file(self, path: Path) -> Dict[str, List[CompiledDevice]]:
+        stat = path.stat()
+        compiled = self._compiled[path.name] = self._compile(path)
+        index = self._fresh_index()
+        index[path.name] = {
+            "signature": [stat.st_mtime_ns, stat.st_size],
+            "layouts": sorted(compiled),
+        }
+        self._write_index(index)
+        return compiled
+
+    def _write_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        self._write_cache("index.json", {"format": LAYOUT_CACHE_FORMAT, "files": index})
+
+    def _compile(self, path: Path) -> Dict[str, List[CompiledDevice]]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            compiled = {
+                layout_name: [
+                    (
+                        device["side"],
+                        f"js{device['configmap_instance']}",
+                        device["name"],
+                        {
+                            key: str(device[key])
+                            for key in ("background_image", "image_width", "image_height")
+                            if key in device
+                        },
+                        [
+                            (name, int(button["x"]), int(button["y"]))
+                            for name, button in device["buttons"].items()
+                        ],
+                    )
+                    for device in layout["devices"].values()
+                ]
+                for layout_name, layout in data.items()
+            }
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid device layout file {path}: {exc!r}") from exc
+        self._write_cache(
+            f"{path.stem}.layout.json", {"format": LAYOUT_CACHE_FORMAT, "layouts": compiled}
+        )
+        return compiled
+
+    def _read_compiled(self, file_name: str) -> Optional[Dict[str, List[CompiledDevice]]]:
+        compiled = self._read_cache(f"{Path(file_name).stem}.layout.json").get("layouts")
+        if not compiled or sorted(compiled) != self._fresh_index()[file_name]["layouts"]:
+            return None
+        return compiled
+
+    def _read_cache(self, name: str) -> Dict[str, Any]:
+        if self.cache_dir is None:
+            return {}
+        try:
+            data = json.loads((self.cache_dir / name).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("format") != LAYOUT_CACHE_FORMAT:
+            return {}
+        return data
+
+    def _write_cache(self, name: str, data: Dict[str, Any]) -> None:
+        if self.cache_dir is None:
+            return
+
+        def write(handle: TextIO) -> None:
+            json.dump(data, handle, separators=(",", ":"))
+
+        try:
+            atomic_write(self.cache_dir / name, write)
+        except OSError:
+            logger.warning("Could not write device layout cache %s", self.cache_dir / name)
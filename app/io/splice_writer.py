@@ -0,0 +1,277 @@
+"""Byte-preserving export of edited control maps.
+
+``SplicedControlMapWriter`` keeps the bytes of the file a control map was
+loaded from together with the offsets of every ``<actionmap>`` and
+``<action>`` element. When an edited map is saved, only the actions that
+differ from the original are re-rendered and spliced into the original bytes;
+comments, attribute order and formatting everywhere else are left untouched.
+"""
+
+from __future__ import annotations
+
+import xml.parsers.expat
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from app.io.xml_writer import render_element
+from app.models.exported_configmap_xml import (
+    Action,
+    ActionMap,
+    ExportedActionMapsFile,
+    get_action_maps_object,
+)
+
+Edit = Tuple[int, int, bytes]
+
+
+@dataclass
+class ElementSpan:
+    """Byte range ``[start, end)`` of an element and the indentation of its line.
+
+    ``own_line`` is true when only whitespace precedes the element on its line.
+    """
+
+    start: int
+    end: int
+    indent: bytes
+    own_line: bool
+
+
+@dataclass
+class ActionMapSpan(ElementSpan):
+    actions: List[ElementSpan] = field(default_factory=list)
+
+
+def _start_tag_end(data: bytes, start: int) -> int:
+    """Return the offset just past the ``>`` closing the tag at ``start``."""
+
+    quote: Optional[int] = None
+    for index in range(start + 1, len(data)):
+        char = data[index]
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in (0x22, 0x27):  # " or '
+            quote = char
+        elif char == 0x3E:  # >
+            return index + 1
+    raise ValueError(f"Unterminated tag at offset {start}")
+
+
+def _line_info(data: bytes, start: int) -> Tuple[bytes, bool]:
+    line_start = data.rfind(b"\n", 0, start) + 1
+    prefix = data[line_start:start]
+    if line_start == 0 or prefix.strip():
+        return b"", False
+    return prefix, True
+
+
+class ControlMapSourceIndex:
+    """Offsets of the ``<actionmap>``/``<action>`` elements in an exported file."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.newline = b"\r\n" if b"\r\n" in data else b"\n"
+        self.actionmaps: List[ActionMapSpan] = []
+        self.root_close: int = len(data)
+        self._parse()
+        self.indent_unit = self._detect_indent_unit()
+
+    def _parse(self) -> None:
+        data = self.data
+        parser = xml.parsers.expat.ParserCreate()
+        stack: List[Tuple[str, int]] = []
+
+        def start_element(name: str, _attrs: Dict[str, str]) -> None:
+            stack.append((name, parser.CurrentByteIndex))
+
+        def end_element(name: str) -> None:
+            _, start = stack.pop()
+            position = parser.CurrentByteIndex
+            depth = len(stack)
+            if depth == 0:
+                self.root_close = position if data.startswith(b"</", position) else len(data)
+                return
+            if data.startswith(b"</", position):
+                end = data.index(b">", position) + 1
+            else:
+                end = _start_tag_end(data, start)
+            indent, own_line = _line_info(data, start)
+            if depth == 1 and name == "actionmap":
+                span = ActionMapSpan(start, end, indent, own_line, self._pending_actions)
+                self.actionmaps.append(span)
+                self._pending_actions = []
+            elif depth == 2 and name == "action" and stack[-1][0] == "actionmap":
+                self._pending_actions.append(ElementSpan(start, end, indent, own_line))
+
+        self._pending_actions: List[ElementSpan] = []
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.Parse(data, True)
+
+    def _detect_indent_unit(self) -> bytes:
+        for actionmap in self.actionmaps:
+            for action in actionmap.actions:
+                if action.indent.startswith(actionmap.indent) and len(action.indent) > len(
+                    actionmap.indent
+                ):
+                    return action.indent[len(actionmap.indent) :]
+        return b" "
+
+
+class SplicedControlMapWriter:
+    """Writes edited control maps by splicing changed elements into the source bytes.
+
+    ``original`` must be the model parsed from ``data`` and must not be
+    mutated. Only changes inside ``actionmap`` are supported; ``render``
+    raises ``ValueError`` when other parts of the document differ, in which
+    case callers should fall back to a full export.
+    """
+
+    def __init__(self, data: bytes, original: ExportedActionMapsFile) -> None:
+        self.index = ControlMapSourceIndex(data)
+        self.original = original
+        if len(self.index.actionmaps) != len(original.actionmap):
+            raise ValueError("Source bytes do not match the parsed control map.")
+
+    @classmethod
+    def from_file(
+        cls, path: Path, original: Optional[ExportedActionMapsFile] = None
+    ) -> "SplicedControlMapWriter":
+        if original is None:
+            original = get_action_maps_object(str(path))
+        return cls(path.read_bytes(), original)
+
+    def render(self, control_map: ExportedActionMapsFile) -> bytes:
+        """Return the source bytes with every changed element re-rendered."""
+
+        self._ensure_only_actionmaps_changed(control_map)
+        edits: List[Edit] = []
+
+        unmatched: Dict[str, List[int]] = {}
+        for index, actionmap in enumerate(self.original.actionmap):
+            unmatched.setdefault(actionmap.name, []).append(index)
+
+        added_maps: List[ActionMap] = []
+        for actionmap in control_map.actionmap:
+            candidates = unmatched.get(actionmap.name)
+            if not candidates:
+                added_maps.append(actionmap)
+                continue
+            index = candidates.pop(0)
+            original_map = self.original.actionmap[index]
+            if actionmap is original_map:
+                continue
+            self._diff_actionmap(original_map, actionmap, self.index.actionmaps[index], edits)
+
+        for indices in unmatched.values():
+            for index in indices:
+                edits.append(self._removal(self.index.actionmaps[index]))
+
+        if added_maps:
+            edits.append(self._insertion_before_root_close(added_maps))
+
+        return self._apply(edits)
+
+    def write(self, control_map: ExportedActionMapsFile, output: TextIO) -> None:
+        output.write(self.render(control_map).decode("utf-8"))
+
+    def _ensure_only_actionmaps_changed(self, control_map: ExportedActionMapsFile) -> None:
+        for name in type(control_map).model_fields:
+            if name == "actionmap":
+                continue
+            current = getattr(control_map, name)
+            original = getattr(self.original, name)
+            if current is not original and current != original:
+                raise ValueError(f"Cannot splice changes to '{name}'; a full export is required.")
+
+    def _diff_actionmap(
+        self,
+        original_map: ActionMap,
+        actionmap: ActionMap,
+        span: ActionMapSpan,
+        edits: List[Edit],
+    ) -> None:
+        if not span.actions or len(span.actions) != len(original_map.action):
+            if actionmap != original_map:
+                edits.append(self._replacement(span, "actionmap", actionmap))
+            return
+
+        unmatched: Dict[str, List[int]] = {}
+        for index, action in enumerate(original_map.action):
+            unmatched.setdefault(action.name, []).append(index)
+
+        added: List[Action] = []
+        for action in actionmap.action:
+            candidates = unmatched.get(action.name)
+            if not candidates:
+                added.append(action)
+                continue
+            index = candidates.pop(0)
+            original_action = original_map.action[index]
+            if action is original_action or action == original_action:
+                continue
+            edits.append(self._replacement(span.actions[index], "action", action))
+
+        for indices in unmatched.values():
+            for index in indices:
+                edits.append(self._removal(span.actions[index]))
+
+        if added:
+            last = span.actions[-1]
+            fragments = [
+                self.index.newline + last.indent + self._render("action", action, last.indent)
+                for action in added
+            ]
+            edits.append((last.end, last.end, b"".join(fragments)))
+
+    def _render(self, key: str, value: Any, indent: bytes) -> bytes:
+        newline = self.index.newline.decode("ascii")
+        return render_element(
+            key,
+            value,
+            indent=self.index.indent_unit.decode("utf-8"),
+            newl=newline,
+            prefix=indent.decode("utf-8"),
+        ).encode("utf-8")
+
+    def _replacement(self, span: ElementSpan, key: str, value: Any) -> Edit:
+        return span.start, span.end, self._render(key, value, span.indent)
+
+    def _removal(self, span: ElementSpan) -> Edit:
+        if not span.own_line:
+            return span.start, span.end, b""
+        start = span.start - len(span.indent) - 1
+        if self.index.data[start - 1 : start + 1] == b"\r\n":
+            start -= 1
+        return start, span.end, b""
+
+    def _insertion_before_root_close(self, actionmaps: List[ActionMap]) -> Edit:
+        data = self.index.data
+        if self.index.actionmaps:
+            last = self.index.actionmaps[-1]
+            position, indent = last.end, last.indent
+        else:
+            position = data.rfind(b"\n", 0, self.index.root_close)
+            position = self.index.root_close if position < 0 else position
+            indent = self.index.indent_unit
+        fragment = b"".join(
+            self.index.newline + indent + self._render("actionmap", actionmap, indent)
+            for actionmap in actionmaps
+        )
+        return position, position, fragment
+
+    def _apply(self, edits: List[Edit]) -> bytes:
+        data = self.index.data
+        if not edits:
+            return data
+        edits.sort(key=lambda edit: (edit[0], edit[1]))
+        chunks: List[bytes] = []
+        cursor = 0
+        for start, end, replacement in edits:
+            chunks.append(data[cursor:start])
+            chunks.append(replacement)
+            cursor = end
+        chunks.append(data[cursor:])
+        return b"".join(chunks)
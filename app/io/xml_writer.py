@@ -0,0 +1,205 @@
+"""Streaming XML serialisation for exported Star Citizen action maps.
+
+The writer walks ``ExportedActionMapsFile`` models directly and emits XML to a
+text stream in a single pass. Its output is byte-for-byte identical to
+``xmltodict.unparse(model_dump(exclude_none=True, by_alias=True))`` but it never
+materialises the intermediate dictionary tree or a full document string.
+"""
+
+from __future__ import annotations
+
+import io
+from typing import Any, Iterator, List, TextIO, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from pydantic import BaseModel
+
+from app.models.exported_configmap_xml import ExportedActionMapsFile
+
+ROOT_ELEMENT = "ActionMaps"
+ATTR_PREFIX = "@"
+CDATA_KEY = "#text"
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    return str(value)
+
+
+def _iter_items(node: Any) -> Iterator[Tuple[str, Any]]:
+    """Yield ``(key, value)`` pairs the way ``model_dump(by_alias, exclude_none)`` would."""
+
+    if isinstance(node, BaseModel):
+        for name, field in type(node).model_fields.items():
+            value = getattr(node, name)
+            if value is None:
+                continue
+            yield field.alias or name, value
+        extra = node.__pydantic_extra__
+        if extra:
+            for name, value in extra.items():
+                if value is not None:
+                    yield name, value
+        return
+    yield from node.items()
+
+
+class _StreamingXmlEmitter:
+    """Minimal re-implementation of ``xmltodict``'s emitter over a text stream."""
+
+    def __init__(
+        self,
+        output: TextIO,
+        *,
+        pretty: bool,
+        indent: str,
+        newl: str,
+        short_empty_elements: bool,
+        prefix: str = "",
+    ) -> None:
+        self._write = output.write
+        self._pretty = pretty
+        self._indent = indent
+        self._newl = newl
+        self._short_empty_elements = short_empty_elements
+        self._prefix = prefix
+        self._pending_start = False
+
+    def _finish_pending_start(self) -> None:
+        if self._pending_start:
+            self._write(">")
+            self._pending_start = False
+
+    def _whitespace(self, content: str) -> None:
+        if content:
+            self._finish_pending_start()
+            self._write(content)
+
+    def start_document(self) -> None:
+        self._write('<?xml version="1.0" encoding="utf-8"?>\n')
+
+    def end_document(self) -> None:
+        self._finish_pending_start()
+
+    def emit(self, key: str, value: Any, depth: int = 0) -> None:
+        if isinstance(value, (str, bytes, bytearray, memoryview, dict, BaseModel)) or not hasattr(
+            value, "__iter__"
+        ):
+            value = [value]
+        for item in value:
+            self._emit_element(key, item, depth)
+
+    def _emit_element(self, key: str, item: Any, depth: int) -> None:
+        if item is None:
+            item = {}
+        elif not isinstance(item, (dict, str, BaseModel)):
+            item = _to_text(item)
+        if isinstance(item, str):
+            item = {CDATA_KEY: item}
+
+        cdata = None
+        attrs: dict[str, str] = {}
+        children: List[Tuple[str, Any]] = []
+        for child_key, child_value in _iter_items(item):
+            if child_key == CDATA_KEY:
+                cdata = None if child_value is None else _to_text(child_value)
+                continue
+            if child_key.startswith(ATTR_PREFIX):
+                attrs[child_key[len(ATTR_PREFIX) :]] = (
+                    "" if child_value is None else _to_text(child_value)
+                )
+                continue
+            if isinstance(child_value, list) and not child_value:
+                continue
+            children.append((child_key, child_value))
+
+        if self._pretty and depth:
+            self._whitespace(self._prefix + depth * self._indent)
+        self._finish_pending_start()
+        self._write("<" + key)
+        for attr_name, attr_value in attrs.items():
+            self._write(f" {attr_name}={quoteattr(attr_value)}")
+        if self._short_empty_elements:
+            self._pending_start = True
+        else:
+            self._write(">")
+
+        if self._pretty and children:
+            self._whitespace(self._newl)
+        for child_key, child_value in children:
+            self.emit(child_key, child_value, depth + 1)
+        if cdata:
+            self._finish_pending_start()
+            self._write(escape(cdata))
+        if self._pretty and children:
+            self._whitespace(self._prefix + depth * self._indent)
+
+        if self._pending_start:
+            self._write("/>")
+            self._pending_start = False
+        else:
+            self._write(f"</{key}>")
+        if self._pretty and depth:
+            self._whitespace(self._newl)
+
+
+def write_action_maps(
+    data: ExportedActionMapsFile,
+    output: TextIO,
+    *,
+    pretty: bool = False,
+    indent: str = "\t",
+    newl: str = "\n",
+    short_empty_elements: bool = False,
+) -> None:
+    """Stream ``data`` as a Star Citizen ``<ActionMaps>`` document into ``output``.
+
+    Keyword arguments mirror the ``xmltodict.unparse`` options used by the
+    application so callers can swap one for the other without changing output.
+    """
+
+    emitter = _StreamingXmlEmitter(
+        output,
+        pretty=pretty,
+        indent=indent,
+        newl=newl,
+        short_empty_elements=short_empty_elements,
+    )
+    emitter.start_document()
+    emitter.emit(ROOT_ELEMENT, data)
+    emitter.end_document()
+
+
+
+def render_element(
+    key: str,
+    value: Any,
+    *,
+    indent: str = " ",
+    newl: str = "\n",
+    prefix: str = "",
+) -> str:
+    """Render a single pretty-printed element, e.g. one ``<action>``.
+
+    ``prefix`` is the indentation of the line the element starts on; nested
+    lines are indented relative to it so the fragment can be spliced into an
+    existing document without re-indenting it.
+    """
+
+    buffer = io.StringIO()
+    emitter = _StreamingXmlEmitter(
+        buffer,
+        pretty=True,
+        indent=indent,
+        newl=newl,
+        short_empty_elements=True,
+        prefix=prefix,
+    )
+    emitter.emit(key, value)
+    emitter.end_document()
+    return buffer.getvalue()
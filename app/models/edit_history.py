@@ -0,0 +1,140 @@
+"""Undo/redo history for joystick mappings."""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Sequence, Tuple
+
+from app.domain import ValidationReport
+from app.models.joystick import JoyAction, JoystickConfig, MappingKey
+
+# (side, key, mapping before the edit, mapping after the edit)
+KeyChange = Tuple[str, MappingKey, Optional[JoyAction], Optional[JoyAction]]
+
+
+@dataclass(frozen=True)
+class EditStep:
+    """One undoable edit: only the keys it changed, with their old and new actions."""
+
+    label: str
+    changes: Tuple[KeyChange, ...]
+
+
+@dataclass
+class EditTransaction:
+    """Outcome of a batch of edits committed together.
+
+    ``report`` is the validation report of the committed state, ``step`` the
+    history entry the batch became, and ``rolled_back`` is set when the
+    batch was reverted instead.
+    """
+
+    label: str
+    report: Optional[ValidationReport] = None
+    step: Optional[EditStep] = None
+    rolled_back: bool = False
+
+
+class EditHistory:
+    """Undo/redo stacks for a set of ``JoystickConfig`` objects.
+
+    The configs journal every changed key; ``record`` turns the journal into
+    an ``EditStep``. A step holds references to the ``JoyAction`` objects
+    that were replaced or added, never copies of the configs, so every step
+    costs memory proportional to the keys it changed and all unchanged
+    mappings are shared between the current state and every point in the
+    history. At most ``limit`` steps are kept.
+    """
+
+    def __init__(self, configs: Sequence[JoystickConfig], limit: int = 10_000) -> None:
+        self.configs: Dict[str, JoystickConfig] = {config.side: config for config in configs}
+        self._undo: Deque[EditStep] = deque(maxlen=limit)
+        self._redo: Deque[EditStep] = deque(maxlen=limit)
+        for config in self.configs.values():
+            config.start_journal()
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo) or self._has_pending()
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    @property
+    def has_pending(self) -> bool:
+        """True when the configs changed since the last recorded step."""
+        return self._has_pending()
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+    def record(self, label: str) -> Optional[EditStep]:
+        """Close the current edit. Returns ``None`` if nothing changed."""
+
+        changes = tuple(
+            (side, key, before, after)
+            for side, config in self.configs.items()
+            for key, (before, after) in config.take_journal().items()
+        )
+        if not changes:
+            return None
+        step = EditStep(label, changes)
+        self._undo.append(step)
+        self._redo.clear()
+        return step
+
+    def undo(self) -> Optional[EditStep]:
+        self.record("Edit")
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        self._apply(step, undo=True)
+        self._redo.append(step)
+        return step
+
+    def redo(self) -> Optional[EditStep]:
+        if self._has_pending() or not self._redo:
+            return None
+        step = self._redo.pop()
+        self._apply(step, undo=False)
+        self._undo.append(step)
+        return step
+
+    def rollback(self) -> bool:
+        """Revert the edits made since the last recorded step.
+
+        Returns ``False`` if there was nothing to revert.
+        """
+
+        changes = [
+            (side, key, before, after)
+            for side, config in self.configs.items()
+            for key, (before, after) in config.take_journal().items()
+        ]
+        if not changes:
+            return False
+        self._apply(EditStep("Rollback", tuple(changes)), undo=True)
+        return True
+
+    def reset(self) -> None:
+        """Forget all history, e.g. after loading a different control map."""
+
+        self._undo.clear()
+        self._redo.clear()
+        for config in self.configs.values():
+            config.take_journal()
+
+    def _has_pending(self) -> bool:
+        return any(config.has_journal_entries for config in self.configs.values())
+
+    def _apply(self, step: EditStep, *, undo: bool) -> None:
+        changes = reversed(step.changes) if undo else step.changes
+        for side, key, before, after in changes:
+            target = before if undo else after
+            config = self.configs[side]
+            if target is None:
+                config.remove_mapping_by_key(key)
+            else:
+                config.set_mapping(target)
+        for config in self.configs.values():
+            config.take_journal()
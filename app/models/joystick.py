@@ -1,14 +1,36 @@
-from typing import Dict, Literal
-import xml.etree.ElementTree as ET
-from pydantic import BaseModel, Field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_serializer, field_validator
 
 from app.config import Config
-from app.globals import localization_file
+from app.globals import localization_file, user_cache_dir
+from app.io.fragment_writer import ActionFragmentWriter
+from app.models.slot_occupancy import ButtonOccupancyBitmap, FreeSlot
+
+if TYPE_CHECKING:
+    from app.io.repositories import DeviceLayoutRepository
 
 config = Config.get_config()
 
 
 class JoyStickButton(BaseModel):
+    """A button of a chart layout; instances are shared through ``BUTTON_REGISTRY``."""
+
+    model_config = ConfigDict(frozen=True)
+
     name: str  # example: button 3
     sc_config_name: str  # simplified name that sc uses like js1_2, where 2 is the button number 2
     coord_x_left: Dict[
@@ -17,6 +39,15 @@ class JoyStickButton(BaseModel):
     coord_y_top: int  # y coordinate of the button on the left image
 
 
+class MappingKey(NamedTuple):
+    """Key of a mapping in a ``JoystickConfig``: one per action and activation mode."""
+
+    name: str
+    modifier: bool = False
+    multitap: bool = False
+    hold: bool = False
+
+
 class JoyAction(BaseModel):
     name: str
     input: str
@@ -27,628 +58,388 @@ class JoyAction(BaseModel):
     hold: bool = False
     button: JoyStickButton
 
+    @field_validator("button", mode="before")
+    @classmethod
+    def resolve_button(cls, value: Any) -> Any:
+        """Resolve a saved button id, or an embedded button, to the shared instance."""
+        if isinstance(value, str):
+            return BUTTON_REGISTRY.get(value)
+        if isinstance(value, dict):
+            return BUTTON_REGISTRY.intern(JoyStickButton.model_validate(value))
+        return value
+
+    @field_serializer("button")
+    def dump_button(self, button: JoyStickButton) -> Union[str, Dict[str, Any]]:
+        button_id = BUTTON_REGISTRY.id_of(button)
+        return button_id if button_id is not None else button.model_dump()
+
     @property
     def actionmap_section(self) -> str:
         """Return the section of the action map."""
         return localization_file.get_localization_string(self.sub_category)
 
     @property
-    def key(self) -> str:
+    def key(self) -> MappingKey:
         """Return a unique key for the action."""
-        return f"{self.name}-{self.modifier}-{self.multitap}-{self.hold}"
+        return MappingKey(self.name, self.modifier, self.multitap, self.hold)
 
-    def to_xml(self) -> str:
+    def to_xml(self, modifier_key: Optional[str] = None) -> str:
         """
         Generate the XML representation of the JoyAction.
-        """
-        # Create the root element <action>
-        action_element = ET.Element("action", attrib={"name": self.name})
 
-        # Prepare the input attribute
-        input_value = self.input
-        if self.modifier:
-            # Split input to get the 'jsN' part and the button part
-            js_part, button_part = self.input.split("_", 1)
-            input_value = f"{js_part}_{config.modifier_key}+{button_part}"
+        Use ``ActionFragmentWriter`` directly when rendering many actions.
+        """
+        return ActionFragmentWriter(modifier_key or config.modifier_key).render_action(self)
 
-        # Prepare attributes for <rebind>
-        rebind_attrib = {"input": input_value}
 
-        if self.multitap:
-            rebind_attrib["multiTap"] = "2"  # '2' indicates the number of taps
+MappingChange = Tuple[Optional[JoyAction], Optional[JoyAction]]
 
-        # Create the <rebind> element
-        ET.SubElement(action_element, "rebind", attrib=rebind_attrib)
 
-        # Convert the ElementTree to a string
-        xml_str = ET.tostring(action_element, encoding="unicode")
+class JoystickConfig(BaseModel):
+    side: str  # device role: "left" or "right" stick, "throttle", "pedals", ...
+    configured_actions: Dict[MappingKey, JoyAction] = Field(...)
+    _occupancy: Optional[ButtonOccupancyBitmap] = PrivateAttr(default=None)
+    _journal: Optional[Dict[MappingKey, MappingChange]] = PrivateAttr(default=None)
+    # Keys grouped by button name and by action name; dicts used as ordered sets.
+    _by_button: Dict[str, Dict[MappingKey, None]] = PrivateAttr(default_factory=dict)
+    _by_action: Dict[str, Dict[MappingKey, None]] = PrivateAttr(default_factory=dict)
+    _indexed_actions: Optional[Dict[MappingKey, JoyAction]] = PrivateAttr(default=None)
+    # Keys changed since the last take_changed_keys(), for mirrors such as the UI's profile
+    _changed_keys: Dict[MappingKey, None] = PrivateAttr(default_factory=dict)
+    _tracked_actions: Optional[Dict[MappingKey, JoyAction]] = PrivateAttr(default=None)
 
-        return xml_str
+    @field_validator("configured_actions", mode="before")
+    @classmethod
+    def key_actions(cls, value: Any) -> Any:
+        """Key the actions by ``MappingKey``.
 
+        Accepts the saved list of actions and, for configs saved before the
+        keys were structured, a dict keyed by ``"name-modifier-multitap-hold"``
+        strings. Those strings are ambiguous when a name contains ``-``, so
+        the keys are rebuilt from the actions themselves.
+        """
+        if isinstance(value, dict):
+            if all(isinstance(key, MappingKey) for key in value):
+                return value
+            value = list(value.values())
+        if not isinstance(value, list):
+            return value
+        actions = [JoyAction.model_validate(item) for item in value]
+        return {action.key: action for action in actions}
 
-class JoystickConfig(BaseModel):
-    side: Literal["left", "right"]  # left or right joystick
-    configured_actions: Dict[str, JoyAction] = Field(...)
+    @field_serializer("configured_actions")
+    def dump_actions(self, actions: Dict[MappingKey, JoyAction]) -> List[Dict[str, Any]]:
+        return [action.model_dump() for action in actions.values()]
 
-    def _create_configured_actions_hashmap(self) -> Dict[str, JoyAction]:
+    def _create_configured_actions_hashmap(self) -> Dict[MappingKey, JoyAction]:
         return {
             configured_action.key: configured_action
             for configured_action in self.configured_actions.values()
         }
 
+    def occupancy(self, button_names: Optional[Sequence[str]] = None) -> ButtonOccupancyBitmap:
+        """Return the occupancy bitmap, building it on first use.
+
+        The bitmap covers ``button_names`` (the VKB Default layout when not
+        given) and is kept in sync by the mapping methods below; passing a
+        different layout rebuilds it.
+        """
+        names = list(button_names) if button_names is not None else _default_button_names()
+        if self._occupancy is None or self._occupancy.button_names != names:
+            occupancy = ButtonOccupancyBitmap(names)
+            for action in self.configured_actions.values():
+                occupancy.occupy(action.button.name, action.modifier, action.multitap, action.hold)
+            self._occupancy = occupancy
+        return self._occupancy
+
+    def _indexes(
+        self,
+    ) -> Tuple[Dict[str, Dict[MappingKey, None]], Dict[str, Dict[MappingKey, None]]]:
+        """Return the button and action indexes, rebuilding them if
+        ``configured_actions`` was replaced instead of edited through the
+        mapping methods."""
+        if self._indexed_actions is not self.configured_actions:
+            self._by_button = {}
+            self._by_action = {}
+            for key, action in self.configured_actions.items():
+                self._by_button.setdefault(action.button.name, {})[key] = None
+                self._by_action.setdefault(action.name, {})[key] = None
+            self._indexed_actions = self.configured_actions
+        return self._by_button, self._by_action
+
+    def _unindex(self, key: MappingKey, action: JoyAction) -> None:
+        for index, name in ((self._by_button, action.button.name), (self._by_action, action.name)):
+            keys = index.get(name)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del index[name]
+
+    def start_journal(self) -> None:
+        """Start recording the ``(before, after)`` mapping of every changed key."""
+        self._journal = {}
+
+    @property
+    def has_journal_entries(self) -> bool:
+        return bool(self._journal)
+
+    def take_journal(self) -> Dict[MappingKey, MappingChange]:
+        """Return the changes recorded since the last call and keep recording."""
+        journal = self._journal
+        if journal is None:
+            return {}
+        self._journal = {}
+        return journal
+
+    def take_changed_keys(self) -> Optional[List[MappingKey]]:
+        """Return the keys whose mapping changed since the last call.
+
+        Returns ``None`` on the first call and whenever ``configured_actions``
+        was replaced as a whole, in which case every key has to be re-read.
+        """
+        if self._tracked_actions is not self.configured_actions:
+            self._tracked_actions = self.configured_actions
+            self._changed_keys = {}
+            return None
+        keys = list(self._changed_keys)
+        self._changed_keys = {}
+        return keys
+
+    def _put(self, key: MappingKey, action: JoyAction) -> None:
+        by_button, by_action = self._indexes()
+        previous = self.configured_actions.get(key)
+        self.configured_actions[key] = action
+        if previous is not None:
+            self._unindex(key, previous)
+        by_button.setdefault(action.button.name, {})[key] = None
+        by_action.setdefault(action.name, {})[key] = None
+        if self._occupancy is not None:
+            if previous is not None:
+                self._occupancy.release(
+                    previous.button.name, previous.modifier, previous.multitap, previous.hold
+                )
+            self._occupancy.occupy(
+                action.button.name, action.modifier, action.multitap, action.hold
+            )
+        self._record(key, previous, action)
+
+    def _pop(self, key: MappingKey) -> None:
+        self._indexes()
+        previous = self.configured_actions.pop(key, None)
+        if previous is None:
+            return
+        self._unindex(key, previous)
+        if self._occupancy is not None:
+            self._occupancy.release(
+                previous.button.name, previous.modifier, previous.multitap, previous.hold
+            )
+        self._record(key, previous, None)
+
+    def _record(
+        self, key: MappingKey, before: Optional[JoyAction], after: Optional[JoyAction]
+    ) -> None:
+        self._changed_keys[key] = None
+        journal = self._journal
+        if journal is None:
+            return
+        if key in journal:
+            before = journal[key][0]
+        if before is after:
+            journal.pop(key, None)
+        else:
+            journal[key] = (before, after)
+
+    def is_slot_free(
+        self, button_name: str, modifier: bool = False, multitap: bool = False, hold: bool = False
+    ) -> bool:
+        return self.occupancy().is_free(button_name, modifier, multitap, hold)
+
+    def free_slots(
+        self,
+        modifier: Optional[bool] = None,
+        multitap: Optional[bool] = None,
+        hold: Optional[bool] = None,
+    ) -> List[FreeSlot]:
+        return self.occupancy().free_slots(modifier, multitap, hold)
+
+    def nearest_free_button(
+        self, button_name: str, modifier: bool = False, multitap: bool = False, hold: bool = False
+    ) -> Optional[str]:
+        return self.occupancy().nearest_free(button_name, modifier, multitap, hold)
+
     def get_configured_button(
         self, button_name: str, multitap: bool = False, modifier: bool = False, hold: bool = False
     ) -> JoyAction | None:
-        return self.configured_actions.get(f"{button_name}-{modifier}-{multitap}-{hold}", None)
+        return self.configured_actions.get(MappingKey(button_name, modifier, multitap, hold))
 
     def clear_mapping(
         self, button_name: str, multitap: bool = False, modifier: bool = False, hold: bool = False
     ) -> None:
         """Clear the action mapping for a specific button."""
-        key = f"{button_name}-{modifier}-{multitap}-{hold}"
-        if key in self.configured_actions:
-            self.configured_actions.pop(key)
+        self._pop(MappingKey(button_name, modifier, multitap, hold))
 
     def set_mapping(self, joy_action: JoyAction) -> None:
-        self.configured_actions[joy_action.key] = joy_action
+        self._put(joy_action.key, joy_action)
 
     def clear_mappings(self) -> None:
         """Clear all mappings."""
+        if self._journal is not None:
+            for key, action in self.configured_actions.items():
+                self._record(key, action, None)
         self.configured_actions = {}
+        self._indexes()
+        if self._occupancy is not None:
+            self._occupancy.clear()
+
+    def replace_mappings(self, actions: Dict[MappingKey, JoyAction]) -> None:
+        """Install a complete set of mappings, e.g. one built by ``MappingBuilder``.
+
+        Takes ownership of ``actions``. The indexes and the occupancy bitmap
+        are rebuilt once on next use instead of once per mapping.
+        """
+        if self._journal is not None:
+            for key, action in self.configured_actions.items():
+                self._record(key, action, actions.get(key))
+            for key, action in actions.items():
+                if key not in self.configured_actions:
+                    self._record(key, None, action)
+        self.configured_actions = actions
+        self._occupancy = None
 
-    def remove_mapping_by_key(self, key: str) -> None:
+    def remove_mapping_by_key(self, key: MappingKey) -> None:
         """Remove a mapping by key."""
-        self.configured_actions.pop(key, None)
+        self._pop(key)
 
     def unbind_action(self, action_name: str) -> None:
         """Remove all mappings for a specific action."""
-        configured_actions_copy = self.configured_actions.copy()
-        for key, action in configured_actions_copy.items():
-            if action.name == action_name:
-                self.configured_actions.pop(key)
+        _by_button, by_action = self._indexes()
+        for key in list(by_action.get(action_name, ())):
+            self._pop(key)
+
+    def has_action(self, action_name: str) -> bool:
+        return action_name in self._indexes()[1]
 
     def get_actions_for_button(
         self, button_name: str, modifier: bool, multitap: bool, hold: bool = False
-    ) -> Dict[str, JoyAction]:
+    ) -> Dict[MappingKey, JoyAction]:
+        actions = self.get_all_actions_for_button_no_filter(button_name)
         return {
             key: action
-            for key, action in self.configured_actions.items()
-            if action.button.name == button_name
-            and action.multitap == multitap
-            and action.modifier == modifier
-            and action.hold == hold
+            for key, action in actions.items()
+            if action.multitap == multitap and action.modifier == modifier and action.hold == hold
         }
 
-    def get_all_actions_for_button_no_filter(self, button_name: str) -> Dict[str, JoyAction]:
-        return {
-            key: action
-            for key, action in self.configured_actions.items()
-            if action.button.name == button_name
-        }
+    def get_all_actions_for_button_no_filter(self, button_name: str) -> Dict[MappingKey, JoyAction]:
+        configured_actions = self.configured_actions
+        return {key: configured_actions[key] for key in self._indexes()[0].get(button_name, ())}
 
 
-BUTTON_LAYOUTS: Dict[str, list[JoyStickButton]] = {
-    "VKB New": [
-        JoyStickButton(
-            name="hat1_up",
-            sc_config_name="hat1_up",
-            coord_x_left={"left": 265, "right": 1565},
-            coord_y_top=52,
-        ),
-        JoyStickButton(
-            name="hat1_up_right",
-            sc_config_name="hat1_up_right",
-            coord_x_left={"left": 457, "right": 1755},
-            coord_y_top=52,
-        ),
-        JoyStickButton(
-            name="hat1_up_left",
-            sc_config_name="hat1_up_left",
-            coord_x_left={"left": 71, "right": 1371},
-            coord_y_top=52,
-        ),
-        JoyStickButton(
-            name="hat1_left",
-            sc_config_name="hat1_left",
-            coord_x_left={"left": 71, "right": 1371},
-            coord_y_top=87,
-        ),
-        JoyStickButton(
-            name="hat1_right",
-            sc_config_name="hat1_right",
-            coord_x_left={"left": 457, "right": 1755},
-            coord_y_top=87,
-        ),
-        JoyStickButton(
-            name="hat1_down_left",
-            sc_config_name="hat1_down_left",
-            coord_x_left={"left": 71, "right": 1371},
-            coord_y_top=122,
-        ),
-        JoyStickButton(
-            name="hat1_down",
-            sc_config_name="hat1_down",
-            coord_x_left={"left": 265, "right": 1565},
-            coord_y_top=122,
-        ),
-        JoyStickButton(
-            name="hat1_down_right",
-            sc_config_name="hat1_down_right",
-            coord_x_left={"left": 457, "right": 1755},
-            coord_y_top=122,
-        ),
-        JoyStickButton(
-            name="button1",
-            sc_config_name="button1",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=334,
-        ),
-        JoyStickButton(
-            name="button2",
-            sc_config_name="button2",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=365,
-        ),
-        JoyStickButton(
-            name="button3",
-            sc_config_name="button3",
-            coord_x_left={"left": 457, "right": 1370},
-            coord_y_top=260,
-        ),
-        JoyStickButton(
-            name="button4",
-            sc_config_name="button4",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=190,
-        ),
-        JoyStickButton(
-            name="button5",
-            sc_config_name="button5",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=419,
-        ),
-        JoyStickButton(
-            name="button6",
-            sc_config_name="button6",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=524,
-        ),
-        JoyStickButton(
-            name="button7",
-            sc_config_name="button7",
-            coord_x_left={"left": 457, "right": 1756},
-            coord_y_top=560,
-        ),
-        JoyStickButton(
-            name="button8",
-            sc_config_name="button8",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=592,
-        ),
-        JoyStickButton(
-            name="button9",
-            sc_config_name="button9",
-            coord_x_left={"left": 71, "right": 1370},
-            coord_y_top=560,
-        ),
-        JoyStickButton(
-            name="button10",
-            sc_config_name="button10",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=560,
-        ),
-        JoyStickButton(
-            name="button11",
-            sc_config_name="button11",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=367,
-        ),
-        JoyStickButton(
-            name="button12",
-            sc_config_name="button12",
-            coord_x_left={"left": 457, "right": 1756},
-            coord_y_top=402,
-        ),
-        JoyStickButton(
-            name="button13",
-            sc_config_name="button13",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=437,
-        ),
-        JoyStickButton(
-            name="button14",
-            sc_config_name="button14",
-            coord_x_left={"left": 71, "right": 1370},
-            coord_y_top=402,
-        ),
-        JoyStickButton(
-            name="button15",
-            sc_config_name="button15",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=402,
-        ),
-        JoyStickButton(
-            name="button16",
-            sc_config_name="button16",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=683,
-        ),
-        JoyStickButton(
-            name="button17",
-            sc_config_name="button17",
-            coord_x_left={"left": 457, "right": 1756},
-            coord_y_top=718,
-        ),
-        JoyStickButton(
-            name="button18",
-            sc_config_name="button18",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=752,
-        ),
-        JoyStickButton(
-            name="button19",
-            sc_config_name="button19",
-            coord_x_left={"left": 71, "right": 1370},
-            coord_y_top=718,
-        ),
-        JoyStickButton(
-            name="button20",
-            sc_config_name="button20",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=718,
-        ),
-        JoyStickButton(
-            name="button21",
-            sc_config_name="button21",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=243,
-        ),
-        JoyStickButton(
-            name="button22",
-            sc_config_name="button22",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=278,
-        ),
-        JoyStickButton(
-            name="button23",
-            sc_config_name="button23",
-            coord_x_left={"left": 1389, "right": 123},
-            coord_y_top=614,
-        ),
-        JoyStickButton(
-            name="button24",
-            sc_config_name="button24",
-            coord_x_left={"left": 1389, "right": 123},
-            coord_y_top=648,
-        ),
-        JoyStickButton(
-            name="button25",
-            sc_config_name="button25",
-            coord_x_left={"left": 1740, "right": 471},
-            coord_y_top=614,
-        ),
-        JoyStickButton(
-            name="button26",
-            sc_config_name="button26",
-            coord_x_left={"left": 1740, "right": 471},
-            coord_y_top=648,
-        ),
-        JoyStickButton(
-            name="button27",
-            sc_config_name="button27",
-            coord_x_left={"left": 1354, "right": 85},
-            coord_y_top=505,
-        ),
-        JoyStickButton(
-            name="button28",
-            sc_config_name="button28",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=505,
-        ),
-        JoyStickButton(
-            name="button29",
-            sc_config_name="button29",
-            coord_x_left={"left": 1740, "right": 471},
-            coord_y_top=505,
-        ),
-        JoyStickButton(
-            name="z", sc_config_name="z", coord_x_left={"left": 1545, "right": 278}, coord_y_top=719
-        ),
-        JoyStickButton(
-            name="x", sc_config_name="x", coord_x_left={"left": 950, "right": 875}, coord_y_top=86
-        ),
-        JoyStickButton(
-            name="y", sc_config_name="y", coord_x_left={"left": 950, "right": 875}, coord_y_top=122
-        ),
-        JoyStickButton(
-            name="rotz",
-            sc_config_name="rotz",
-            coord_x_left={"left": 950, "right": 875},
-            coord_y_top=155,
-        ),
-        JoyStickButton(
-            name="rotx",
-            sc_config_name="rotx",
-            coord_x_left={"left": 71, "right": 1755},
-            coord_y_top=262,
-        ),
-        JoyStickButton(
-            name="roty",
-            sc_config_name="roty",
-            coord_x_left={"left": 71, "right": 1755},
-            coord_y_top=295,
-        ),
-    ],
-    "VKB Default": [
-        JoyStickButton(
-            name="hat1_up",
-            sc_config_name="hat1_up",
-            coord_x_left={"left": 265, "right": 1565},
-            coord_y_top=52,
-        ),
-        JoyStickButton(
-            name="hat1_up_right",
-            sc_config_name="hat1_up_right",
-            coord_x_left={"left": 457, "right": 1755},
-            coord_y_top=52,
-        ),
-        JoyStickButton(
-            name="hat1_up_left",
-            sc_config_name="hat1_up_left",
-            coord_x_left={"left": 71, "right": 1371},
-            coord_y_top=52,
-        ),
-        JoyStickButton(
-            name="hat1_left",
-            sc_config_name="hat1_left",
-            coord_x_left={"left": 71, "right": 1371},
-            coord_y_top=87,
-        ),
-        JoyStickButton(
-            name="hat1_right",
-            sc_config_name="hat1_right",
-            coord_x_left={"left": 457, "right": 1755},
-            coord_y_top=87,
-        ),
-        JoyStickButton(
-            name="hat1_down_left",
-            sc_config_name="hat1_down_left",
-            coord_x_left={"left": 71, "right": 1371},
-            coord_y_top=122,
-        ),
-        JoyStickButton(
-            name="hat1_down",
-            sc_config_name="hat1_down",
-            coord_x_left={"left": 265, "right": 1565},
-            coord_y_top=122,
-        ),
-        JoyStickButton(
-            name="hat1_down_right",
-            sc_config_name="hat1_down_right",
-            coord_x_left={"left": 457, "right": 1755},
-            coord_y_top=122,
-        ),
-        # trigger
-        JoyStickButton(
-            name="button1",
-            sc_config_name="button1",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=334,
-        ),
-        JoyStickButton(
-            name="button2",
-            sc_config_name="button2",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=365,
-        ),
-        # red button
-        JoyStickButton(
-            name="button3",
-            sc_config_name="button3",
-            coord_x_left={"left": 457, "right": 1370},
-            coord_y_top=260,
-        ),
-        # external button
-        JoyStickButton(
-            name="button4",
-            sc_config_name="button4",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=190,
-        ),
-        # base_button
-        JoyStickButton(
-            name="button5",
-            sc_config_name="button5",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=419,
-        ),
-        # cross button
-        JoyStickButton(
-            name="button6",
-            sc_config_name="button6",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=524,
-        ),
-        JoyStickButton(
-            name="button7",
-            sc_config_name="button7",
-            coord_x_left={"left": 457, "right": 1756},
-            coord_y_top=560,
-        ),
-        JoyStickButton(
-            name="button8",
-            sc_config_name="button8",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=592,
-        ),
-        JoyStickButton(
-            name="button9",
-            sc_config_name="button9",
-            coord_x_left={"left": 71, "right": 1370},
-            coord_y_top=560,
-        ),
-        JoyStickButton(
-            name="button10",
-            sc_config_name="button10",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=560,
-        ),
-        # top buttons
-        JoyStickButton(
-            name="button11",
-            sc_config_name="button11",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=367,
-        ),
-        JoyStickButton(
-            name="button12",
-            sc_config_name="button12",
-            coord_x_left={"left": 457, "right": 1756},
-            coord_y_top=402,
-        ),
-        JoyStickButton(
-            name="button13",
-            sc_config_name="button13",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=437,
-        ),
-        JoyStickButton(
-            name="button14",
-            sc_config_name="button14",
-            coord_x_left={"left": 71, "right": 1370},
-            coord_y_top=402,
-        ),
-        JoyStickButton(
-            name="button15",
-            sc_config_name="button15",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=402,
-        ),
-        # thumb buttons
-        JoyStickButton(
-            name="button16",
-            sc_config_name="button16",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=683,
-        ),
-        JoyStickButton(
-            name="button17",
-            sc_config_name="button17",
-            coord_x_left={"left": 457, "right": 1756},
-            coord_y_top=718,
-        ),
-        JoyStickButton(
-            name="button18",
-            sc_config_name="button18",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=752,
-        ),
-        JoyStickButton(
-            name="button19",
-            sc_config_name="button19",
-            coord_x_left={"left": 71, "right": 1370},
-            coord_y_top=718,
-        ),
-        JoyStickButton(
-            name="button20",
-            sc_config_name="button20",
-            coord_x_left={"left": 265, "right": 1562},
-            coord_y_top=718,
-        ),
-        # upper trigger
-        JoyStickButton(
-            name="button21",
-            sc_config_name="button21",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=243,
-        ),
-        JoyStickButton(
-            name="button22",
-            sc_config_name="button22",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=278,
-        ),
-        # encoders 1
-        JoyStickButton(
-            name="button23",
-            sc_config_name="button23",
-            coord_x_left={"left": 1389, "right": 123},
-            coord_y_top=614,
-        ),
-        JoyStickButton(
-            name="button24",
-            sc_config_name="button24",
-            coord_x_left={"left": 1389, "right": 123},
-            coord_y_top=648,
-        ),
-        # encoder 2
-        JoyStickButton(
-            name="button25",
-            sc_config_name="button25",
-            coord_x_left={"left": 1740, "right": 471},
-            coord_y_top=614,
-        ),
-        JoyStickButton(
-            name="button26",
-            sc_config_name="button26",
-            coord_x_left={"left": 1740, "right": 471},
-            coord_y_top=648,
-        ),
-        # base buttons
-        JoyStickButton(
-            name="button27",
-            sc_config_name="button27",
-            coord_x_left={"left": 1354, "right": 85},
-            coord_y_top=505,
-        ),
-        JoyStickButton(
-            name="button28",
-            sc_config_name="button28",
-            coord_x_left={"left": 1545, "right": 278},
-            coord_y_top=505,
-        ),
-        JoyStickButton(
-            name="button29",
-            sc_config_name="button29",
-            coord_x_left={"left": 1740, "right": 471},
-            coord_y_top=505,
-        ),
-        # base axis
-        JoyStickButton(
-            name="z", sc_config_name="z", coord_x_left={"left": 1545, "right": 278}, coord_y_top=719
-        ),
-        # JoyStickButton(name="Throttle Axis", sc_config_name="axis_z", coord_x_left={"left": 1545, "right": 278}, coord_y_top=505),
-        JoyStickButton(
-            name="x", sc_config_name="x", coord_x_left={"left": 950, "right": 875}, coord_y_top=86
-        ),
-        JoyStickButton(
-            name="y", sc_config_name="y", coord_x_left={"left": 950, "right": 875}, coord_y_top=122
-        ),
-        JoyStickButton(
-            name="rotz",
-            sc_config_name="rotz",
-            coord_x_left={"left": 950, "right": 875},
-            coord_y_top=155,
-        ),
-        # to troubleshoot  seem to be  when mode is switched for POV hat
-        JoyStickButton(
-            name="rotx",
-            sc_config_name="rotx",
-            coord_x_left={"left": 71, "right": 1755},
-            coord_y_top=262,
-        ),
-        JoyStickButton(
-            name="roty",
-            sc_config_name="roty",
-            coord_x_left={"left": 71, "right": 1755},
-            coord_y_top=295,
-        ),
-    ],
-}
+DEFAULT_CHART = "VKB Default"
+
+
+class ButtonRegistry:
+    """Shared, immutable ``JoyStickButton`` instances of every chart layout.
+
+    Each button is registered once under the id ``"<chart name>/<button name>"``.
+    Mappings hold the registered instance instead of a copy, and saved
+    configs store the id instead of the button's coordinates. Charts are
+    loaded through ``load_chart`` the first time they are used.
+    """
+
+    def __init__(
+        self, load_chart: Callable[[str], Optional[Sequence[JoyStickButton]]] = lambda _: None
+    ) -> None:
+        self._load_chart = load_chart
+        self._layouts: Dict[str, Dict[str, JoyStickButton]] = {}
+        self._by_id: Dict[str, JoyStickButton] = {}
+        # Keyed by ``id()`` of the registered instances, which the registry keeps alive.
+        self._ids: Dict[int, str] = {}
+
+    def register(self, chart_name: str, buttons: Iterable[JoyStickButton]) -> None:
+        layout = self._layouts.setdefault(chart_name, {})
+        for button in buttons:
+            button_id = f"{chart_name}/{button.name}"
+            layout[button.name] = self._by_id[button_id] = button
+            self._ids[id(button)] = button_id
+
+    def layout(self, chart_name: str) -> Mapping[str, JoyStickButton]:
+        layout = self._layouts.get(chart_name)
+        if layout is None:
+            buttons = self._load_chart(chart_name)
+            if buttons is None:
+                raise ValueError(f"Unsupported chart name: {chart_name}")
+            self.register(chart_name, buttons)
+            layout = self._layouts[chart_name]
+        return layout
+
+    def get(self, button_id: str) -> JoyStickButton:
+        button = self._by_id.get(button_id)
+        if button is None:
+            chart_name, _, name = button_id.rpartition("/")
+            try:
+                button = self.layout(chart_name).get(name) if chart_name else None
+            except ValueError:
+                button = None
+        if button is None:
+            raise ValueError(f"Unknown joystick button: {button_id}")
+        return button
+
+    def id_of(self, button: JoyStickButton) -> Optional[str]:
+        return self._ids.get(id(button))
+
+    def intern(self, button: JoyStickButton) -> JoyStickButton:
+        """Return the registered button equal to ``button``, or ``button`` itself.
+
+        Buttons embedded by older saved configs are matched against the
+        loaded charts, loading the default chart first if needed.
+        """
+        self.layout(DEFAULT_CHART)
+        for layout in self._layouts.values():
+            registered = layout.get(button.name)
+            if registered == button:
+                return registered
+        return button
+
+
+def _load_chart(chart_name: str) -> Optional[List[JoyStickButton]]:
+    # Imported here because app.io imports this module through its package __init__.
+    from app.io.repositories import DeviceLayoutRepository
+
+    global _layout_repository
+    if _layout_repository is None:
+        _layout_repository = DeviceLayoutRepository(cache_dir=user_cache_dir() / "layouts")
+    layouts = _layout_repository.load_layouts(chart_name)
+    left, right = layouts.get("left"), layouts.get("right")
+    if left is None or right is None:
+        return None
+    return [
+        JoyStickButton(
+            name=name,
+            sc_config_name=name,
+            coord_x_left={"left": x, "right": right.positions.get(name, (x, y))[0]},
+            coord_y_top=y,
+        )
+        for name, (x, y) in left.positions.items()
+    ]
+
+
+_layout_repository: Optional["DeviceLayoutRepository"] = None
+BUTTON_REGISTRY = ButtonRegistry(_load_chart)
+
+
+def set_layout_repository(repository: Optional["DeviceLayoutRepository"]) -> None:
+    """Load charts not yet in ``BUTTON_REGISTRY`` from ``repository``.
+
+    ``None`` restores the default repository, which caches compiled layouts
+    in the user cache directory.
+    """
+    global _layout_repository
+    _layout_repository = repository
 
 
 def get_joystick_buttons(chart_name: Literal["VKB Default"]) -> Dict[str, JoyStickButton]:
-    layout = BUTTON_LAYOUTS.get(chart_name)
-    if layout is None:
-        raise ValueError(f"Unsupported chart name: {chart_name}")
-    return {button.name: button.model_copy() for button in layout}
+    return dict(BUTTON_REGISTRY.layout(chart_name))
+
+
+def _default_button_names() -> List[str]:
+    return list(BUTTON_REGISTRY.layout(DEFAULT_CHART))
@@ -0,0 +1,49 @@
+"""Bulk construction of joystick mappings while loading a control map."""
+
+from typing import Dict, Mapping, Optional, Tuple
+
+from app.models.joystick import JoyAction, JoystickConfig, MappingKey
+
+
+class MappingBuilder:
+    """Mappings per device role, built in plain dicts and installed at once.
+
+    Roles are created on first use, so any role name works, not just the
+    ``left`` and ``right`` sticks. ``bind`` applies the load rule that an
+    action is mapped to one button only: earlier mappings of the same
+    action, on any device, are dropped.
+    An action-name index makes this O(1) per rebind instead of a scan of
+    both configs. ``put`` adds a mapping without the rule, like
+    ``JoystickConfig.set_mapping``.
+    """
+
+    def __init__(
+        self, initial: Optional[Mapping[str, Mapping[MappingKey, JoyAction]]] = None
+    ) -> None:
+        self.actions: Dict[str, Dict[MappingKey, JoyAction]] = {}
+        self._by_action: Dict[str, Dict[Tuple[str, MappingKey], None]] = {}
+        for side, actions in (initial or {}).items():
+            for action in actions.values():
+                self.put(side, action)
+
+    @classmethod
+    def from_configs(cls, *configs: JoystickConfig) -> "MappingBuilder":
+        return cls({config.side: config.configured_actions for config in configs})
+
+    def has_action(self, action_name: str) -> bool:
+        return action_name in self._by_action
+
+    def put(self, side: str, joy_action: JoyAction) -> None:
+        key = joy_action.key
+        self.actions.setdefault(side, {})[key] = joy_action
+        self._by_action.setdefault(joy_action.name, {})[side, key] = None
+
+    def bind(self, side: str, joy_action: JoyAction) -> None:
+        for bound_side, key in self._by_action.pop(joy_action.name, ()):
+            self.actions[bound_side].pop(key, None)
+        self.put(side, joy_action)
+
+    def install(self, *configs: JoystickConfig) -> None:
+        """Replace each config's mappings with the ones built for its side."""
+        for config in configs:
+            config.replace_mappings(self.actions.setdefault(config.side, {}))
@@ -0,0 +1,138 @@
+"""Bitmap of occupied (button, modifier, multitap, hold) slots on one joystick side."""
+
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+
+class SlotMode(NamedTuple):
+    modifier: bool
+    multitap: bool
+    hold: bool
+
+    @property
+    def index(self) -> int:
+        return self.modifier << 2 | self.multitap << 1 | self.hold
+
+
+SLOT_MODES = tuple(
+    SlotMode(modifier, multitap, hold)
+    for modifier in (False, True)
+    for multitap in (False, True)
+    for hold in (False, True)
+)
+
+
+class FreeSlot(NamedTuple):
+    button_name: str
+    modifier: bool
+    multitap: bool
+    hold: bool
+
+
+class ButtonOccupancyBitmap:
+    """One integer bitset per activation mode, one bit per layout button.
+
+    Bit ``i`` of ``occupied[mode]`` is set while at least one action is mapped
+    to the ``i``-th button of the layout in that mode. ``is_free`` is a single
+    bit test, and free-slot and nearest-free queries work on whole masks
+    instead of iterating over buttons. Buttons outside the layout are ignored.
+    """
+
+    def __init__(self, button_names: Sequence[str]) -> None:
+        self.button_names: List[str] = list(button_names)
+        self._bits: Dict[str, int] = {name: bit for bit, name in enumerate(self.button_names)}
+        self.full_mask = (1 << len(self.button_names)) - 1
+        self.occupied: List[int] = [0] * len(SLOT_MODES)
+        self._counts: Dict[tuple[int, int], int] = {}
+
+    def occupy(self, button_name: str, modifier: bool, multitap: bool, hold: bool) -> None:
+        bit = self._bits.get(button_name)
+        if bit is None:
+            return
+        mode = SlotMode(modifier, multitap, hold).index
+        count = self._counts.get((mode, bit), 0)
+        self._counts[mode, bit] = count + 1
+        if not count:
+            self.occupied[mode] |= 1 << bit
+
+    def release(self, button_name: str, modifier: bool, multitap: bool, hold: bool) -> None:
+        bit = self._bits.get(button_name)
+        if bit is None:
+            return
+        mode = SlotMode(modifier, multitap, hold).index
+        count = self._counts.get((mode, bit), 0)
+        if count <= 1:
+            self._counts.pop((mode, bit), None)
+            self.occupied[mode] &= ~(1 << bit)
+        else:
+            self._counts[mode, bit] = count - 1
+
+    def clear(self) -> None:
+        self.occupied = [0] * len(SLOT_MODES)
+        self._counts.clear()
+
+    def free_mask(self, modifier: bool = False, multitap: bool = False, hold: bool = False) -> int:
+        return ~self.occupied[SlotMode(modifier, multitap, hold).index] & self.full_mask
+
+    def is_free(
+        self, button_name: str, modifier: bool = False, multitap: bool = False, hold: bool = False
+    ) -> bool:
+        bit = self._bits.get(button_name)
+        if bit is None:
+            return False
+        return not self.occupied[SlotMode(modifier, multitap, hold).index] >> bit & 1
+
+    def free_slots(
+        self,
+        modifier: Optional[bool] = None,
+        multitap: Optional[bool] = None,
+        hold: Optional[bool] = None,
+    ) -> List[FreeSlot]:
+        """Return every free slot, optionally restricted to some mode flags."""
+
+        slots: List[FreeSlot] = []
+        for mode in SLOT_MODES:
+            if (
+                (modifier is not None and mode.modifier != modifier)
+                or (multitap is not None and mode.multitap != multitap)
+                or (hold is not None and mode.hold != hold)
+            ):
+                continue
+            for bit in _set_bits(self.free_mask(*mode)):
+                slots.append(FreeSlot(self.button_names[bit], *mode))
+        return slots
+
+    def nearest_free(
+        self,
+        button_name: str,
+        modifier: bool = False,
+        multitap: bool = False,
+        hold: bool = False,
+    ) -> Optional[str]:
+        """Return the free button closest to ``button_name`` in layout order.
+
+        ``button_name`` itself is returned when it is free; ties prefer the
+        earlier button.
+        """
+
+        free = self.free_mask(modifier, multitap, hold)
+        if not free:
+            return None
+        origin = self._bits.get(button_name)
+        if origin is None:
+            return self.button_names[(free & -free).bit_length() - 1]
+        above = free >> origin
+        below = free & ((1 << origin) - 1)
+        candidates = []
+        if above:
+            candidates.append(origin + (above & -above).bit_length() - 1)
+        if below:
+            candidates.append(below.bit_length() - 1)
+        best = min(candidates, key=lambda bit: (abs(bit - origin), bit))
+        return self.button_names[best]
+
+
+def _set_bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
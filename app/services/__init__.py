@@ -1,5 +1,29 @@
 """Service layer for orchestrating joystick binding operations."""
 
 from .binding_planner import BindingPlanner, BindingPlannerContext
+from .conflict_rules import ConflictEngine, ConflictIndex, ConflictRule
+from .device_service import DeviceService, get_device_service
+from .input_capture import CapturedInput, InputCaptureService
+from .layout_solver import LayoutSolution, LayoutSolver, SlotCandidate, layout_candidates
+from .occupancy_index import SlotOccupancyIndex
+from .profile_merge import MergeResult, ProfileMerger, combine_sides
 
-__all__ = ["BindingPlanner", "BindingPlannerContext"]
+__all__ = [
+    "BindingPlanner",
+    "BindingPlannerContext",
+    "CapturedInput",
+    "ConflictEngine",
+    "ConflictIndex",
+    "ConflictRule",
+    "DeviceService",
+    "InputCaptureService",
+    "LayoutSolution",
+    "LayoutSolver",
+    "MergeResult",
+    "ProfileMerger",
+    "SlotCandidate",
+    "SlotOccupancyIndex",
+    "combine_sides",
+    "get_device_service",
+    "layout_candidates",
+]
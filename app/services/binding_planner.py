@@ -2,11 +2,27 @@
 
 from __future__ import annotations
 
+import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Set
 
-from app.domain import Binding, BindingPlan, ControlProfile, ValidationIssue, ValidationReport
+from app.domain import (
+    ActionIdentifier,
+    Binding,
+    BindingKey,
+    BindingPlan,
+    BindingSet,
+    ControlProfile,
+    InputSlot,
+    ValidationIssue,
+    ValidationReport,
+)
+from app.services.conflict_rules import ConflictEngine
+from app.services.occupancy_index import SlotKey, SlotOccupancyIndex, slot_key
+
+PARALLEL_VALIDATION_THRESHOLD = 2000
 
 
 @dataclass
@@ -16,11 +32,148 @@ class BindingPlannerContext:
     default_profile: Optional[ControlProfile] = None
 
 
+def validate_against(
+    occupancy: SlotOccupancyIndex, plan: BindingPlan, report: ValidationReport
+) -> ValidationReport:
+    """Add the slot conflicts of ``plan`` against ``occupancy`` to ``report``.
+
+    ``occupancy`` is only read, so one index can back many validations.
+    """
+
+    if not plan.to_add and not plan.to_remove:
+        report.add(
+            ValidationIssue(
+                level="info",
+                message="No binding changes detected.",
+            )
+        )
+        return report
+
+    removed_by_slot: Dict[SlotKey, Set[BindingKey]] = defaultdict(set)
+    for binding in plan.to_remove:
+        removed_by_slot[slot_key(binding)].add(binding.key)
+
+    additions_by_slot: Dict[SlotKey, List[Binding]] = defaultdict(list)
+    for binding in plan.to_add:
+        additions_by_slot[slot_key(binding)].append(binding)
+
+    for key, bindings in additions_by_slot.items():
+        slot_desc = f"{key[0]}:{key[2]}"
+        actions_list = ", ".join(sorted({binding.action.name for binding in bindings}))
+
+        if len(bindings) > 1:
+            modifier_values = {binding.modifier for binding in bindings}
+            if len(modifier_values) > 1:
+                report.add(
+                    ValidationIssue(
+                        level="error",
+                        message=(
+                            f"Modifier conflict: slot {slot_desc} receives both modifier and "
+                            f"non-modifier bindings ({actions_list})."
+                        ),
+                        slot=bindings[0].slot,
+                    )
+                )
+            else:
+                report.add(
+                    ValidationIssue(
+                        level="error",
+                        message=(
+                            f"Duplicate slot assignment: slot {slot_desc} receives multiple "
+                            f"bindings ({actions_list})."
+                        ),
+                        slot=bindings[0].slot,
+                    )
+                )
+
+        existing_bindings = occupancy.bindings_at(key, removed_by_slot.get(key, ()))
+        if existing_bindings:
+            existing_actions = ", ".join(
+                sorted({binding.action.name for binding in existing_bindings})
+            )
+            existing_modifiers = {binding.modifier for binding in existing_bindings}
+            addition_modifiers = {binding.modifier for binding in bindings}
+            if existing_modifiers ^ addition_modifiers:
+                reason = "modifier conflict"
+            else:
+                reason = "slot already mapped"
+            report.add(
+                ValidationIssue(
+                    level="error",
+                    message=(
+                        f"{reason.capitalize()}: slot {slot_desc} currently mapped to {existing_actions}; "
+                        f"cannot add {actions_list}."
+                    ),
+                    slot=bindings[0].slot,
+                )
+            )
+
+    return report
+
+
 class BindingPlanner:
-    """Coordinates the application of binding operations across devices."""
+    """Coordinates the application of binding operations across devices.
+
+    The planner keeps a ``SlotOccupancyIndex`` of the context's default
+    profile. It is rebuilt only when ``context.default_profile`` is replaced
+    or its fingerprint changes behind the planner's back; ``apply_plan``
+    updates profile and index together, so validating a plan costs time
+    proportional to the plan, not to the profile.
 
-    def __init__(self, context: BindingPlannerContext) -> None:
+    ``check_conflicts`` runs the ``ConflictEngine`` rules over the profile
+    that would result from a plan.
+    """
+
+    def __init__(
+        self, context: BindingPlannerContext, conflict_engine: Optional[ConflictEngine] = None
+    ) -> None:
         self.context = context
+        self.conflict_engine = conflict_engine or ConflictEngine()
+        self._occupancy = SlotOccupancyIndex()
+        self._indexed_profile: Optional[ControlProfile] = None
+        self._indexed_fingerprint: Optional[int] = None
+
+    @property
+    def occupancy(self) -> SlotOccupancyIndex:
+        """Slot occupancy of ``context.default_profile``."""
+
+        profile = self.context.default_profile
+        if profile is not self._indexed_profile or (
+            profile is not None and profile.fingerprint != self._indexed_fingerprint
+        ):
+            bindings = profile.iter_bindings() if profile is not None else ()
+            self._occupancy = SlotOccupancyIndex.from_bindings(bindings)
+            self._indexed_profile = profile
+            self._indexed_fingerprint = profile.fingerprint if profile is not None else None
+        return self._occupancy
+
+    def apply_plan(self, plan: BindingPlan) -> ControlProfile:
+        """Apply ``plan`` to the default profile, creating an empty one if needed."""
+
+        occupancy = self.occupancy
+        profile = self.context.default_profile
+        if profile is None:
+            profile = ControlProfile(profile_name="default")
+            self.context.default_profile = profile
+            self._indexed_profile = profile
+
+        for binding in plan.to_remove:
+            bindings = self._binding_set(profile, binding)
+            existing = bindings.bindings.get(binding.key)
+            if existing is not None:
+                bindings.remove(binding.key)
+                occupancy.remove(existing)
+
+        for binding in plan.to_add:
+            bindings = self._binding_set(profile, binding)
+            existing = bindings.bindings.get(binding.key)
+            if existing is not None:
+                occupancy.remove(existing)
+            bindings.add(binding)
+            occupancy.add(binding)
+
+        self._indexed_fingerprint = profile.fingerprint
+        return profile
 
     def plan_from_profile(self, profile: ControlProfile) -> BindingPlan:
         """Generate a plan from an existing ControlProfile."""
@@ -38,8 +191,13 @@ class BindingPlanner:
         """Calculate the diff between the current profile and desired bindings."""
 
         plan = BindingPlan()
-        current_keys = {binding.key: binding for binding in current_profile.iter_bindings()}
-        desired_keys = {binding.key: binding for binding in desired_bindings}
+        current_keys = {
+            (binding.slot.device_uid, binding.key): binding
+            for binding in current_profile.iter_bindings()
+        }
+        desired_keys = {
+            (binding.slot.device_uid, binding.key): binding for binding in desired_bindings
+        }
 
         for key in current_keys.keys() - desired_keys.keys():
             plan.record_remove(current_keys[key])
@@ -53,90 +211,94 @@ class BindingPlanner:
     def validate_plan(self, plan: BindingPlan) -> ValidationReport:
         """Validate a binding plan before execution."""
 
-        report = plan.validation
-        if not plan.to_add and not plan.to_remove:
-            report.add(
-                ValidationIssue(
-                    level="info",
-                    message="No binding changes detected.",
-                )
-            )
-            return report
+        return validate_against(self.occupancy, plan, plan.validation)
 
-        slot_key = self._make_slot_key
+    def validate_candidates(
+        self,
+        plans: Sequence[BindingPlan],
+        max_workers: Optional[int] = None,
+        parallel_threshold: int = PARALLEL_VALIDATION_THRESHOLD,
+    ) -> List[ValidationReport]:
+        """Validate independent what-if plans against the current default profile.
 
-        occupancy: Dict[Tuple[str, str, str], List[Binding]] = defaultdict(list)
-        if self.context.default_profile is not None:
-            for binding in self.context.default_profile.iter_bindings():
-                occupancy[slot_key(binding)].append(binding)
+        Every candidate is checked against one frozen snapshot of the occupancy
+        index, as if it were the only plan applied. Reports are returned in
+        the order of ``plans``; the plans themselves are not modified. With at
+        least ``parallel_threshold`` candidates the work is split across
+        worker processes that each receive the snapshot once.
+        """
 
-        for binding in plan.to_remove:
-            key = slot_key(binding)
-            if key not in occupancy:
-                continue
-            remaining = [existing for existing in occupancy[key] if existing.key != binding.key]
-            if remaining:
-                occupancy[key] = remaining
-            else:
-                occupancy.pop(key)
+        snapshot = self.occupancy.frozen()
+        if len(plans) < parallel_threshold or max_workers == 1:
+            return [validate_against(snapshot, plan, ValidationReport()) for plan in plans]
 
-        additions_by_slot: Dict[Tuple[str, str, str], List[Binding]] = defaultdict(list)
-        for binding in plan.to_add:
-            additions_by_slot[slot_key(binding)].append(binding)
-
-        for key, bindings in additions_by_slot.items():
-            slot_desc = f"{key[0]}:{key[2]}"
-            actions_list = ", ".join(sorted({binding.action.name for binding in bindings}))
-
-            if len(bindings) > 1:
-                modifier_values = {binding.modifier for binding in bindings}
-                if len(modifier_values) > 1:
-                    report.add(
-                        ValidationIssue(
-                            level="error",
-                            message=(
-                                f"Modifier conflict: slot {slot_desc} receives both modifier and "
-                                f"non-modifier bindings ({actions_list})."
-                            ),
-                            slot=bindings[0].slot,
-                        )
-                    )
-                else:
-                    report.add(
-                        ValidationIssue(
-                            level="error",
-                            message=(
-                                f"Duplicate slot assignment: slot {slot_desc} receives multiple "
-                                f"bindings ({actions_list})."
-                            ),
-                            slot=bindings[0].slot,
-                        )
-                    )
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_validation_worker,
+            initargs=(snapshot,),
+        ) as executor:
+            chunksize = max(1, len(plans) // ((max_workers or os.cpu_count() or 1) * 4))
+            return list(executor.map(_validate_in_worker, plans, chunksize=chunksize))
 
-            existing_bindings = occupancy.get(key, [])
-            if existing_bindings:
-                existing_actions = ", ".join(
-                    sorted({binding.action.name for binding in existing_bindings})
-                )
-                existing_modifiers = {binding.modifier for binding in existing_bindings}
-                addition_modifiers = {binding.modifier for binding in bindings}
-                if existing_modifiers ^ addition_modifiers:
-                    reason = "modifier conflict"
-                else:
-                    reason = "slot already mapped"
-                report.add(
-                    ValidationIssue(
-                        level="error",
-                        message=(
-                            f"{reason.capitalize()}: slot {slot_desc} currently mapped to {existing_actions}; "
-                            f"cannot add {actions_list}."
-                        ),
-                        slot=bindings[0].slot,
+    def slots_accepting(
+        self,
+        action: ActionIdentifier,
+        slots: Iterable[InputSlot],
+        *,
+        modifier: bool = False,
+        hold: bool = False,
+        multitap: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> List[InputSlot]:
+        """Return the candidate slots that can take ``action`` without validation errors."""
+
+        candidates = list(slots)
+        plans = [
+            BindingPlan(
+                to_add=[
+                    Binding(
+                        action=action,
+                        slot=slot,
+                        modifier=modifier,
+                        hold=hold,
+                        multitap=multitap,
                     )
-                )
+                ]
+            )
+            for slot in candidates
+        ]
+        reports = self.validate_candidates(plans, max_workers=max_workers)
+        return [slot for slot, report in zip(candidates, reports) if not report.has_errors]
 
-        return report
+    def check_conflicts(self, plan: Optional[BindingPlan] = None) -> ValidationReport:
+        """Run the conflict rules over the default profile with ``plan`` applied."""
+
+        if plan is None:
+            return self.conflict_engine.check(self.occupancy.iter_bindings())
+
+        removed = {(binding.slot.device_uid, binding.key) for binding in plan.to_remove}
+        removed.update((binding.slot.device_uid, binding.key) for binding in plan.to_add)
+        bindings: List[Binding] = [
+            binding
+            for binding in self.occupancy.iter_bindings()
+            if (binding.slot.device_uid, binding.key) not in removed
+        ]
+        bindings.extend(plan.to_add)
+        return self.conflict_engine.check(bindings)
 
     @staticmethod
-    def _make_slot_key(binding: Binding) -> Tuple[str, str, str]:
-        return binding.slot.device_uid, binding.slot.side, binding.slot.slot_id
+    def _binding_set(profile: ControlProfile, binding: Binding) -> BindingSet:
+        return profile.binding_set(binding.slot.device_uid, binding.slot.side)
+
+
+_worker_occupancy: Optional[SlotOccupancyIndex] = None
+
+
+def _init_validation_worker(occupancy: SlotOccupancyIndex) -> None:
+    global _worker_occupancy
+    _worker_occupancy = occupancy
+
+
+def _validate_in_worker(plan: BindingPlan) -> ValidationReport:
+    assert _worker_occupancy is not None, "validation worker was not initialised"
+    return validate_against(_worker_occupancy, plan, ValidationReport())
@@ -0,0 +1,167 @@
+"""Rule-based conflict detection for complete sets of bindings.
+
+``BindingPlanner.validate_plan`` checks that a plan's additions fit into the
+occupied slots. The rules here look at the resulting bindings as a whole:
+activation modes that shadow each other on one slot, and the design rule
+that an action is bound at most once per device group, which also covers an
+action bound on both sticks. Every rule reads the same ``ConflictIndex``,
+which groups the bindings by slot and by action once, so the full rule set
+stays linear in the number of bindings.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from app.domain import Binding, ValidationIssue, ValidationReport
+from app.services.occupancy_index import SlotKey, slot_key
+
+DEVICE_GROUPS: Dict[str, str] = {
+    "js": "joystick",
+    "gp": "gamepad",
+    "kb": "keyboard/mouse",
+    "mo": "keyboard/mouse",
+}
+
+
+def device_group(device_uid: str) -> str:
+    """Return the device group of a Star Citizen device uid such as ``js1``."""
+
+    return DEVICE_GROUPS.get(device_uid.rstrip("0123456789"), device_uid)
+
+
+def _slot_desc(binding: Binding) -> str:
+    return f"{binding.slot.device_uid}:{binding.slot.slot_id}"
+
+
+def _names(bindings: Iterable[Binding]) -> str:
+    return ", ".join(sorted({binding.action.name for binding in bindings}))
+
+
+class ConflictIndex:
+    """Bindings grouped by slot and by action name."""
+
+    def __init__(self, bindings: Iterable[Binding]) -> None:
+        self.by_slot: Dict[SlotKey, List[Binding]] = {}
+        self.by_action: Dict[str, List[Binding]] = {}
+        for binding in bindings:
+            self.by_slot.setdefault(slot_key(binding), []).append(binding)
+            self.by_action.setdefault(binding.action.name, []).append(binding)
+
+
+class ConflictRule(ABC):
+    """A single check run against a ``ConflictIndex``."""
+
+    name: str = ""
+
+    @abstractmethod
+    def check(self, index: ConflictIndex) -> Iterator[ValidationIssue]:
+        """Yield one issue per conflict found."""
+
+
+class HoldTapOverlapRule(ConflictRule):
+    """A slot carries both a hold and a tap binding for the same modifier state."""
+
+    name = "hold-tap-overlap"
+
+    def check(self, index: ConflictIndex) -> Iterator[ValidationIssue]:
+        for bindings in index.by_slot.values():
+            if len(bindings) < 2:
+                continue
+            for modifier in (False, True):
+                holds = [b for b in bindings if b.modifier == modifier and b.hold]
+                taps = [
+                    b for b in bindings if b.modifier == modifier and not b.hold and not b.multitap
+                ]
+                if holds and taps:
+                    yield ValidationIssue(
+                        level="warning",
+                        message=(
+                            f"Hold/tap overlap: slot {_slot_desc(holds[0])} triggers "
+                            f"{_names(taps)} on press before hold action {_names(holds)}."
+                        ),
+                        slot=holds[0].slot,
+                    )
+
+
+class MultitapShadowingRule(ConflictRule):
+    """A single-tap binding fires on the first press of a double-tap binding."""
+
+    name = "multitap-shadowing"
+
+    def check(self, index: ConflictIndex) -> Iterator[ValidationIssue]:
+        for bindings in index.by_slot.values():
+            if len(bindings) < 2:
+                continue
+            for modifier in (False, True):
+                multitaps = [b for b in bindings if b.modifier == modifier and b.multitap]
+                taps = [
+                    b for b in bindings if b.modifier == modifier and not b.multitap and not b.hold
+                ]
+                if multitaps and taps:
+                    yield ValidationIssue(
+                        level="warning",
+                        message=(
+                            f"Multitap shadowing: slot {_slot_desc(multitaps[0])} fires "
+                            f"{_names(taps)} on the first tap of {_names(multitaps)}."
+                        ),
+                        slot=multitaps[0].slot,
+                    )
+
+
+class DeviceGroupUniquenessRule(ConflictRule):
+    """An action may be bound to at most one input per device group.
+
+    An action bound on both the left and the right stick is one such
+    conflict in the joystick group; the message says so.
+    """
+
+    name = "device-group-uniqueness"
+
+    def check(self, index: ConflictIndex) -> Iterator[ValidationIssue]:
+        for bindings in index.by_action.values():
+            if len(bindings) < 2:
+                continue
+            slots_by_group: Dict[str, Dict[str, Binding]] = {}
+            for binding in bindings:
+                group = slots_by_group.setdefault(device_group(binding.slot.device_uid), {})
+                group.setdefault(_slot_desc(binding), binding)
+            for group_name, slots in slots_by_group.items():
+                if len(slots) > 1:
+                    sides = {binding.slot.side for binding in slots.values()}
+                    where = "on both sticks, " if {"left", "right"} <= sides else ""
+                    yield ValidationIssue(
+                        level="error",
+                        message=(
+                            f"Action {bindings[0].action.name} is bound {where}more than once "
+                            f"in the {group_name} group: {', '.join(sorted(slots))}."
+                        ),
+                        action=bindings[0].action,
+                    )
+
+
+DEFAULT_RULES: Sequence[ConflictRule] = (
+    HoldTapOverlapRule(),
+    MultitapShadowingRule(),
+    DeviceGroupUniquenessRule(),
+)
+
+
+class ConflictEngine:
+    """Runs a set of ``ConflictRule`` objects over one shared index."""
+
+    def __init__(self, rules: Optional[Sequence[ConflictRule]] = None) -> None:
+        self.rules: List[ConflictRule] = list(DEFAULT_RULES if rules is None else rules)
+
+    def register(self, rule: ConflictRule) -> None:
+        self.rules.append(rule)
+
+    def check(self, bindings: Iterable[Binding]) -> ValidationReport:
+        return self.check_index(ConflictIndex(bindings))
+
+    def check_index(self, index: ConflictIndex) -> ValidationReport:
+        report = ValidationReport()
+        for rule in self.rules:
+            report.extend(list(rule.check(index)))
+        return report
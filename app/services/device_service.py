@@ -0,0 +1,135 @@
+"""Cached, hotplug-aware list of the connected game controllers."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, List, Optional
+
+from app.utils.devices import DeviceBackend, PygameDeviceBackend, SystemDevice
+
+logger = logging.getLogger(__name__)
+
+DeviceListener = Callable[[List[SystemDevice]], None]
+
+
+class DeviceService:
+    """Enumerates controllers on a background thread and keeps the list current.
+
+    ``start`` returns immediately. The worker opens the backend, which for
+    the default pygame backend is where pygame is imported, enumerates once,
+    then waits for hotplug events and re-enumerates only when one arrives.
+    ``devices`` returns the cached list without touching the backend, so it
+    never blocks the UI. Listeners are called on the worker thread with the
+    new list after every enumeration.
+    """
+
+    def __init__(self, backend: Optional[DeviceBackend] = None, poll_interval: float = 0.5) -> None:
+        self.backend = backend or PygameDeviceBackend()
+        self.poll_interval = poll_interval
+        self.last_error: Optional[BaseException] = None
+
+        self._condition = threading.Condition()
+        self._devices: List[SystemDevice] = []
+        self._generation = 0
+        self._ready = False
+        self._closed = False
+        self._listeners: List[DeviceListener] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the worker if it is not running yet."""
+
+        with self._condition:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._run, name="DeviceService", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def devices(self) -> List[SystemDevice]:
+        """Return the latest device list; empty until the first enumeration completes."""
+
+        with self._condition:
+            return list(self._devices)
+
+    @property
+    def ready(self) -> bool:
+        with self._condition:
+            return self._ready
+
+    @property
+    def generation(self) -> int:
+        """Number of enumerations completed so far."""
+
+        with self._condition:
+            return self._generation
+
+    def wait_for_update(self, after: int = 0, timeout: Optional[float] = None) -> bool:
+        """Wait until more than ``after`` enumerations have completed, or the worker failed."""
+
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._generation > after or (self._ready and self.last_error is not None),
+                timeout,
+            )
+
+    def add_listener(self, listener: DeviceListener) -> None:
+        with self._condition:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: DeviceListener) -> None:
+        with self._condition:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _run(self) -> None:
+        try:
+            self.backend.open()
+            self._publish(self.backend.enumerate())
+            while not self._is_closed():
+                if self.backend.wait_for_hotplug(self.poll_interval):
+                    self._publish(self.backend.enumerate())
+        except Exception as exc:
+            logger.exception("Controller enumeration failed")
+            with self._condition:
+                self.last_error = exc
+                self._ready = True
+                self._condition.notify_all()
+        finally:
+            self.backend.close()
+
+    def _is_closed(self) -> bool:
+        with self._condition:
+            return self._closed
+
+    def _publish(self, devices: List[SystemDevice]) -> None:
+        with self._condition:
+            self._devices = devices
+            self._generation += 1
+            self._ready = True
+            listeners = list(self._listeners)
+            self._condition.notify_all()
+        for listener in listeners:
+            try:
+                listener(list(devices))
+            except Exception:
+                logger.exception("Controller list listener failed")
+
+
+_device_service: Optional[DeviceService] = None
+
+
+def get_device_service() -> DeviceService:
+    """Return the application's shared ``DeviceService``; it is not started here."""
+
+    global _device_service
+    if _device_service is None:
+        _device_service = DeviceService()
+    return _device_service
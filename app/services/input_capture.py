@@ -0,0 +1,166 @@
+"""Live "press to select" capture of controller input."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.utils.devices import InputBackend, InputEvent, PygameInputBackend
+
+logger = logging.getLogger(__name__)
+
+# Axis order reported by DirectInput/SDL, named as in the layout files
+AXIS_NAMES = ("x", "y", "z", "rotx", "roty", "rotz")
+HAT_DIRECTIONS: Dict[Tuple[int, int], str] = {
+    (0, 1): "up",
+    (1, 1): "up_right",
+    (-1, 1): "up_left",
+    (-1, 0): "left",
+    (1, 0): "right",
+    (-1, -1): "down_left",
+    (0, -1): "down",
+    (1, -1): "down_right",
+}
+# How far an axis has to move from where it was first seen to count as a press
+AXIS_THRESHOLD = 0.5
+
+
+class CapturedInput(NamedTuple):
+    instance: int
+    device_name: str
+    slot: str
+    timestamp: float
+
+
+CaptureListener = Callable[[CapturedInput], None]
+
+
+def slot_for_event(event: InputEvent) -> Optional[str]:
+    """Return the layout slot name for a button press or hat push, e.g. ``button3``."""
+
+    if event.kind == "button":
+        return f"button{event.index + 1}" if event.value else None
+    if event.kind == "hat":
+        direction = HAT_DIRECTIONS.get(tuple(event.value))  # type: ignore[arg-type]
+        return f"hat{event.index + 1}_{direction}" if direction else None
+    if event.kind == "axis":
+        if event.index < len(AXIS_NAMES):
+            return AXIS_NAMES[event.index]
+        return f"axis{event.index + 1}"
+    return None
+
+
+class InputCaptureService:
+    """Polls an ``InputBackend`` on a background thread and reports pressed slots.
+
+    Each button press, hat push or large axis movement is mapped to the
+    layout slot name and passed to the listeners, on the worker thread, as a
+    ``CapturedInput``. Unlike ``DeviceService`` the worker only runs while
+    capture is switched on, so ``start`` and ``stop`` can be called repeatedly.
+    A worker that has not finished stopping yet is waited for by the next one
+    before it opens the backend, so two workers never read at the same time.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[InputBackend] = None,
+        poll_interval: float = 0.1,
+        axis_threshold: float = AXIS_THRESHOLD,
+    ) -> None:
+        self.backend = backend or PygameInputBackend()
+        self.poll_interval = poll_interval
+        self.axis_threshold = axis_threshold
+        self.last_error: Optional[BaseException] = None
+
+        self._lock = threading.Lock()
+        # Each worker has its own stop event, so restarting cannot revive a stopping one
+        self._stop = threading.Event()
+        self._listeners: List[CaptureListener] = []
+        self._thread: Optional[threading.Thread] = None
+        self._last_thread: Optional[threading.Thread] = None
+        # Resting position and whether the axis is currently deflected, per (instance, axis)
+        self._axis_rest: Dict[Tuple[int, int], float] = {}
+        self._axis_active: Dict[Tuple[int, int], bool] = {}
+
+    @property
+    def running(self) -> bool:
+        with self._lock:
+            return self._thread is not None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(self._stop, self._last_thread),
+                name="InputCapture",
+                daemon=True,
+            )
+            self._last_thread = self._thread
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+            stop = self._stop
+        if thread is None:
+            return
+        stop.set()
+        thread.join(timeout)
+
+    def add_listener(self, listener: CaptureListener) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: CaptureListener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _run(self, stop: threading.Event, previous: Optional[threading.Thread]) -> None:
+        if previous is not None:
+            previous.join()
+        self._axis_rest.clear()
+        self._axis_active.clear()
+        try:
+            self.backend.open()
+            while not stop.is_set():
+                for event in self.backend.read_events(self.poll_interval):
+                    slot = self._slot_for(event)
+                    if slot is not None:
+                        self._publish(
+                            CapturedInput(event.instance, event.device_name, slot, event.timestamp)
+                        )
+        except Exception as exc:
+            logger.exception("Input capture failed")
+            self.last_error = exc
+        finally:
+            self.backend.close()
+
+    def _slot_for(self, event: InputEvent) -> Optional[str]:
+        if event.kind != "axis":
+            return slot_for_event(event)
+        key = (event.instance, event.index)
+        rest = self._axis_rest.setdefault(key, float(event.value))  # type: ignore[arg-type]
+        offset = abs(float(event.value) - rest)  # type: ignore[arg-type]
+        if self._axis_active.get(key):
+            # Re-arm once the axis is back near its resting position
+            if offset < self.axis_threshold / 2:
+                self._axis_active[key] = False
+            return None
+        if offset < self.axis_threshold:
+            return None
+        self._axis_active[key] = True
+        return slot_for_event(event)
+
+    def _publish(self, captured: CapturedInput) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(captured)
+            except Exception:
+                logger.exception("Input capture listener failed")
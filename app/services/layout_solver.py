@@ -0,0 +1,279 @@
+"""Automatic placement of actions onto free joystick slots."""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Set
+
+from app.domain import (
+    ActionIdentifier,
+    Binding,
+    BindingPlan,
+    InputSlot,
+    ValidationIssue,
+    ValidationReport,
+)
+from app.services.binding_planner import BindingPlanner
+from app.services.conflict_rules import device_group
+from app.services.occupancy_index import SlotKey
+
+if TYPE_CHECKING:
+    from app.models.joystick import JoyStickButton
+
+
+@dataclass(frozen=True)
+class SlotCandidate:
+    """A slot an action may be placed on, with its position in the layout image."""
+
+    slot: InputSlot
+    x: int
+    y: int
+    modifier: bool = False
+    multitap: bool = False
+    hold: bool = False
+
+    @property
+    def slot_key(self) -> SlotKey:
+        return self.slot.device_uid, self.slot.side, self.slot.slot_id
+
+    def distance(self, other: "SlotCandidate") -> float:
+        return math.hypot(self.x - other.x, self.y - other.y)
+
+
+def layout_candidates(
+    buttons: Iterable["JoyStickButton"],
+    device_uid: str,
+    side: str,
+    *,
+    modifier: bool = False,
+    multitap: bool = False,
+    hold: bool = False,
+) -> List[SlotCandidate]:
+    """Build one candidate per layout button, positioned for ``side``."""
+
+    return [
+        SlotCandidate(
+            slot=InputSlot.intern(device_uid, side, button.sc_config_name),
+            x=button.coord_x_left[side],  # type: ignore[index]
+            y=button.coord_y_top,
+            modifier=modifier,
+            multitap=multitap,
+            hold=hold,
+        )
+        for button in buttons
+    ]
+
+
+@dataclass
+class LayoutSolution:
+    """Result of ``LayoutSolver.solve``.
+
+    ``exhaustive`` is false when the time budget ran out before the search
+    finished; the solution is then the best one found so far.
+    """
+
+    bindings: List[Binding] = field(default_factory=list)
+    cost: float = 0.0
+    unassigned: List[ActionIdentifier] = field(default_factory=list)
+    exhaustive: bool = True
+    report: ValidationReport = field(default_factory=ValidationReport)
+
+    @property
+    def plan(self) -> BindingPlan:
+        return BindingPlan(to_add=list(self.bindings))
+
+
+class LayoutSolver:
+    """Assigns actions to free slots, keeping each sub-category close together.
+
+    The cost of a layout is the summed distance, in layout pixels divided by
+    ``distance_scale``, between every pair of actions that share a
+    sub-category, plus ``mode_penalty`` for each modifier/multitap/hold flag a
+    chosen slot needs. Slots that are occupied in the planner's default
+    profile are never used, each slot receives at most one action, and
+    actions already bound in the same device group are left unassigned, so
+    the result passes ``validate_plan`` and the device-group conflict rule.
+
+    The search is a depth-first branch and bound over the actions, trying
+    only the ``branch_limit`` cheapest slots per action and stopping after
+    ``time_budget`` seconds. The first branch is the greedy solution, so an
+    answer is always available.
+    """
+
+    def __init__(
+        self,
+        planner: BindingPlanner,
+        *,
+        time_budget: float = 0.8,
+        branch_limit: int = 6,
+        distance_scale: float = 100.0,
+        mode_penalty: float = 2.0,
+    ) -> None:
+        self.planner = planner
+        self.time_budget = time_budget
+        self.branch_limit = branch_limit
+        self.distance_scale = distance_scale
+        self.mode_penalty = mode_penalty
+
+    def solve(
+        self, actions: Sequence[ActionIdentifier], candidates: Sequence[SlotCandidate]
+    ) -> LayoutSolution:
+        occupancy = self.planner.occupancy
+        free = [
+            candidate
+            for candidate in dict.fromkeys(candidates)
+            if candidate.slot_key not in occupancy
+        ]
+        bound = self._bound_groups()
+        groups = {device_group(candidate.slot.device_uid) for candidate in free}
+        placeable: List[ActionIdentifier] = []
+        unassigned: List[ActionIdentifier] = []
+        for action in dict.fromkeys(actions):
+            if groups & bound.get(action.name, set()):
+                unassigned.append(action)
+            else:
+                placeable.append(action)
+
+        search = _Search(self, self._order(placeable), free)
+        best = search.run()
+        bindings = [
+            Binding(
+                action=action,
+                slot=candidate.slot,
+                modifier=candidate.modifier,
+                hold=candidate.hold,
+                multitap=candidate.multitap,
+            )
+            for action, candidate in zip(search.actions, best)
+            if candidate is not None
+        ]
+        unassigned.extend(
+            action for action, candidate in zip(search.actions, best) if candidate is None
+        )
+
+        solution = LayoutSolution(
+            bindings=bindings,
+            cost=search.best_cost,
+            unassigned=unassigned,
+            exhaustive=not search.timed_out,
+        )
+        if bindings:
+            plan = solution.plan
+            solution.report = self.planner.validate_plan(plan)
+            solution.report.extend(self.planner.check_conflicts(plan).issues)
+        for action in unassigned:
+            solution.report.add(
+                ValidationIssue(
+                    level="warning",
+                    message=f"No free slot assigned to action {action.name}.",
+                    action=action,
+                )
+            )
+        return solution
+
+    def _bound_groups(self) -> Dict[str, Set[str]]:
+        groups: Dict[str, Set[str]] = {}
+        for binding in self.planner.occupancy.iter_bindings():
+            groups.setdefault(binding.action.name, set()).add(
+                device_group(binding.slot.device_uid)
+            )
+        return groups
+
+    @staticmethod
+    def _order(actions: List[ActionIdentifier]) -> List[ActionIdentifier]:
+        """Place large sub-categories first, keeping each category contiguous."""
+
+        sizes: Dict[str, int] = {}
+        for action in actions:
+            sizes[action.sub_category] = sizes.get(action.sub_category, 0) + 1
+        first_seen = {category: index for index, category in enumerate(sizes)}
+        return sorted(
+            actions,
+            key=lambda action: (-sizes[action.sub_category], first_seen[action.sub_category]),
+        )
+
+    def placement_cost(
+        self, candidate: SlotCandidate, neighbours: Iterable[SlotCandidate]
+    ) -> float:
+        flags = candidate.modifier + candidate.multitap + candidate.hold
+        distance = sum(candidate.distance(other) for other in neighbours)
+        return flags * self.mode_penalty + distance / self.distance_scale
+
+
+class _Search:
+    def __init__(
+        self,
+        solver: LayoutSolver,
+        actions: List[ActionIdentifier],
+        candidates: List[SlotCandidate],
+    ) -> None:
+        self.solver = solver
+        self.actions = actions
+        self.candidates = candidates
+        self.deadline = time.monotonic() + solver.time_budget
+        self.timed_out = False
+        self.best: List[Optional[SlotCandidate]] = [None] * len(actions)
+        self.best_cost = math.inf
+        self.best_placed = -1
+        self._assignment: List[Optional[SlotCandidate]] = []
+        self._used: Set[SlotKey] = set()
+        self._placed_by_category: Dict[str, List[SlotCandidate]] = {}
+        self._steps = 0
+
+    def run(self) -> List[Optional[SlotCandidate]]:
+        self._visit(0, 0.0, 0)
+        if self.best_placed < 0:
+            self.best_cost = 0.0
+        return self.best
+
+    def _expired(self) -> bool:
+        self._steps += 1
+        if self.timed_out or (self._steps & 63 == 0 and time.monotonic() > self.deadline):
+            self.timed_out = True
+        return self.timed_out
+
+    def _visit(self, depth: int, cost: float, placed: int) -> None:
+        remaining = len(self.actions) - depth
+        # Prune: cannot beat the best solution on placed actions, or on cost.
+        if placed + remaining < self.best_placed or (
+            placed + remaining == self.best_placed and cost >= self.best_cost
+        ):
+            return
+        if depth == len(self.actions):
+            self.best = list(self._assignment)
+            self.best_cost = cost
+            self.best_placed = placed
+            return
+        if self.best_placed >= 0 and self._expired():
+            return
+
+        action = self.actions[depth]
+        category = action.sub_category
+        neighbours = self._placed_by_category.get(category, [])
+        options = sorted(
+            (
+                (self.solver.placement_cost(candidate, neighbours), index, candidate)
+                for index, candidate in enumerate(self.candidates)
+                if candidate.slot_key not in self._used
+            ),
+            key=lambda option: (option[0], option[1]),
+        )[: self.solver.branch_limit]
+
+        for step_cost, _index, candidate in options:
+            self._assignment.append(candidate)
+            self._used.add(candidate.slot_key)
+            neighbours.append(candidate)
+            self._placed_by_category[category] = neighbours
+            self._visit(depth + 1, cost + step_cost, placed + 1)
+            neighbours.pop()
+            self._used.discard(candidate.slot_key)
+            self._assignment.pop()
+            if self.timed_out:
+                return
+
+        if not options:
+            self._assignment.append(None)
+            self._visit(depth + 1, cost, placed)
+            self._assignment.pop()
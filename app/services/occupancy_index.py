@@ -0,0 +1,93 @@
+"""Live index of which bindings occupy each device input slot."""
+
+from __future__ import annotations
+
+from typing import Collection, Dict, Iterable, Iterator, List, Tuple
+
+from app.domain import Binding, BindingKey
+
+SlotKey = Tuple[str, str, str]
+
+
+def slot_key(binding: Binding) -> SlotKey:
+    """Return ``(device_uid, side, slot_id)`` for a binding."""
+
+    return binding.slot.device_uid, binding.slot.side, binding.slot.slot_id
+
+
+class SlotOccupancyIndex:
+    """Maps each slot to the bindings currently assigned to it.
+
+    Bindings are stored per slot by ``Binding.key`` so adding and removing a
+    binding are O(1) and a slot lookup only touches that slot's bindings.
+    ``frozen`` returns a read-only snapshot that can be shared between
+    validations and sent to worker processes.
+    """
+
+    def __init__(self) -> None:
+        self._slots: Dict[SlotKey, Dict[BindingKey, Binding]] = {}
+        self._frozen = False
+
+    @classmethod
+    def from_bindings(cls, bindings: Iterable[Binding]) -> "SlotOccupancyIndex":
+        index = cls()
+        for binding in bindings:
+            index.add(binding)
+        return index
+
+    def frozen(self) -> "SlotOccupancyIndex":
+        """Return a read-only copy of the index."""
+
+        if self._frozen:
+            return self
+        snapshot = SlotOccupancyIndex()
+        snapshot._slots = {key: dict(occupants) for key, occupants in self._slots.items()}
+        snapshot._frozen = True
+        return snapshot
+
+    @property
+    def is_frozen(self) -> bool:
+        return self._frozen
+
+    def _check_mutable(self) -> None:
+        if self._frozen:
+            raise RuntimeError("Cannot modify a frozen occupancy index.")
+
+    def add(self, binding: Binding) -> None:
+        self._check_mutable()
+        self._slots.setdefault(slot_key(binding), {})[binding.key] = binding
+
+    def remove(self, binding: Binding) -> None:
+        """Remove the binding with ``binding.key`` from the binding's slot, if present."""
+
+        self._check_mutable()
+        key = slot_key(binding)
+        occupants = self._slots.get(key)
+        if occupants is None:
+            return
+        occupants.pop(binding.key, None)
+        if not occupants:
+            del self._slots[key]
+
+    def bindings_at(self, key: SlotKey, excluding: Collection[BindingKey] = ()) -> List[Binding]:
+        """Return the bindings in slot ``key`` whose ``Binding.key`` is not in ``excluding``."""
+
+        occupants = self._slots.get(key)
+        if not occupants:
+            return []
+        if not excluding:
+            return list(occupants.values())
+        return [binding for binding_key, binding in occupants.items() if binding_key not in excluding]
+
+    def iter_bindings(self) -> Iterator[Binding]:
+        for occupants in self._slots.values():
+            yield from occupants.values()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._slots
+
+    def __iter__(self) -> Iterator[SlotKey]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
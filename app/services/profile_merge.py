@@ -0,0 +1,272 @@
+"""Three-way merges of control profiles.
+
+A merge takes a common ancestor (``base``) and two descendants (``mine`` and
+``theirs``), for example a custom profile and a freshly exported default
+after a game patch, with the previous default as the base. Bindings are
+compared by ``Binding.key`` on each device, so a merge is a single pass over
+the keys of the three profiles. Conflicts are resolved in favour of the
+``prefer`` side and reported as ``ValidationIssue`` objects.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from app.domain import (
+    Binding,
+    BindingKey,
+    BindingSet,
+    ControlProfile,
+    ValidationIssue,
+    ValidationReport,
+)
+from app.services.conflict_rules import ConflictEngine
+
+if TYPE_CHECKING:
+    from app.io.profile_export import ProfileExportResult
+    from app.io.repositories import ActionMapsRepository
+
+MERGE_SIDES = ("mine", "theirs")
+
+
+@dataclass
+class MergeResult:
+    """Outcome of one three-way merge.
+
+    ``conflicts`` counts keys and actions changed differently on both sides;
+    each one is also described in ``report``. ``export`` is set by
+    ``ProfileMerger.merge_folders`` once the merged profile is written.
+    """
+
+    profile: ControlProfile
+    report: ValidationReport = field(default_factory=ValidationReport)
+    conflicts: int = 0
+    export: Optional["ProfileExportResult"] = None
+
+
+def empty_profile(profile_name: str = "") -> ControlProfile:
+    return ControlProfile(profile_name=profile_name)
+
+
+def combine_sides(
+    left_source: ControlProfile, right_source: ControlProfile, profile_name: Optional[str] = None
+) -> ControlProfile:
+    """Return a profile with the left stick of one profile and the right of another.
+
+    Devices of any other side are taken from ``left_source``.
+    """
+
+    profile = ControlProfile(
+        profile_name=profile_name or left_source.profile_name,
+        metadata={**right_source.metadata, **left_source.metadata},
+    )
+    for source, take_right in ((left_source, False), (right_source, True)):
+        for device_uid, bindings in source.devices.items():
+            if (bindings.side == "right") == take_right:
+                profile.devices[device_uid] = BindingSet(
+                    side=bindings.side, bindings=dict(bindings.bindings), device_uid=device_uid
+                )
+    return profile
+
+
+def _same(first: Optional[Binding], second: Optional[Binding]) -> bool:
+    if first is second:
+        return True
+    if first is None or second is None:
+        return False
+    return first.action == second.action and first.slot == second.slot
+
+
+def _describe(binding: Optional[Binding]) -> str:
+    if binding is None:
+        return "unbound"
+    return f"{binding.slot.device_uid}:{binding.slot.slot_id}"
+
+
+class ProfileMerger:
+    """Merges ``ControlProfile`` objects key by key, one device at a time.
+
+    For every binding key a change on one side wins over the unchanged
+    other side. A key changed differently on both sides is a conflict, as is
+    an action both sides rebound to different keys, e.g. moved to different
+    buttons; the ``prefer`` side's version of the key or action is kept.
+
+    When a ``ConflictEngine`` is given, rule violations present in the merged
+    profile but in neither input are reported as well, so a merge that
+    combines two individually valid changes into an invalid layout is
+    flagged.
+    """
+
+    def __init__(
+        self, prefer: str = "mine", conflict_engine: Optional[ConflictEngine] = None
+    ) -> None:
+        if prefer not in MERGE_SIDES:
+            raise ValueError(f"prefer must be one of {', '.join(MERGE_SIDES)}, not {prefer!r}.")
+        self.prefer = prefer
+        self.conflict_engine = conflict_engine
+
+    def merge(
+        self,
+        base: ControlProfile,
+        mine: ControlProfile,
+        theirs: ControlProfile,
+        profile_name: Optional[str] = None,
+    ) -> MergeResult:
+        report = ValidationReport()
+        preferred, other = (mine, theirs) if self.prefer == "mine" else (theirs, mine)
+        profile = ControlProfile(
+            profile_name=profile_name or mine.profile_name,
+            metadata={**base.metadata, **other.metadata, **preferred.metadata},
+        )
+        conflicts = 0
+        for device_uid in sorted(base.devices.keys() | mine.devices.keys() | theirs.devices.keys()):
+            sets = [source.devices.get(device_uid) for source in (base, mine, theirs)]
+            side = next(bindings.side for bindings in sets if bindings is not None)
+            merged, device_conflicts = self.merge_sets(
+                *(bindings or BindingSet(side=side, device_uid=device_uid) for bindings in sets),
+                report,
+            )
+            conflicts += device_conflicts
+            if merged.bindings:
+                profile.devices[device_uid] = merged
+        if self.conflict_engine is not None:
+            report.extend(self._introduced_issues(profile, mine, theirs))
+        return MergeResult(profile=profile, report=report, conflicts=conflicts)
+
+    def merge_sets(
+        self,
+        base: BindingSet,
+        mine: BindingSet,
+        theirs: BindingSet,
+        report: Optional[ValidationReport] = None,
+    ) -> Tuple[BindingSet, int]:
+        """Merge one device, adding conflicts to ``report``; returns the set and conflict count."""
+
+        report = report if report is not None else ValidationReport()
+        side = mine.side
+        device = f"{side} ({mine.device_uid})" if mine.device_uid else side
+        prefer_mine = self.prefer == "mine"
+        merged: Dict[BindingKey, Optional[Binding]] = {}
+        # Keys changed on only one side, grouped by action name.
+        mine_only: Dict[str, List[BindingKey]] = {}
+        theirs_only: Dict[str, List[BindingKey]] = {}
+        conflicts = 0
+
+        base_bindings, mine_bindings, theirs_bindings = (
+            base.bindings,
+            mine.bindings,
+            theirs.bindings,
+        )
+        for key in {**base_bindings, **mine_bindings, **theirs_bindings}:
+            original = base_bindings.get(key)
+            ours = mine_bindings.get(key)
+            other = theirs_bindings.get(key)
+            mine_changed = not _same(original, ours)
+            theirs_changed = not _same(original, other)
+            if mine_changed and theirs_changed:
+                if _same(ours, other):
+                    merged[key] = ours
+                    continue
+                conflicts += 1
+                merged[key] = ours if prefer_mine else other
+                reference = ours or other
+                assert reference is not None
+                report.add(
+                    ValidationIssue(
+                        level="warning",
+                        message=(
+                            f"Merge conflict on {device}: {key[0]} is {_describe(ours)} in "
+                            f"mine and {_describe(other)} in theirs; kept {self.prefer}."
+                        ),
+                        action=reference.action,
+                        slot=reference.slot,
+                    )
+                )
+            elif mine_changed:
+                merged[key] = ours
+                mine_only.setdefault(key[0], []).append(key)
+            elif theirs_changed:
+                merged[key] = other
+                theirs_only.setdefault(key[0], []).append(key)
+            else:
+                merged[key] = original
+
+        # An action rebound on both sides to different keys: keep the
+        # preferred side's rebinding and revert the other side's.
+        for action_name in sorted(mine_only.keys() & theirs_only.keys()):
+            conflicts += 1
+            reverted = theirs_only[action_name] if prefer_mine else mine_only[action_name]
+            for key in reverted:
+                merged[key] = (mine_bindings if prefer_mine else theirs_bindings).get(key)
+            report.add(
+                ValidationIssue(
+                    level="warning",
+                    message=(
+                        f"Merge conflict on {device}: {action_name} was rebound in both "
+                        f"profiles; kept {self.prefer}."
+                    ),
+                )
+            )
+
+        result = BindingSet(side=side, device_uid=mine.device_uid)
+        for binding in merged.values():
+            if binding is not None:
+                result.add(binding)
+        return result, conflicts
+
+    def merge_folders(
+        self,
+        repository: "ActionMapsRepository",
+        base_dir: Path,
+        mine_dir: Path,
+        theirs_dir: Path,
+        output_dir: Path,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, MergeResult]:
+        """Merge every control map found in ``mine_dir`` or ``theirs_dir``.
+
+        Files are matched by name. A file missing from ``base_dir`` merges
+        against an empty profile; a file missing from one side is treated as
+        unchanged from the base. Merged profiles are written to
+        ``output_dir`` in one ``save_control_profiles`` batch and results are
+        keyed by file name.
+        """
+
+        names = sorted({path.name for path in (*mine_dir.glob("*.xml"), *theirs_dir.glob("*.xml"))})
+        results: Dict[str, MergeResult] = {}
+        for name in names:
+            base = self._load(repository, base_dir / name)
+            mine = self._load(repository, mine_dir / name, base)
+            theirs = self._load(repository, theirs_dir / name, base)
+            results[name] = self.merge(base, mine, theirs, profile_name=Path(name).stem)
+
+        jobs = [(result.profile, output_dir / name) for name, result in results.items()]
+        exports = repository.save_control_profiles(jobs, max_workers=max_workers)
+        for result, export in zip(results.values(), exports):
+            result.export = export
+        return results
+
+    @staticmethod
+    def _load(
+        repository: "ActionMapsRepository", path: Path, fallback: Optional[ControlProfile] = None
+    ) -> ControlProfile:
+        if path.exists():
+            return repository.load_control_profile(path)
+        return fallback if fallback is not None else empty_profile(path.stem)
+
+    def _introduced_issues(
+        self, merged: ControlProfile, mine: ControlProfile, theirs: ControlProfile
+    ) -> List[ValidationIssue]:
+        assert self.conflict_engine is not None
+        known: Set[Tuple[str, str]] = {
+            (issue.level, issue.message)
+            for profile in (mine, theirs)
+            for issue in self.conflict_engine.check(profile.iter_bindings()).issues
+        }
+        return [
+            issue
+            for issue in self.conflict_engine.check(merged.iter_bindings()).issues
+            if (issue.level, issue.message) not in known
+        ]
@@ -2,9 +2,10 @@
 from pathlib import Path
 import sys
 import json
+import os
 import logging
-import copy
-from typing import Any, Dict, Optional, List, cast
+from contextlib import contextmanager
+from typing import Any, Dict, FrozenSet, Iterator, Optional, List, TextIO, Tuple, cast
 
 from PyQt6.QtWidgets import (
     QApplication,
@@ -22,8 +23,8 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6 import QtWidgets
 from PyQt6.QtGui import QPixmap
-from PyQt6.QtCore import QRect, Qt, QEvent, QObject
-from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QRect, Qt, QEvent, QObject, pyqtSignal
+from PyQt6.QtGui import QCloseEvent, QIcon
 from PyQt6 import QtGui
 import app.models.exported_configmap_xml as configmap
 from app.config import Config
@@ -34,7 +35,15 @@ from app.models.full_game_control_options import (
     get_all_defined_game_actions,
     get_all_subcategories_actions,
 )
-from app.models.joystick import JoystickConfig, JoyAction, JoyStickButton, get_joystick_buttons
+from app.models.joystick import (
+    JoystickConfig,
+    JoyAction,
+    JoyStickButton,
+    MappingKey,
+    get_joystick_buttons,
+)
+from app.models.edit_history import EditHistory, EditTransaction
+from app.models.mapping_builder import MappingBuilder
 from app.components.settings_dialog import SettingsDialog
 from app.components.ui_action import ActionSelectionDialog
 from app.utils.logger import setup_logging
@@ -42,12 +51,18 @@ from app.utils.logger import setup_logging
 from app.domain import (
     ActionIdentifier,
     Binding,
-    BindingSet,
+    BindingPlan,
     ControlProfile,
     InputSlot,
     ValidationReport,
 )
-from app.services import BindingPlanner, BindingPlannerContext
+from app.services import (
+    BindingPlanner,
+    BindingPlannerContext,
+    CapturedInput,
+    InputCaptureService,
+    get_device_service,
+)
 
 # Additional imports for your specific functions
 from app.models.exported_configmap_xml import (
@@ -57,7 +72,12 @@ from app.models.exported_configmap_xml import (
     get_action_maps_object,
 )
 from app.globals import APP_PATH, get_installation
-import xmltodict  # type: ignore[import-untyped]
+from app.io import (
+    ControlMapTemplate,
+    ControlMapWorkingCopy,
+    WriteBehindExporter,
+    write_action_maps,
+)
 
 # Set up logging
 setup_logging()
@@ -78,11 +98,16 @@ height: int = 35
 test_output_file = APP_PATH / "data/test_output.xml"
 
 
-def unparse(data: ExportedActionMapsFile) -> str:
-    xml_data = {"ActionMaps": [data.model_dump(exclude_none=True, by_alias=True)]}
-    with open(test_output_file, "w") as f:
-        f.write(xmltodict.unparse(xml_data, pretty=True, indent=" ", short_empty_elements=True))
-    return xmltodict.unparse(xml_data)
+def unparse(data: ExportedActionMapsFile, output: TextIO, newl: str = "\n") -> None:
+    write_action_maps(
+        data, output, pretty=True, indent=" ", newl=newl, short_empty_elements=True
+    )
+
+
+class InputCaptureSignal(QObject):
+    """Carries captured presses from the input capture thread to the UI thread."""
+
+    captured = pyqtSignal(object)
 
 
 class ControlMapperApp(QMainWindow):
@@ -91,9 +116,10 @@ class ControlMapperApp(QMainWindow):
     def __init__(self) -> None:
         super().__init__()
         self.control_map: Optional[ExportedActionMapsFile] = None
-        self.control_map_template: Optional[ExportedActionMapsFile] = None
+        self.control_map_template: Optional[ControlMapTemplate] = None
         self.exported_control_maps: List[str] = []
         self.config = Config.get_config()
+        self.device_service = get_device_service()
         self.setWindowTitle("VKB Joystick Mapper")
 
         self.setWindowIcon(QIcon(str(icon_path)))
@@ -124,6 +150,10 @@ class ControlMapperApp(QMainWindow):
             side="right", configured_actions={}
         )
         self.current_config: JoystickConfig = self.left_joystick_config
+        self.edit_history = EditHistory([self.left_joystick_config, self.right_joystick_config])
+        self.active_transaction: Optional[EditTransaction] = None
+        self._mapping_builder: Optional[MappingBuilder] = None
+        self._button_tags: Dict[str, FrozenSet[str]] = {}
         self.current_joystick: str = "left"
 
         self.modifier_enabled: bool = False
@@ -138,12 +168,30 @@ class ControlMapperApp(QMainWindow):
             button.sc_config_name: button for button in joystick_buttons.values()
         }
         self.binding_validation_report: Optional[ValidationReport] = None
+        # One profile kept in step with the joystick configs, see live_control_profile()
+        self._live_profile: Optional[ControlProfile] = None
+        self._live_profile_source: Tuple[Any, ...] = ()
+        self._live_bindings: Dict[Tuple[str, MappingKey], Binding] = {}
+        # (profile fingerprint, baseline profile, plan, report) of the last validation
+        self._last_validation: Optional[
+            Tuple[int, Optional[ControlProfile], BindingPlan, ValidationReport]
+        ] = None
+        # Written untranslated: a spliced export must keep the source file's line endings
+        self.control_map_exporter: WriteBehindExporter[ControlMapWorkingCopy] = (
+            WriteBehindExporter(test_output_file, self.write_control_map_export, newline="")
+        )
 
         self.previous_selected_button: Optional[QPushButton] = None
         self.button_refs: Dict[str, QPushButton] = {}
         self.joystick_sides: Dict[int, str] = {}
         self.selected_button_label: Optional[str] = None  # Currently selected button label
 
+        # Press to select: the capture thread emits, the queued connection selects the button
+        self.input_capture = InputCaptureService()
+        self.input_capture_signal = InputCaptureSignal(self)
+        self.input_capture_signal.captured.connect(self.select_captured_input)
+        self._input_capture_listener = self.input_capture_signal.captured.emit
+
         self.init_ui()
         self.init_install_type()
         self.set_default_bindings()
@@ -168,7 +216,7 @@ class ControlMapperApp(QMainWindow):
         self.create_action_panel()
 
     def open_settings_dialog(self) -> None:
-        dialog = SettingsDialog(self.config, self)
+        dialog = SettingsDialog(self.config, self, device_service=self.device_service)
         if dialog.exec():
             # Reload the config
             self.config = Config.get_config()
@@ -199,6 +247,21 @@ class ControlMapperApp(QMainWindow):
         self.hold_button.clicked.connect(self.toggle_hold)
         controls_layout.addWidget(self.hold_button)
 
+        self.undo_button: QPushButton = QPushButton("Undo", controls_widget)
+        self.undo_button.setShortcut(QtGui.QKeySequence.StandardKey.Undo)
+        self.undo_button.clicked.connect(self.undo_edit)
+        controls_layout.addWidget(self.undo_button)
+
+        self.redo_button: QPushButton = QPushButton("Redo", controls_widget)
+        self.redo_button.setShortcut(QtGui.QKeySequence.StandardKey.Redo)
+        self.redo_button.clicked.connect(self.redo_edit)
+        controls_layout.addWidget(self.redo_button)
+
+        self.capture_button: QPushButton = QPushButton("Press to Select", controls_widget)
+        self.capture_button.setCheckable(True)
+        self.capture_button.toggled.connect(self.toggle_input_capture)
+        controls_layout.addWidget(self.capture_button)
+
         self.control_maps_combo_box: QComboBox = QComboBox(controls_widget)
         self.control_maps_combo_box.setPlaceholderText("--Select Control Map--")
         self.control_maps_combo_box.setVisible(True)
@@ -265,8 +328,15 @@ class ControlMapperApp(QMainWindow):
         self.remove_action_button.clicked.connect(self.remove_selected_action)
         buttons_layout.addWidget(self.remove_action_button)
 
+        self.nearest_free_button: QPushButton = QPushButton("Nearest Free Slot", self.action_panel)
+        self.nearest_free_button.clicked.connect(self.select_nearest_free_button)
+        buttons_layout.addWidget(self.nearest_free_button)
+
         self.action_panel_layout.addLayout(buttons_layout)
 
+        self.free_slots_label = QLabel("Free slots: -", self.action_panel)
+        self.action_panel_layout.addWidget(self.free_slots_label)
+
         # Spacer to push the buttons to the top
         self.action_panel_layout.addStretch()
 
@@ -304,6 +374,38 @@ class ControlMapperApp(QMainWindow):
         )
         self.update_joystick_buttons()
 
+    def toggle_input_capture(self, enabled: bool) -> None:
+        if enabled:
+            self.input_capture.add_listener(self._input_capture_listener)
+            self.input_capture.start()
+            self.capture_button.setText("Stop Press to Select")
+        else:
+            self.input_capture.stop(timeout=1)
+            self.input_capture.remove_listener(self._input_capture_listener)
+            self.capture_button.setText("Press to Select")
+
+    def select_captured_input(self, captured: CapturedInput) -> None:
+        """Select the on-screen button for a control pressed on the joystick."""
+        side = self.side_for_device(captured.device_name)
+        if side is not None and side != self.current_joystick:
+            self.toggle_joystick()
+        button = self.button_refs.get(captured.slot)
+        if button is None:
+            logger.debug("Captured %s has no button in this layout", captured.slot)
+            return
+        self.show_action_panel(button, captured.slot)
+
+    def side_for_device(self, device_name: str) -> Optional[str]:
+        if self.config.joystick_left_name_filter and (
+            self.config.joystick_left_name_filter in device_name
+        ):
+            return "left"
+        if self.config.joystick_right_name_filter and (
+            self.config.joystick_right_name_filter in device_name
+        ):
+            return "right"
+        return None
+
     def toggle_multitap(self) -> None:
         self.multitap_enabled = not self.multitap_enabled
         self.multitap_button.setText(
@@ -318,7 +420,9 @@ class ControlMapperApp(QMainWindow):
 
     def set_default_bindings(self) -> None:
         self.control_map = get_action_maps_object(str(DEFAULT_CONTROL_MAP_FILENAME))
-        self.control_map_template = copy.deepcopy(self.control_map)
+        self.control_map_template = ControlMapTemplate(
+            self.control_map, DEFAULT_CONTROL_MAP_FILENAME
+        )
         self.joystick_sides = self.get_joystick_sides(self.control_map)
         self.load_joystick_mappings()
         self.update_joystick_buttons()
@@ -342,7 +446,7 @@ class ControlMapperApp(QMainWindow):
             )
             return
 
-        self.control_map_template = copy.deepcopy(self.control_map)
+        self.control_map_template = ControlMapTemplate(self.control_map, Path(control_map_file))
         self.joystick_sides = self.get_joystick_sides(self.control_map)
         self.load_joystick_mappings()
         self.update_joystick_buttons()
@@ -452,10 +556,17 @@ class ControlMapperApp(QMainWindow):
         self.right_joystick_config.clear_mappings()
         if self.control_map is None:
             return
-        for actionmap in self.control_map.actionmap:
-            self.process_action_map(actionmap)
-        # After processing the control map, apply default bindings
-        self.apply_default_bindings()
+        # Rebinds and defaults are collected in one builder and installed at once.
+        builder = self._mapping_builder = MappingBuilder()
+        try:
+            for actionmap in self.control_map.actionmap:
+                self.process_action_map(actionmap)
+            # After processing the control map, apply default bindings
+            self.apply_default_bindings()
+            builder.install(self.left_joystick_config, self.right_joystick_config)
+        finally:
+            self._mapping_builder = None
+        self.edit_history.reset()
 
         self.update_unsupported_actions_table()
         self.update_validation_status_indicator(None)
@@ -467,14 +578,8 @@ class ControlMapperApp(QMainWindow):
 
     def unbind_action(self, action_name: str) -> None:
         """Remove an action from all joystick mappings."""
-        joy_actions_copy = self.left_joystick_config.configured_actions.copy()
-        for joy_action in joy_actions_copy.values():
-            if action_name == joy_action.name:
-                self.left_joystick_config.unbind_action(action_name)
-        joy_actions_copy = self.right_joystick_config.configured_actions.copy()
-        for joy_action in joy_actions_copy.values():
-            if action_name == joy_action.name:
-                self.right_joystick_config.unbind_action(action_name)
+        self.left_joystick_config.unbind_action(action_name)
+        self.right_joystick_config.unbind_action(action_name)
 
     def process_rebind(self, action: configmap.Action, rebind: Rebind) -> None:
         try:
@@ -531,6 +636,9 @@ class ControlMapperApp(QMainWindow):
                     button=button,
                 )
                 # an action can only be bound to one button per device, but for joysticks, we want to avoid multiple bindings
+                if self._mapping_builder is not None:
+                    self._mapping_builder.bind(side, joy_action)
+                    continue
                 self.unbind_action(action.name)
 
                 if side == "left":
@@ -561,12 +669,13 @@ class ControlMapperApp(QMainWindow):
         """
         Reapply default binds for actions not set elsewhere.
         """
+        builder = self._mapping_builder or MappingBuilder.from_configs(
+            self.left_joystick_config, self.right_joystick_config
+        )
         # Collect all configured action names
-        configured_action_names: set[str] = set()
-        for configured_action in self.left_joystick_config.configured_actions.values():
-            configured_action_names.add(configured_action.name)
-        for configured_action in self.right_joystick_config.configured_actions.values():
-            configured_action_names.add(configured_action.name)
+        configured_action_names: set[str] = {
+            action.name for actions in builder.actions.values() for action in actions.values()
+        }
 
         # Determine which joystick is js1 (assumed default)
         js1_side = self.joystick_sides.get(1)
@@ -630,7 +739,10 @@ class ControlMapperApp(QMainWindow):
                     button=button,
                 )
 
-                default_joystick.set_mapping(joy_action)
+                builder.put(default_joystick.side, joy_action)
+
+        if builder is not self._mapping_builder:
+            builder.install(self.left_joystick_config, self.right_joystick_config)
 
     def populate_control_maps_combo_box(self) -> None:
         self.control_maps_combo_box.clear()
@@ -640,6 +752,11 @@ class ControlMapperApp(QMainWindow):
     def eventFilter(self, source: QObject, event: QEvent) -> bool:
         return super().eventFilter(source, event)
 
+    def closeEvent(self, a0: Optional[QCloseEvent]) -> None:  # type: ignore[override]
+        self.control_map_exporter.shutdown()
+        self.input_capture.stop(timeout=1)
+        super().closeEvent(a0)
+
     def toggle_joystick(self) -> None:
         self.save_current_mappings()
         if self.current_joystick == "left":
@@ -682,6 +799,28 @@ class ControlMapperApp(QMainWindow):
         for label, button in self.button_refs.items():
             self.update_button_label(label)
             self.update_button_geometry(label, button)
+        self.update_free_slots_label()
+
+    def update_free_slots_label(self) -> None:
+        free = self.current_config.free_slots(
+            self.modifier_enabled, self.multitap_enabled, self.hold_enabled
+        )
+        self.free_slots_label.setText(
+            f"Free slots: {len(free)} of {len(joystick_buttons)} in this mode"
+        )
+
+    def select_nearest_free_button(self) -> None:
+        """Select the free button closest to the current selection in the current mode."""
+        origin = self.selected_button_label or next(iter(joystick_buttons))
+        name = self.current_config.nearest_free_button(
+            origin, self.modifier_enabled, self.multitap_enabled, self.hold_enabled
+        )
+        if name is None:
+            QMessageBox.information(self, "No Free Slot", "Every button is mapped in this mode.")
+            return
+        button = self.button_refs.get(name)
+        if button is not None:
+            self.show_action_panel(button, name)
 
     def update_button_geometry(self, label: str, button: QPushButton) -> None:
         geometry: QRect = QRect(
@@ -814,32 +953,27 @@ class ControlMapperApp(QMainWindow):
                     modifier=modifier,
                     button=joystick_button,
                 )
-                self.unbind_action(selected_action_name)
-                self.current_config.set_mapping(joy_action)
-                self.update_button_label(self.selected_button_label)
-                self.show_action_panel(
-                    self.button_refs[self.selected_button_label], self.selected_button_label
-                )  # Refresh the panel
-                self.remove_unsupported_entry(selected_action_name, self.current_joystick)
-                self.update_unsupported_actions_table()
-                self.update_control_map()
+                with self.edit_transaction(f"Add {selected_action_name}"):
+                    self.unbind_action(selected_action_name)
+                    self.current_config.set_mapping(joy_action)
+                    self.remove_unsupported_entry(selected_action_name, self.current_joystick)
             else:
                 logger.warning(f"Action {selected_action_name} not found.")
 
     def add_action_to_control_map(
         self,
-        control_map: ExportedActionMapsFile,
+        working_map: ControlMapWorkingCopy,
         joy_action: JoyAction,
     ) -> None:
-        target_actionmap = next(
+        map_index = next(
             (
-                actionmap
-                for actionmap in control_map.actionmap
+                index
+                for index, actionmap in enumerate(working_map.control_map.actionmap)
                 if actionmap.name == joy_action.actionmap_section
             ),
             None,
         )
-        if target_actionmap is None:
+        if map_index is None:
             logger.warning(
                 "Action map %s not found for action %s",
                 joy_action.actionmap_section,
@@ -847,58 +981,129 @@ class ControlMapperApp(QMainWindow):
             )
             return
 
-        existing_action = next(
-            (a for a in target_actionmap.action if a.name == joy_action.name), None
+        target_actionmap = working_map.control_map.actionmap[map_index]
+        action_index = next(
+            (
+                index
+                for index, action in enumerate(target_actionmap.action)
+                if action.name == joy_action.name
+            ),
+            None,
         )
         rebind_payload: Dict[str, Any] = {"@input": joy_action.input}
         if joy_action.multitap:
             rebind_payload["@multiTap"] = 2
         new_rebind = Rebind.model_validate(rebind_payload)
 
-        if existing_action:
+        if action_index is not None:
+            existing_action = target_actionmap.action[action_index]
             prefix = joy_action.input.split("_")[0]
-            existing_action.rebind = [
-                rb for rb in existing_action.rebind if not rb.input.startswith(prefix)
-            ]
-            existing_action.rebind.append(new_rebind)
+            rebinds = [rb for rb in existing_action.rebind if not rb.input.startswith(prefix)]
+            rebinds.append(new_rebind)
+            working_map.set_rebinds(map_index, action_index, rebinds)
         else:
-            target_actionmap.action.append(
-                configmap.Action.model_validate({"@name": joy_action.name, "rebind": [new_rebind]})
+            working_map.append_action(
+                map_index,
+                configmap.Action.model_validate({"@name": joy_action.name, "rebind": [new_rebind]}),
             )
 
+    def validate_edits(self) -> Tuple[ControlProfile, BindingPlan, ValidationReport]:
+        """Run slot validation and conflict rules on the current mappings.
+
+        The checks cover the whole profile, so they are skipped when its
+        fingerprint shows nothing changed since the last validation.
+        """
+        desired_profile = self.live_control_profile()
+        baseline = self.binding_planner_context.default_profile
+        cached = self._last_validation
+        if (
+            cached is not None
+            and cached[0] == desired_profile.fingerprint
+            and cached[1] is baseline
+        ):
+            return desired_profile, cached[2], cached[3]
+        plan = self.binding_planner.plan_from_profile(desired_profile)
+        report = self.binding_planner.validate_plan(plan)
+        report.extend(
+            self.binding_planner.conflict_engine.check(desired_profile.iter_bindings()).issues
+        )
+        self._last_validation = (desired_profile.fingerprint, baseline, plan, report)
+        return desired_profile, plan, report
+
     def update_control_map(self) -> None:
+        if self.active_transaction is not None:
+            # Deferred until the transaction commits.
+            return
         if self.control_map_template is None:
             logger.warning("Control map template is not initialised; skipping export update.")
             return
+        self._export_edits(*self.validate_edits())
+
+    def _export_edits(
+        self, desired_profile: ControlProfile, plan: BindingPlan, report: ValidationReport
+    ) -> None:
+        assert self.control_map_template is not None
+        self._log_binding_validation_report(report)
 
-        export_map = copy.deepcopy(self.control_map_template)
         joystick_instances = {
             side: self.get_instance_number_for_side(side) for side in ("left", "right")
         }
+        fingerprint = self._export_fingerprint(desired_profile, joystick_instances)
+        if fingerprint == self.control_map_exporter.target_fingerprint:
+            self.update_validation_status_indicator(report)
+            return
+
+        working_map = self.control_map_template.working_copy()
         self.clear_joystick_rebinds(
-            export_map,
+            working_map,
             {instance for instance in joystick_instances.values() if instance is not None},
         )
 
-        desired_profile = self.build_control_profile_snapshot()
-        plan = self.binding_planner.plan_from_profile(desired_profile)
-        report = self.binding_planner.validate_plan(plan)
-        self._log_binding_validation_report(report)
-
         for binding in plan.to_remove:
-            self.remove_binding_from_control_map(export_map, binding)
+            self.remove_binding_from_control_map(working_map, binding)
 
         for binding in plan.to_add:
             joy_action = self._binding_to_joy_action(binding)
             if joy_action is None:
                 continue
-            self.add_action_to_control_map(export_map, joy_action)
+            self.add_action_to_control_map(working_map, joy_action)
 
-        self.control_map = export_map
-        unparse(export_map)
+        self.control_map = working_map.control_map
+        self.control_map_exporter.submit(working_map, fingerprint)
 
         self.update_validation_status_indicator(report)
 
+    def _export_fingerprint(
+        self, profile: ControlProfile, joystick_instances: Dict[str, Optional[int]]
+    ) -> int:
+        """Hash of every input that determines the exported file's content."""
+
+        assert self.control_map_template is not None
+        return hash(
+            (
+                self.control_map_template.generation,
+                profile.fingerprint,
+                tuple(sorted(joystick_instances.items())),
+                self.config.modifier_key,
+                self.config.preserve_export_formatting,
+            )
+        )
+
+    def write_control_map_export(
+        self, working_map: ControlMapWorkingCopy, output: TextIO
+    ) -> None:
+        """Serialise an export, keeping the source formatting when configured to."""
+        if self.config.preserve_export_formatting:
+            try:
+                splice_writer = working_map.template.splice_writer()
+                if splice_writer is not None:
+                    splice_writer.write(working_map.control_map, output)
+                    return
+            except (OSError, ValueError) as e:
+                logger.warning(f"Falling back to a full export: {e}")
+        # The exporter does not translate newlines, so emit the platform's own
+        unparse(working_map.control_map, output, newl=os.linesep)
+
     def remove_selected_action(self) -> None:
         """
         Remove the selected action from the button's mappings.
@@ -908,22 +1113,89 @@ class ControlMapperApp(QMainWindow):
             QMessageBox.warning(self, "Error", "No action selected.")
             return
 
+        keys = []
         for selected_range in selected_ranges:
             for row in range(selected_range.topRow(), selected_range.bottomRow() + 1):
                 key_item = self.actions_table_widget.item(
                     row, 0
                 )  # Key is stored in the first column
                 if key_item:
-                    key = key_item.data(Qt.ItemDataRole.UserRole)
-                    self.current_config.remove_mapping_by_key(key)
-            # Remove the rows in reverse order to prevent shifting issues
-            for row in reversed(range(selected_range.topRow(), selected_range.bottomRow() + 1)):
-                self.actions_table_widget.removeRow(row)
-        assert self.selected_button_label
-        self.update_button_label(self.selected_button_label)
-        self.update_unsupported_actions_table()
+                    keys.append(key_item.data(Qt.ItemDataRole.UserRole))
+
+        with self.edit_transaction("Remove actions"):
+            for key in keys:
+                self.current_config.remove_mapping_by_key(key)
+
+    def undo_edit(self) -> None:
+        if self.edit_history.undo() is not None:
+            self._after_history_change()
+
+    def redo_edit(self) -> None:
+        if self.edit_history.redo() is not None:
+            self._after_history_change()
+
+    def _after_history_change(self) -> None:
+        self.update_joystick_buttons()
+        self.refresh_action_panel()
         self.update_control_map()
 
+    @contextmanager
+    def edit_transaction(
+        self, label: str, *, rollback_on_new_errors: bool = False
+    ) -> Iterator[EditTransaction]:
+        """Group mapping edits so validation, label refresh and export run once.
+
+        Edits made inside the block go straight to the joystick configs, but
+        ``update_control_map`` is deferred until the block exits. On commit
+        the edits are validated once; with ``rollback_on_new_errors`` a
+        report containing errors that were not reported before the
+        transaction reverts the whole batch. An exception inside the block
+        always reverts it. Nested transactions join the outer one.
+        """
+        if self.active_transaction is not None:
+            yield self.active_transaction
+            return
+
+        baseline = self.binding_validation_report
+        if rollback_on_new_errors and baseline is None:
+            baseline = self.validate_edits()[2]
+        self.edit_history.record("Edit")
+        transaction = EditTransaction(label)
+        self.active_transaction = transaction
+        try:
+            yield transaction
+        except BaseException:
+            self.edit_history.rollback()
+            transaction.rolled_back = True
+            raise
+        else:
+            self._commit_transaction(transaction, baseline if rollback_on_new_errors else None)
+        finally:
+            self.active_transaction = None
+            self.update_joystick_buttons()
+            self.refresh_action_panel()
+
+    def _commit_transaction(
+        self, transaction: EditTransaction, baseline: Optional[ValidationReport]
+    ) -> None:
+        if not self.edit_history.has_pending:
+            return
+        desired_profile, plan, report = self.validate_edits()
+        transaction.report = report
+        if baseline is not None:
+            known = {(issue.level, issue.message) for issue in baseline.issues}
+            if any(
+                issue.level.lower() == "error" and (issue.level, issue.message) not in known
+                for issue in report.issues
+            ):
+                self.edit_history.rollback()
+                transaction.rolled_back = True
+                return
+        transaction.step = self.edit_history.record(transaction.label)
+        self.update_unsupported_actions_table()
+        if self.control_map_template is not None:
+            self._export_edits(desired_profile, plan, report)
+
     def has_action(self, label: str) -> bool:
         actions_dict = self.current_config.get_actions_for_button(
             label,
@@ -935,14 +1207,14 @@ class ControlMapperApp(QMainWindow):
 
     def update_button_label(self, label: str) -> None:
         button: QPushButton = self.button_refs[label]
-        has_action = self.has_action(label)
+        actions_dict = self.current_config.get_actions_for_button(
+            label,
+            self.modifier_enabled,
+            multitap=self.multitap_enabled,
+            hold=self.hold_enabled,
+        )
+        has_action = bool(actions_dict)
         if has_action:
-            actions_dict = self.current_config.get_actions_for_button(
-                label,
-                self.modifier_enabled,
-                multitap=self.multitap_enabled,
-                hold=self.hold_enabled,
-            )
             button.setText("\n".join(action.name for action in actions_dict.values()))
         else:
             button.setText(label)
@@ -1013,6 +1285,9 @@ class ControlMapperApp(QMainWindow):
                     data = json.load(f)
                     self.left_joystick_config = JoystickConfig.model_validate(data["left"])
                     self.right_joystick_config = JoystickConfig.model_validate(data["right"])
+                self.edit_history = EditHistory(
+                    [self.left_joystick_config, self.right_joystick_config]
+                )
                 if self.current_joystick == "left":
                     self.current_config = self.left_joystick_config
                 else:
@@ -1026,29 +1301,57 @@ class ControlMapperApp(QMainWindow):
             QMessageBox.warning(self, "Error", f"Failed to load configuration: {e}")
 
     def build_control_profile_snapshot(self) -> ControlProfile:
-        left_set = BindingSet(side="left")
-        for binding in self._bindings_from_config(self.left_joystick_config):
-            left_set.add(binding)
-
-        right_set = BindingSet(side="right")
-        for binding in self._bindings_from_config(self.right_joystick_config):
-            right_set.add(binding)
-
-        return ControlProfile(
-            profile_name="UI Profile",
-            left=left_set,
-            right=right_set,
-            metadata={"install_type": self.install_type},
-        )
+        """Return an independent copy of the current mappings as a profile."""
+        live = self.live_control_profile()
+        return ControlProfile.from_bindings(live.profile_name, live.iter_bindings(), live.metadata)
 
-    def _bindings_from_config(self, config: JoystickConfig) -> List[Binding]:
-        bindings: List[Binding] = []
-        for joy_action in config.configured_actions.values():
-            bindings.append(self._joy_action_to_binding(joy_action, config.side))
-        return bindings
+    def live_control_profile(self) -> ControlProfile:
+        """Return the long-lived profile of the current mappings.
 
-    def _joy_action_to_binding(self, joy_action: JoyAction, side: str) -> Binding:
-        device_uid = self._resolve_device_uid_for_side(side)
+        Only the keys the joystick configs report as changed are converted
+        and swapped in with ``add``/``remove``. The profile is rebuilt when a
+        config or the device uids are replaced, e.g. after loading a map.
+        """
+        configs = (self.left_joystick_config, self.right_joystick_config)
+        device_uids = tuple(self._resolve_device_uid_for_side(config.side) for config in configs)
+        profile = self._live_profile
+        rebuild = (
+            profile is None
+            or device_uids != self._live_profile_source[2:]
+            or any(new is not old for new, old in zip(configs, self._live_profile_source))
+        )
+        if profile is None or rebuild:
+            profile = self._live_profile = ControlProfile(profile_name="UI Profile")
+            self._live_profile_source = (*configs, *device_uids)
+            self._live_bindings = {}
+        profile.metadata["install_type"] = self.install_type
+
+        for config in configs:
+            changed = config.take_changed_keys()
+            if changed is None or rebuild:
+                for side, key in [item for item in self._live_bindings if item[0] == config.side]:
+                    self._unbind_live(profile, side, key)
+                changed = list(config.configured_actions)
+            device_uid = self._resolve_device_uid_for_side(config.side)
+            for key in changed:
+                self._unbind_live(profile, config.side, key)
+                joy_action = config.configured_actions.get(key)
+                if joy_action is not None:
+                    binding = self._joy_action_to_binding(joy_action, config.side, device_uid)
+                    self._live_bindings[(config.side, key)] = binding
+                    profile.add(binding)
+        return profile
+
+    def _unbind_live(self, profile: ControlProfile, side: str, key: MappingKey) -> None:
+        binding = self._live_bindings.pop((side, key), None)
+        if binding is not None and profile.get(binding.slot.device_uid, binding.key) is binding:
+            profile.remove(binding)
+
+    def _joy_action_to_binding(
+        self, joy_action: JoyAction, side: str, device_uid: Optional[str] = None
+    ) -> Binding:
+        if device_uid is None:
+            device_uid = self._resolve_device_uid_for_side(side)
         if device_uid is None:
             device_uid = self._parse_device_uid_from_input(joy_action.input)
         if device_uid is None:
@@ -1060,13 +1363,16 @@ class ControlMapperApp(QMainWindow):
             device_uid = f"js{fallback_instance}"
 
         slot_id = joy_action.button.sc_config_name
-        action_identifier = ActionIdentifier(
-            name=joy_action.name,
-            main_category=joy_action.category or "",
-            sub_category=joy_action.sub_category or "",
+        action_identifier = ActionIdentifier.intern(
+            joy_action.name, joy_action.category or "", joy_action.sub_category or ""
         )
 
-        slot = InputSlot(device_uid=device_uid, side=side, slot_id=slot_id)
+        slot = InputSlot.intern(device_uid, side, slot_id)
+        tags = self._button_tags.get(joy_action.button.name)
+        if tags is None:
+            tags = self._button_tags[joy_action.button.name] = frozenset(
+                (joy_action.button.name, slot_id)
+            )
 
         return Binding(
             action=action_identifier,
@@ -1074,7 +1380,7 @@ class ControlMapperApp(QMainWindow):
             modifier=joy_action.modifier,
             hold=joy_action.hold,
             multitap=joy_action.multitap,
-            tags={joy_action.button.name, slot_id},
+            tags=tags,
         )
 
     def _binding_to_joy_action(self, binding: Binding) -> Optional[JoyAction]:
@@ -1122,9 +1428,7 @@ class ControlMapperApp(QMainWindow):
                 if candidate is not None:
                     button = candidate
                     break
-        if button is None:
-            return None
-        return button.model_copy()
+        return button
 
     def _resolve_device_uid_for_side(self, side: str) -> Optional[str]:
         instance = self.get_instance_number_for_side(side)
@@ -1155,24 +1459,25 @@ class ControlMapperApp(QMainWindow):
 
     def remove_binding_from_control_map(
         self,
-        control_map: ExportedActionMapsFile,
+        working_map: ControlMapWorkingCopy,
         binding: Binding,
     ) -> None:
         expected_input = self._build_input_from_binding(binding)
 
-        for actionmap in control_map.actionmap:
-            for action in list(actionmap.action):
+        for map_index in range(len(working_map.control_map.actionmap)):
+            actions = working_map.control_map.actionmap[map_index].action
+            for action_index in reversed(range(len(actions))):
+                action = actions[action_index]
                 if action.name != binding.action.name:
                     continue
 
-                original_count = len(action.rebind)
-                action.rebind = [
-                    rebind for rebind in action.rebind if rebind.input != expected_input
-                ]
+                rebinds = [rebind for rebind in action.rebind if rebind.input != expected_input]
 
-                if not action.rebind:
-                    actionmap.action.remove(action)
-                elif len(action.rebind) != original_count:
+                if not rebinds:
+                    working_map.remove_action(map_index, action_index)
+                    actions = working_map.control_map.actionmap[map_index].action
+                elif len(rebinds) != len(action.rebind):
+                    working_map.set_rebinds(map_index, action_index, rebinds)
                     logger.debug(
                         "Removed rebind %s for action %s", expected_input, binding.action.name
                     )
@@ -1206,23 +1511,27 @@ class ControlMapperApp(QMainWindow):
 
     def clear_joystick_rebinds(
         self,
-        control_map: ExportedActionMapsFile,
+        working_map: ControlMapWorkingCopy,
         instances: set[int],
     ) -> None:
         if not instances:
             return
         prefixes = tuple(f"js{instance}_" for instance in instances)
-        for actionmap in control_map.actionmap:
-            for action in actionmap.action:
-                if not action.rebind:
+        for map_index, actionmap in enumerate(working_map.control_map.actionmap):
+            for action_index, action in enumerate(actionmap.action):
+                if not any(rebind.input.startswith(prefixes) for rebind in action.rebind):
                     continue
-                action.rebind = [
-                    rebind for rebind in action.rebind if not rebind.input.startswith(prefixes)
-                ]
+                working_map.set_rebinds(
+                    map_index,
+                    action_index,
+                    [rebind for rebind in action.rebind if not rebind.input.startswith(prefixes)],
+                )
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = ControlMapperApp()
     window.show()
+    # Enumerate controllers in the background so the settings dialog opens with a list
+    window.device_service.start()
     sys.exit(app.exec())
@@ -1,8 +1,19 @@
-from typing import List
+import logging
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
 from pydantic import BaseModel
-import pygame
 
-# Initialize Pygame
+logger = logging.getLogger(__name__)
+
+# Interval at which the pygame event thread drains the queue when only hotplug matters.
+PYGAME_EVENT_INTERVAL = 0.05
+# Interval while input is being captured; well below a 60 Hz frame (16.7 ms)
+# so a press is seen before the next repaint.
+PYGAME_INPUT_INTERVAL = 0.001
 
 
 class SystemDevice(BaseModel):
@@ -14,19 +25,423 @@ class SystemDevice(BaseModel):
     num_buttons: int
 
 
-def get_controller_devices() -> List[SystemDevice]:
-    pygame.init()
-    pygame.joystick.init()
-    devices: List[SystemDevice] = []
-    joystick_count = pygame.joystick.get_count()
-    for i in range(joystick_count):
-        joystick = pygame.joystick.Joystick(i)
-        joystick.init()
-        name = joystick.get_name()
-        num_axes = joystick.get_numaxes()
-        num_buttons = joystick.get_numbuttons()
-        guid = joystick.get_guid()
-        devices.append(SystemDevice(name=name, instance=i, product_guid=guid, product_name=name, num_axes=num_axes, num_buttons=num_buttons))
-    return devices
+class InputEvent(NamedTuple):
+    """A raw control change reported by an ``InputBackend``.
+
+    ``value`` is 1/0 for a button press/release, the ``(x, y)`` position for
+    a hat, and the position in ``[-1, 1]`` for an axis. ``timestamp`` is the
+    ``time.perf_counter()`` at which the backend read the event.
+    """
+
+    instance: int
+    device_name: str
+    kind: str
+    index: int
+    value: Union[int, float, Tuple[int, int]]
+    timestamp: float
+
+
+class PygameEventPump:
+    """The one thread that uses pygame; it fans the events out to listeners.
+
+    SDL's event queue is global and pumping it is not thread-safe, so the
+    display and joystick subsystems are initialised, enumerated, drained
+    and shut down on this thread only. Every poll takes the whole queue.
+    Device listeners get the new controller list after each hotplug event.
+    Input listeners get the button, hat and axis events as ``InputEvent``s.
+    Listeners are called on the pump thread. The thread starts with the
+    first listener and stops, shutting pygame down, after the last one is
+    removed.
+    """
+
+    def __init__(self) -> None:
+        self.last_error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+        self._device_listeners: List[Callable[[List[SystemDevice]], None]] = []
+        self._input_listeners: List[Callable[[List[InputEvent]], None]] = []
+        self._devices: List[SystemDevice] = []
+        self._ready = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_thread: Optional[threading.Thread] = None
+        # Used on the pump thread only
+        self._pygame: Any = None
+        self._joysticks: Dict[int, Tuple[int, str, Any]] = {}
+        self._input_kinds: Dict[int, str] = {}
+        self._hotplug_kinds: Tuple[int, ...] = ()
+
+    def add_device_listener(self, listener: Callable[[List[SystemDevice]], None]) -> None:
+        with self._condition:
+            self._device_listeners.append(listener)
+            self._ensure_running()
+
+    def remove_device_listener(self, listener: Callable[[List[SystemDevice]], None]) -> None:
+        with self._condition:
+            if listener in self._device_listeners:
+                self._device_listeners.remove(listener)
+
+    def add_input_listener(self, listener: Callable[[List[InputEvent]], None]) -> None:
+        with self._condition:
+            self._input_listeners.append(listener)
+            self._ensure_running()
+
+    def remove_input_listener(self, listener: Callable[[List[InputEvent]], None]) -> None:
+        with self._condition:
+            if listener in self._input_listeners:
+                self._input_listeners.remove(listener)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> None:
+        """Wait for the first enumeration; raise the error if pygame failed to start."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._ready, timeout)
+            if self.last_error is not None:
+                raise self.last_error
+
+    def devices(self) -> List[SystemDevice]:
+        with self._condition:
+            return list(self._devices)
+
+    def _ensure_running(self) -> None:
+        if self._thread is not None:
+            return
+        self._ready = False
+        self.last_error = None
+        # A previous pump may still be shutting pygame down; the new one waits for it
+        self._thread = threading.Thread(
+            target=self._run, args=(self._last_thread,), name="PygameEventPump", daemon=True
+        )
+        self._last_thread = self._thread
+        self._thread.start()
+
+    def _run(self, previous: Optional[threading.Thread]) -> None:
+        if previous is not None:
+            previous.join()
+        try:
+            self._open()
+            while True:
+                with self._condition:
+                    if not self._device_listeners and not self._input_listeners:
+                        self._thread = None
+                        return
+                    capturing = bool(self._input_listeners)
+                if not self._poll():
+                    time.sleep(PYGAME_INPUT_INTERVAL if capturing else PYGAME_EVENT_INTERVAL)
+        except Exception as exc:
+            logger.exception("pygame event thread failed")
+            with self._condition:
+                self.last_error = exc
+                self._ready = True
+                self._thread = None
+                self._condition.notify_all()
+        finally:
+            self._close()
+
+    def _open(self) -> None:
+        import pygame
+
+        self._pygame = pygame
+        # Hotplug and input events need the event queue, which belongs to the
+        # display module; without it the device list is only read once.
+        # SDL expects the video subsystem to be initialised and pumped by one
+        # thread, not necessarily the main one, on Windows (window messages are
+        # per thread and no window is created) and on X11/Wayland (SDL opens its
+        # own connection, separate from Qt's). Cocoa requires the main thread,
+        # so on macOS the display is left alone and capture gets no events.
+        if sys.platform != "darwin":
+            try:
+                pygame.display.init()
+            except pygame.error:
+                pass
+        pygame.joystick.init()
+        self._input_kinds = {
+            pygame.JOYBUTTONDOWN: "button",
+            pygame.JOYBUTTONUP: "button",
+            pygame.JOYHATMOTION: "hat",
+            pygame.JOYAXISMOTION: "axis",
+        }
+        self._hotplug_kinds = (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED)
+        if pygame.display.get_init():
+            # Nothing else reads this queue, so keep only what is used here
+            pygame.event.set_blocked(None)
+            pygame.event.set_allowed([*self._hotplug_kinds, *self._input_kinds])
+        self._enumerate()
+
+    def _close(self) -> None:
+        self._joysticks = {}
+        if self._pygame is not None:
+            self._pygame.joystick.quit()
+            self._pygame.display.quit()
+            self._pygame = None
+
+    def _poll(self) -> bool:
+        """Drain the queue and dispatch it; returns ``False`` if it was empty."""
+        pygame = self._pygame
+        if not pygame.display.get_init():
+            return False
+        raw = pygame.event.get()
+        if not raw:
+            return False
+        now = time.perf_counter()
+        events: List[InputEvent] = []
+        hotplug = False
+        for item in raw:
+            if item.type in self._hotplug_kinds:
+                hotplug = True
+                continue
+            event = self._convert(item, now)
+            if event is not None:
+                events.append(event)
+        if hotplug:
+            self._enumerate()
+        if events:
+            with self._condition:
+                listeners = list(self._input_listeners)
+            for listener in listeners:
+                try:
+                    listener(events)
+                except Exception:
+                    logger.exception("Controller input listener failed")
+        return True
+
+    def _enumerate(self) -> None:
+        pygame = self._pygame
+        joysticks: Dict[int, Tuple[int, str, Any]] = {}
+        devices: List[SystemDevice] = []
+        for i in range(pygame.joystick.get_count()):
+            joystick = pygame.joystick.Joystick(i)
+            joystick.init()
+            name = joystick.get_name()
+            joysticks[joystick.get_instance_id()] = (i, name, joystick)
+            devices.append(
+                SystemDevice(
+                    name=name,
+                    instance=i,
+                    product_guid=joystick.get_guid(),
+                    product_name=name,
+                    num_axes=joystick.get_numaxes(),
+                    num_buttons=joystick.get_numbuttons(),
+                )
+            )
+        self._joysticks = joysticks
+        with self._condition:
+            self._devices = devices
+            self._ready = True
+            listeners = list(self._device_listeners)
+            self._condition.notify_all()
+        for listener in listeners:
+            try:
+                listener(list(devices))
+            except Exception:
+                logger.exception("Controller list listener failed")
+
+    def _convert(self, raw: Any, timestamp: float) -> Optional[InputEvent]:
+        kind = self._input_kinds.get(raw.type)
+        joystick = self._joysticks.get(getattr(raw, "instance_id", -1))
+        if kind is None or joystick is None:
+            return None
+        instance, name, _ = joystick
+        if kind == "button":
+            pressed = int(raw.type == self._pygame.JOYBUTTONDOWN)
+            return InputEvent(instance, name, kind, raw.button, pressed, timestamp)
+        if kind == "hat":
+            return InputEvent(instance, name, kind, raw.hat, tuple(raw.value), timestamp)
+        return InputEvent(instance, name, kind, raw.axis, raw.value, timestamp)
+
+
+_pygame_event_pump: Optional[PygameEventPump] = None
+_pygame_event_pump_lock = threading.Lock()
+
+
+def get_pygame_event_pump() -> PygameEventPump:
+    """Return the process-wide ``PygameEventPump`` shared by all pygame backends."""
+    global _pygame_event_pump
+    with _pygame_event_pump_lock:
+        if _pygame_event_pump is None:
+            _pygame_event_pump = PygameEventPump()
+        return _pygame_event_pump
+
+
+class DeviceBackend(ABC):
+    """Source of connected controllers for ``DeviceService``.
+
+    A backend is used from a single thread: ``open`` is called first, then
+    ``enumerate`` and ``wait_for_hotplug`` alternate until ``close``.
+    """
+
+    @abstractmethod
+    def open(self) -> None:
+        """Prepare the backend; may be slow, e.g. import and initialise a library."""
+
+    @abstractmethod
+    def enumerate(self) -> List[SystemDevice]:
+        """Return the controllers connected right now."""
+
+    @abstractmethod
+    def wait_for_hotplug(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds; return ``True`` if a controller was added or removed."""
+
+    def close(self) -> None:
+        """Release the backend's resources."""
+
+
+class PygameDeviceBackend(DeviceBackend):
+    """Controller list from the shared ``PygameEventPump``; pygame is imported there."""
+
+    def __init__(self, pump: Optional[PygameEventPump] = None) -> None:
+        self.pump = pump or get_pygame_event_pump()
+        self._changed = False
+        self._condition = threading.Condition()
+
+    def open(self) -> None:
+        self.pump.add_device_listener(self._on_devices)
+        self.pump.wait_ready()
+
+    def enumerate(self) -> List[SystemDevice]:
+        with self._condition:
+            self._changed = False
+        return self.pump.devices()
+
+    def wait_for_hotplug(self, timeout: float) -> bool:
+        with self._condition:
+            changed = self._condition.wait_for(lambda: self._changed, timeout)
+            self._changed = False
+        if self.pump.last_error is not None:
+            raise self.pump.last_error
+        return changed
+
+    def close(self) -> None:
+        self.pump.remove_device_listener(self._on_devices)
+
+    def _on_devices(self, devices: List[SystemDevice]) -> None:
+        with self._condition:
+            self._changed = True
+            self._condition.notify_all()
+
+
+class FakeDeviceBackend(DeviceBackend):
+    """In-memory backend for tests; ``plug`` and ``unplug`` simulate hotplug events."""
+
+    def __init__(self, devices: Sequence[SystemDevice] = (), open_delay: float = 0.0) -> None:
+        self.open_delay = open_delay
+        self.enumerate_count = 0
+        self._devices = list(devices)
+        self._changed = False
+        self._condition = threading.Condition()
+
+    def open(self) -> None:
+        time.sleep(self.open_delay)
+
+    def enumerate(self) -> List[SystemDevice]:
+        with self._condition:
+            self.enumerate_count += 1
+            return list(self._devices)
+
+    def wait_for_hotplug(self, timeout: float) -> bool:
+        with self._condition:
+            changed = self._condition.wait_for(lambda: self._changed, timeout)
+            self._changed = False
+            return changed
+
+    def plug(self, device: SystemDevice) -> None:
+        with self._condition:
+            self._devices.append(device)
+            self._changed = True
+            self._condition.notify_all()
+
+    def unplug(self, instance: int) -> None:
+        with self._condition:
+            self._devices = [device for device in self._devices if device.instance != instance]
+            self._changed = True
+            self._condition.notify_all()
+
+
+class InputBackend(ABC):
+    """Source of live controller input for ``InputCaptureService``.
+
+    Like ``DeviceBackend``, a backend is used from a single thread: ``open``,
+    then ``read_events`` repeatedly, then ``close``.
+    """
+
+    @abstractmethod
+    def open(self) -> None:
+        """Start listening to the connected controllers."""
+
+    @abstractmethod
+    def read_events(self, timeout: float) -> List[InputEvent]:
+        """Return pending events, waiting up to ``timeout`` seconds for the first one."""
+
+    def close(self) -> None:
+        """Stop listening."""
+
+
+class PygameInputBackend(InputBackend):
+    """Button, hat and axis events from the shared ``PygameEventPump``.
+
+    While a backend is open the pump polls every ``PYGAME_INPUT_INTERVAL``.
+    """
+
+    def __init__(self, pump: Optional[PygameEventPump] = None) -> None:
+        self.pump = pump or get_pygame_event_pump()
+        self._pending: List[InputEvent] = []
+        self._condition = threading.Condition()
+
+    def open(self) -> None:
+        self.pump.add_input_listener(self._on_input)
+        self.pump.wait_ready()
+
+    def read_events(self, timeout: float) -> List[InputEvent]:
+        with self._condition:
+            self._condition.wait_for(lambda: bool(self._pending), timeout)
+            events, self._pending = self._pending, []
+        if not events and self.pump.last_error is not None:
+            raise self.pump.last_error
+        return events
+
+    def close(self) -> None:
+        self.pump.remove_input_listener(self._on_input)
+        with self._condition:
+            self._pending = []
+
+    def _on_input(self, events: List[InputEvent]) -> None:
+        with self._condition:
+            self._pending.extend(events)
+            self._condition.notify_all()
+
+
+class ScriptedInputBackend(InputBackend):
+    """Virtual input backend for tests; ``push`` feeds events as if a controller sent them."""
+
+    def __init__(self, events: Sequence[InputEvent] = ()) -> None:
+        self._pending: List[InputEvent] = list(events)
+        self._condition = threading.Condition()
+        self.opened = False
+
+    def open(self) -> None:
+        self.opened = True
+
+    def read_events(self, timeout: float) -> List[InputEvent]:
+        with self._condition:
+            self._condition.wait_for(lambda: bool(self._pending), timeout)
+            events, self._pending = self._pending, []
+            return events
+
+    def push(self, *events: InputEvent) -> None:
+        with self._condition:
+            self._pending.extend(events)
+            self._condition.notify_all()
+
+    def press(self, instance: int, device_name: str, kind: str, index: int, value: Any = 1) -> None:
+        """Push a single event stamped with the current time."""
+        self.push(InputEvent(instance, device_name, kind, index, value, time.perf_counter()))
+
+    def close(self) -> None:
+        self.opened = False
 
 
+def get_controller_devices(backend: Optional[DeviceBackend] = None) -> List[SystemDevice]:
+    """Enumerate controllers once, synchronously; ``DeviceService`` keeps a cached list."""
+    backend = backend or PygameDeviceBackend()
+    backend.open()
+    try:
+        return backend.enumerate()
+    finally:
+        backend.close()
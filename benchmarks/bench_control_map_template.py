@@ -0,0 +1,63 @@
+"""Per-edit cost of deep-copying the control map versus copy-on-write working copies.
+
+Run with ``python -m benchmarks.bench_control_map_template``.
+"""
+
+from __future__ import annotations
+
+import copy
+import timeit
+import tracemalloc
+from typing import Callable
+
+from app.globals import APP_PATH
+from app.io import ControlMapTemplate
+from app.models.exported_configmap_xml import ExportedActionMapsFile, Rebind, get_action_maps_object
+
+SOURCE_FILE = APP_PATH / "data" / "SCBindsDefault.xml"
+SCALE = 5  # replicate the action maps to approximate all_blanks.xml
+ROUNDS = 50
+
+
+def build_source() -> ExportedActionMapsFile:
+    control_map = get_action_maps_object(str(SOURCE_FILE))
+    control_map.actionmap = [
+        actionmap.model_copy(deep=True) for _ in range(SCALE) for actionmap in control_map.actionmap
+    ]
+    return control_map
+
+
+def peak_allocation(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main() -> None:
+    source = build_source()
+    template = ControlMapTemplate(source)
+    rebind = Rebind.model_validate({"@input": "js1_button1"})
+    action_count = sum(len(actionmap.action) for actionmap in source.actionmap)
+
+    def deepcopy_edit() -> object:
+        export_map = copy.deepcopy(source)
+        export_map.actionmap[0].action[0].rebind = [rebind]
+        return export_map
+
+    def copy_on_write_edit() -> object:
+        working = template.working_copy()
+        working.set_rebinds(0, 0, [rebind])
+        return working
+
+    print(f"{len(source.actionmap)} action maps, {action_count} actions")
+    for label, func in (("deepcopy", deepcopy_edit), ("copy-on-write", copy_on_write_edit)):
+        elapsed = min(timeit.repeat(func, number=ROUNDS, repeat=3)) / ROUNDS
+        peak = peak_allocation(func)
+        print(f"{label:14s} {elapsed * 1e6:10.1f} us/edit  {peak / 1024:10.1f} KiB peak")
+
+
+if __name__ == "__main__":
+    main()
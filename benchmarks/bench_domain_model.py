@@ -0,0 +1,139 @@
+"""Memory and time of the slotted, interned domain model on a 50k-binding profile.
+
+``Legacy*`` classes replicate the previous dict-backed dataclasses whose
+``Binding.key`` joined a list into a string on every access.
+
+Run with ``python -m benchmarks.bench_domain_model``.
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, List, Tuple
+
+from app.domain import ActionIdentifier, Binding, ControlProfile, InputSlot
+from app.services import BindingPlanner, BindingPlannerContext
+
+BINDINGS = 50_000
+ACTIONS = 2_000
+DEVICES = 8
+SLOTS = 128
+
+
+@dataclass(frozen=True)
+class LegacyActionIdentifier:
+    name: str
+    main_category: str
+    sub_category: str
+
+
+@dataclass(frozen=True)
+class LegacyInputSlot:
+    device_uid: str
+    side: str
+    slot_id: str
+
+
+@dataclass
+class LegacyBinding:
+    action: LegacyActionIdentifier
+    slot: LegacyInputSlot
+    modifier: bool = False
+    hold: bool = False
+    multitap: bool = False
+    tags: set[str] = field(default_factory=set)
+
+    @property
+    def key(self) -> str:
+        parts = [self.action.name, self.slot.slot_id]
+        if self.modifier:
+            parts.append("modifier")
+        if self.hold:
+            parts.append("hold")
+        if self.multitap:
+            parts.append("multitap")
+        return "|".join(parts)
+
+
+def specs() -> List[Tuple[str, str, str, str, bool, bool, bool]]:
+    rows = []
+    for index in range(BINDINGS):
+        rows.append(
+            (
+                f"action_{index % ACTIONS}",
+                f"js{index % DEVICES + 1}",
+                "left" if index % 2 else "right",
+                f"button{index // DEVICES % SLOTS}",
+                bool(index & 1),
+                bool(index & 2),
+                bool(index & 4),
+            )
+        )
+    return rows
+
+
+def build_legacy(rows: list) -> List[LegacyBinding]:
+    return [
+        LegacyBinding(
+            action=LegacyActionIdentifier(name, "category", "section"),
+            slot=LegacyInputSlot(device, side, slot),
+            modifier=modifier,
+            hold=hold,
+            multitap=multitap,
+        )
+        for name, device, side, slot, modifier, hold, multitap in rows
+    ]
+
+
+def build_interned(rows: list) -> List[Binding]:
+    return [
+        Binding(
+            action=ActionIdentifier.intern(name, "category", "section"),
+            slot=InputSlot.intern(device, side, slot),
+            modifier=modifier,
+            hold=hold,
+            multitap=multitap,
+        )
+        for name, device, side, slot, modifier, hold, multitap in rows
+    ]
+
+
+def measure(label: str, build: Callable[[list], list], rows: list) -> list:
+    started = time.perf_counter()
+    build(rows)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    bindings = build(rows)
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:28s} build {elapsed * 1000:8.1f} ms  retained {size / 1e6:7.1f} MB")
+    return bindings
+
+
+def time_keys(label: str, bindings: list) -> None:
+    started = time.perf_counter()
+    for _ in range(5):
+        {binding.key: binding for binding in bindings}
+    elapsed = (time.perf_counter() - started) / 5
+    print(f"{label:28s} key dict {elapsed * 1000:6.1f} ms")
+
+
+def main() -> None:
+    rows = specs()
+    legacy = measure("legacy dataclasses", build_legacy, rows)
+    interned = measure("slotted + interned", build_interned, rows)
+    time_keys("legacy str keys", legacy)
+    time_keys("cached tuple keys", interned)
+
+    profile = ControlProfile("bench")
+    planner = BindingPlanner(BindingPlannerContext(default_profile=profile))
+    started = time.perf_counter()
+    plan = planner.plan_diff(profile, interned)
+    print(f"{'plan_diff (50k desired)':28s} {(time.perf_counter() - started) * 1000:11.1f} ms")
+    print(f"{'planned additions':28s} {len(plan.to_add):11d}")
+
+
+if __name__ == "__main__":
+    main()
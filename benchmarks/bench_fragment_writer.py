@@ -0,0 +1,74 @@
+"""Per-action ``ElementTree`` rendering versus the bulk fragment writer.
+
+Run with ``python -m benchmarks.bench_fragment_writer``.
+"""
+
+from __future__ import annotations
+
+import io
+import timeit
+import xml.etree.ElementTree as ET
+from typing import List
+
+from app.io import ActionFragmentWriter
+from app.models.joystick import JoyAction, get_joystick_buttons
+
+BINDINGS = 4000
+ROUNDS = 20
+MODIFIER_KEY = "rctrl"
+
+
+def element_tree_to_xml(action: JoyAction) -> str:
+    """The previous ``JoyAction.to_xml`` implementation."""
+    element = ET.Element("action", attrib={"name": action.name})
+    input_value = action.input
+    if action.modifier:
+        js_part, button_part = action.input.split("_", 1)
+        input_value = f"{js_part}_{MODIFIER_KEY}+{button_part}"
+    attrib = {"input": input_value}
+    if action.multitap:
+        attrib["multiTap"] = "2"
+    ET.SubElement(element, "rebind", attrib=attrib)
+    return ET.tostring(element, encoding="unicode")
+
+
+def build_actions() -> List[JoyAction]:
+    buttons = list(get_joystick_buttons("VKB Default").values())
+    actions = []
+    for index in range(BINDINGS):
+        button = buttons[index % len(buttons)]
+        actions.append(
+            JoyAction(
+                name=f"action_{index}",
+                input=f"js{index % 2 + 1}_{button.sc_config_name}",
+                category="Vehicles",
+                sub_category=f"section_{index % 40}",
+                modifier=bool(index & 1),
+                multitap=bool(index & 2),
+                button=button,
+            )
+        )
+    return actions
+
+
+def main() -> None:
+    actions = build_actions()
+
+    def per_action() -> None:
+        buffer = io.StringIO()
+        for action in actions:
+            buffer.write(element_tree_to_xml(action))
+
+    def bulk() -> None:
+        ActionFragmentWriter(MODIFIER_KEY).write_actions(actions, io.StringIO())
+
+    assert "".join(map(element_tree_to_xml, actions)) == ActionFragmentWriter(
+        MODIFIER_KEY
+    ).render_actions(actions)
+    for label, func in (("ElementTree per action", per_action), ("bulk fragment writer", bulk)):
+        elapsed = min(timeit.repeat(func, number=ROUNDS, repeat=3)) / ROUNDS
+        print(f"{label:24s} {elapsed * 1000:8.2f} ms / {BINDINGS} bindings")
+
+
+if __name__ == "__main__":
+    main()
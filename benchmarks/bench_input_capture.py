@@ -0,0 +1,56 @@
+"""Press-to-select latency: scripted backend event to Qt slot on the UI thread.
+
+Run with ``QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_input_capture``.
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+from typing import List
+
+from PyQt6.QtCore import QCoreApplication, QEventLoop, QObject, pyqtSignal
+
+from app.services import CapturedInput, InputCaptureService
+from app.utils.devices import ScriptedInputBackend
+
+PRESSES = 500
+FRAME_MS = 1000 / 60
+
+
+class Bridge(QObject):
+    captured = pyqtSignal(object)
+
+
+def main() -> None:
+    app = QCoreApplication([])
+    backend = ScriptedInputBackend()
+    service = InputCaptureService(backend)
+    bridge = Bridge()
+    latencies: List[float] = []
+    loop = QEventLoop()
+
+    def on_captured(captured: CapturedInput) -> None:
+        latencies.append((time.perf_counter() - captured.timestamp) * 1000)
+        loop.quit()
+
+    bridge.captured.connect(on_captured)
+    service.add_listener(bridge.captured.emit)
+    service.start()
+    for index in range(PRESSES):
+        backend.press(0, "VKBsim Gladiator EVO L", "button", index % 29)
+        loop.exec()
+    service.stop(timeout=5)
+    app.quit()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"presses {PRESSES}  frame {FRAME_MS:.1f} ms")
+    print(
+        f"median {statistics.median(latencies):.3f} ms  p99 {p99:.3f} ms  "
+        f"max {latencies[-1]:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Construction of ``JoyAction`` objects on the export path.
+
+``_binding_to_joy_action`` previously built every JoyAction around a
+``model_copy`` of the layout button; it now shares the layout button.
+
+Run with ``python -m benchmarks.bench_joy_action``.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, List
+
+from app.domain import ActionIdentifier, Binding, InputSlot
+from app.models.joystick import JoyAction, get_joystick_buttons
+
+COUNT = 50_000
+BUTTONS = list(get_joystick_buttons("VKB Default").values())
+
+
+def rebind_rows() -> list:
+    return [
+        (
+            f"action_{index % 2_000}",
+            f"js1_{BUTTONS[index % len(BUTTONS)].sc_config_name}",
+            BUTTONS[index % len(BUTTONS)],
+            bool(index & 1),
+            bool(index & 2),
+            bool(index & 4),
+        )
+        for index in range(COUNT)
+    ]
+
+
+def bindings(rows: list) -> List[Binding]:
+    return [
+        Binding(
+            action=ActionIdentifier.intern(name, "spaceship_general", "spaceship_general"),
+            slot=InputSlot.intern("js1", "left", button.sc_config_name),
+            modifier=modifier,
+            hold=hold,
+            multitap=multitap,
+        )
+        for name, _input, button, modifier, multitap, hold in rows
+    ]
+
+
+BUTTONS_BY_SLOT = {button.sc_config_name: button for button in BUTTONS}
+
+
+def export_copied(items: List[Binding]) -> List[JoyAction]:
+    return [
+        JoyAction(
+            name=binding.action.name,
+            input=f"js1_{binding.slot.slot_id}",
+            category=binding.action.main_category,
+            sub_category=binding.action.sub_category,
+            modifier=binding.modifier,
+            hold=binding.hold,
+            multitap=binding.multitap,
+            button=BUTTONS_BY_SLOT[binding.slot.slot_id].model_copy(),
+        )
+        for binding in items
+    ]
+
+
+def export_shared(items: List[Binding]) -> List[JoyAction]:
+    return [
+        JoyAction(
+            name=binding.action.name,
+            input=f"js1_{binding.slot.slot_id}",
+            category=binding.action.main_category,
+            sub_category=binding.action.sub_category,
+            modifier=binding.modifier,
+            hold=binding.hold,
+            multitap=binding.multitap,
+            button=BUTTONS_BY_SLOT[binding.slot.slot_id],
+        )
+        for binding in items
+    ]
+
+
+def best_of(build: Callable[[list], list], items: list, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build(items)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    items = bindings(rebind_rows())
+    assert export_copied(items[:100]) == export_shared(items[:100])
+    old = best_of(export_copied, items)
+    new = best_of(export_shared, items)
+    print(
+        f"{COUNT} JoyActions  copied button {old * 1000:7.1f} ms  "
+        f"shared button {new * 1000:7.1f} ms  ({old / new:4.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Loading one device layout while the number of installed layouts grows.
+
+Every layout file in a temporary folder is a copy of the shipped
+``VKB Default`` layout under another name. ``cold`` is the first start with
+an empty cache: every file is parsed and compiled. ``cached`` is a later
+start: the repository reads the index, checks each file's size and mtime,
+and parses only the compiled file of the selected layout.
+
+Run with ``python -m benchmarks.bench_layout_load``.
+"""
+
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from app.io.repositories import DEFAULT_LAYOUTS_PATH, DeviceLayoutRepository
+
+COUNTS = (1, 10, 100)
+SOURCE = json.loads((DEFAULT_LAYOUTS_PATH / "vkb_default.json").read_text())["VKB Default"]
+
+
+def start(root: Path, cache_dir: Path) -> float:
+    started = time.perf_counter()
+    layouts = DeviceLayoutRepository(root, cache_dir=cache_dir).load_layouts("Layout 0")
+    elapsed = time.perf_counter() - started
+    assert set(layouts) == {"left", "right"}
+    return elapsed
+
+
+def main() -> None:
+    for count in COUNTS:
+        with tempfile.TemporaryDirectory() as folder:
+            root, cache_dir = Path(folder) / "layouts", Path(folder) / "cache"
+            root.mkdir()
+            for index in range(count):
+                layout = json.dumps({f"Layout {index}": SOURCE}, indent=4)
+                (root / f"layout_{index}.json").write_text(layout)
+            cold = start(root, cache_dir)
+            cached = min(start(root, cache_dir) for _ in range(5))
+            print(
+                f"{count:4d} layouts  cold {cold * 1000:7.2f} ms  "
+                f"cached {cached * 1000:6.2f} ms  ({cold / cached:5.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
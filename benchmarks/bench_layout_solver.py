@@ -0,0 +1,52 @@
+"""Layout solver: time to place 30 actions around an occupied slot on one stick.
+
+The solver searches within ``time_budget`` and must answer in under a second.
+Run with ``python -m benchmarks.bench_layout_solver``.
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+from typing import List
+
+from app.domain import ActionIdentifier, Binding, ControlProfile, InputSlot
+from app.models.joystick import get_joystick_buttons
+from app.services import BindingPlanner, BindingPlannerContext, LayoutSolver, layout_candidates
+
+RUNS = 20
+TIME_BUDGET = 0.5
+LIMIT = 1.0
+
+
+def main() -> None:
+    buttons = list(get_joystick_buttons("VKB Default").values())
+    occupied = Binding(
+        action=ActionIdentifier.intern("v_attack1", "vehicles", "spaceship_weapons"),
+        slot=InputSlot.intern("js1", "left", buttons[0].sc_config_name),
+    )
+    planner = BindingPlanner(
+        BindingPlannerContext(default_profile=ControlProfile.from_bindings("bench", [occupied]))
+    )
+    actions = [
+        ActionIdentifier.intern(f"{category}_{index}", "vehicles", category)
+        for category, count in (("mining", 12), ("salvage", 10), ("scanning", 8))
+        for index in range(count)
+    ]
+    candidates = layout_candidates(buttons, "js1", "left")
+
+    timings: List[float] = []
+    for _ in range(RUNS):
+        started = time.monotonic()
+        solution = LayoutSolver(planner, time_budget=TIME_BUDGET).solve(actions, candidates)
+        timings.append(time.monotonic() - started)
+        assert not solution.unassigned and not solution.report.has_errors
+
+    print(f"actions {len(actions)}  candidates {len(candidates)}  budget {TIME_BUDGET:.1f} s")
+    print(f"median {statistics.median(timings):.3f} s  max {max(timings):.3f} s")
+    if max(timings) >= LIMIT:
+        raise SystemExit(f"slowest solve took {max(timings):.3f} s, over the {LIMIT:.1f} s limit")
+
+
+if __name__ == "__main__":
+    main()
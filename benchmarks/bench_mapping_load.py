@@ -0,0 +1,95 @@
+"""Installing the rebinds of a large control map into both joystick configs.
+
+``load_per_rebind`` replicates the previous load path: every rebind copied
+both ``configured_actions`` dicts to unbind earlier mappings of its action,
+then set the mapping on its config, so a load was quadratic in the number of
+rebinds. ``load_with_builder`` is the ``MappingBuilder`` path used by
+``ControlMapperApp.load_joystick_mappings``.
+
+Run with ``python -m benchmarks.bench_mapping_load``.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, List, Tuple
+
+from app.models.joystick import JoyAction, JoystickConfig, get_joystick_buttons
+from app.models.mapping_builder import MappingBuilder
+
+SIZES = (1_000, 4_000, 8_000)
+BUTTONS = list(get_joystick_buttons("VKB Default").values())
+
+Rebind = Tuple[str, JoyAction]
+
+
+def synthetic_rebinds(count: int) -> List[Rebind]:
+    """``count`` rebinds over ``count // 2`` actions, so half of them rebind an action."""
+    rebinds = []
+    for index in range(count):
+        button = BUTTONS[index % len(BUTTONS)]
+        side = "left" if index % 3 else "right"
+        rebinds.append(
+            (
+                side,
+                JoyAction(
+                    name=f"action_{index * 7919 % (count // 2)}",
+                    input=f"js{1 if side == 'left' else 2}_{button.sc_config_name}",
+                    category="spaceship_general",
+                    sub_category="spaceship_general",
+                    modifier=bool(index & 1),
+                    multitap=bool(index & 2),
+                    hold=bool(index & 4),
+                    button=button,
+                ),
+            )
+        )
+    return rebinds
+
+
+def load_per_rebind(rebinds: List[Rebind]) -> Tuple[JoystickConfig, JoystickConfig]:
+    configs = {side: JoystickConfig(side=side, configured_actions={}) for side in ("left", "right")}
+    for side, joy_action in rebinds:
+        for config in configs.values():
+            for action in config.configured_actions.copy().values():
+                if action.name == joy_action.name:
+                    for key, bound in config.configured_actions.copy().items():
+                        if bound.name == joy_action.name:
+                            config.remove_mapping_by_key(key)
+        configs[side].set_mapping(joy_action)
+    return configs["left"], configs["right"]
+
+
+def load_with_builder(rebinds: List[Rebind]) -> Tuple[JoystickConfig, JoystickConfig]:
+    left = JoystickConfig(side="left", configured_actions={})
+    right = JoystickConfig(side="right", configured_actions={})
+    builder = MappingBuilder()
+    for side, joy_action in rebinds:
+        builder.bind(side, joy_action)
+    builder.install(left, right)
+    return left, right
+
+
+def measure(load: Callable[[List[Rebind]], Tuple[JoystickConfig, JoystickConfig]], rebinds):
+    started = time.perf_counter()
+    configs = load(rebinds)
+    return time.perf_counter() - started, configs
+
+
+def main() -> None:
+    for size in SIZES:
+        rebinds = synthetic_rebinds(size)
+        legacy_time, legacy = measure(load_per_rebind, rebinds)
+        builder_time, built = measure(load_with_builder, rebinds)
+        assert all(
+            old.configured_actions == new.configured_actions for old, new in zip(legacy, built)
+        )
+        print(
+            f"{size:6d} rebinds  per-rebind {legacy_time * 1000:9.1f} ms  "
+            f"builder {builder_time * 1000:7.1f} ms  "
+            f"({legacy_time / builder_time:6.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
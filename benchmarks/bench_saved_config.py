@@ -0,0 +1,90 @@
+"""Size of a saved joystick config and memory of loading it back.
+
+``embedded`` replicates the previous format: every saved ``JoyAction``
+carried a full copy of its button, and loading created one button object
+per action. ``by id`` is the current format, where actions store the
+``BUTTON_REGISTRY`` id and share the registered button on load.
+
+Run with ``python -m benchmarks.bench_saved_config``.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from app.models.joystick import JoyAction, JoyStickButton, JoystickConfig, get_joystick_buttons
+
+COUNT = 5_000
+BUTTONS = list(get_joystick_buttons("VKB Default").values())
+
+
+def build_config() -> JoystickConfig:
+    config = JoystickConfig(side="left", configured_actions={})
+    for index in range(COUNT):
+        button = BUTTONS[index % len(BUTTONS)]
+        config.set_mapping(
+            JoyAction(
+                name=f"action_{index}",
+                input=f"js1_{button.sc_config_name}",
+                category="spaceship_general",
+                sub_category="spaceship_general",
+                modifier=bool(index & 1),
+                button=button,
+            )
+        )
+    return config
+
+
+def embedded_payload(config: JoystickConfig) -> Dict[str, Any]:
+    return {
+        "side": config.side,
+        "configured_actions": [
+            {**action.model_dump(), "button": action.button.model_dump()}
+            for action in config.configured_actions.values()
+        ],
+    }
+
+
+def load_embedded(payload: Dict[str, Any]) -> JoystickConfig:
+    actions = [
+        JoyAction(**{**item, "button": JoyStickButton(**item["button"])})
+        for item in payload["configured_actions"]
+    ]
+    return JoystickConfig(
+        side=payload["side"], configured_actions={action.key: action for action in actions}
+    )
+
+
+def load_by_id(payload: Dict[str, Any]) -> JoystickConfig:
+    return JoystickConfig.model_validate(payload)
+
+
+def measure(load: Callable[[Dict[str, Any]], Any], payload: Dict[str, Any]) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    loaded = load(payload)
+    elapsed = time.perf_counter() - started
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+    return elapsed, size
+
+
+def main() -> None:
+    config = build_config()
+    payloads = {"embedded": embedded_payload(config), "by id": config.model_dump()}
+    print(f"{COUNT} mappings")
+    for label, load in (("embedded", load_embedded), ("by id", load_by_id)):
+        payload = json.loads(json.dumps(payloads[label]))
+        elapsed, size = measure(load, payload)
+        print(
+            f"{label:9s} json {len(json.dumps(payloads[label], indent=4)) / 1024:8.1f} KiB  "
+            f"loaded {size / 1024:8.1f} KiB  load {elapsed * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Throughput comparison between ``xmltodict.unparse`` and the streaming writer.
+
+Run with ``python -m benchmarks.bench_xml_writer``.
+"""
+
+from __future__ import annotations
+
+import io
+import timeit
+
+import xmltodict  # type: ignore[import-untyped]
+
+from app.globals import APP_PATH
+from app.io import write_action_maps
+from app.models.exported_configmap_xml import get_action_maps_object
+
+SOURCE_FILE = APP_PATH / "data" / "SCBindsDefault.xml"
+ROUNDS = 50
+
+
+def main() -> None:
+    data = get_action_maps_object(str(SOURCE_FILE))
+
+    def legacy() -> None:
+        xml_data = {"ActionMaps": [data.model_dump(exclude_none=True, by_alias=True)]}
+        xmltodict.unparse(xml_data, output=io.StringIO(), pretty=True, indent=" ")
+        xmltodict.unparse(xml_data)
+
+    def streaming() -> None:
+        write_action_maps(data, io.StringIO(), pretty=True, indent=" ")
+
+    size = len(xmltodict.unparse({"ActionMaps": [data.model_dump(exclude_none=True, by_alias=True)]}))
+    for label, func in (("xmltodict (dump + 2x unparse)", legacy), ("streaming writer", streaming)):
+        elapsed = min(timeit.repeat(func, number=ROUNDS, repeat=3)) / ROUNDS
+        print(f"{label:32s} {elapsed * 1000:8.2f} ms/export  {size / elapsed / 1e6:6.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
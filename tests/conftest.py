@@ -0,0 +1,10 @@
+import pytest
+
+from app.io.repositories import DeviceLayoutRepository
+from app.models.joystick import set_layout_repository
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # Set before collection: app.ui loads the default chart when it is imported.
+    # Without a cache_dir nothing is written to the user's cache directory.
+    set_layout_repository(DeviceLayoutRepository(cache_dir=None))
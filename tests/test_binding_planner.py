@@ -32,15 +32,7 @@ def make_binding(
 def make_profile(
     left_bindings: list[Binding], right_bindings: list[Binding] | None = None
 ) -> ControlProfile:
-    left = BindingSet(side="left")
-    for binding in left_bindings:
-        left.add(binding)
-
-    right = BindingSet(side="right")
-    for binding in right_bindings or []:
-        right.add(binding)
-
-    return ControlProfile(profile_name="test", left=left, right=right)
+    return ControlProfile.from_bindings("test", [*left_bindings, *(right_bindings or [])])
 
 
 def test_plan_from_profile_collects_all_bindings() -> None:
@@ -74,7 +66,7 @@ def test_plan_diff_detects_additions_and_removals() -> None:
         ]
     )
 
-    plan = planner.plan_diff(existing, desired.left.bindings.values())
+    plan = planner.plan_diff(existing, desired.side_bindings("left"))
 
     assert {binding.action.name for binding in plan.to_remove} == {"remove"}
     assert {binding.action.name for binding in plan.to_add} == {"add"}
@@ -99,7 +91,7 @@ def test_plan_diff_removals_reference_original_binding_instances() -> None:
 
     # Desired bindings intentionally omit the binding, forcing a removal diff.
     plan = planner.plan_diff(
-        existing, [b for b in existing.left.bindings.values() if b is not binding_to_remove]
+        existing, [b for b in existing.side_bindings("left") if b is not binding_to_remove]
     )
 
     assert len(plan.to_remove) == 1
@@ -111,6 +103,21 @@ def test_plan_diff_removals_reference_original_binding_instances() -> None:
     assert removal.modifier and removal.hold and removal.multitap
 
 
+def test_plan_diff_compares_bindings_per_device() -> None:
+    planner = BindingPlanner(BindingPlannerContext())
+    existing = make_profile(
+        [make_binding("action", "button1", device=f"js{index}") for index in range(1, 9)]
+    )
+    moved = make_binding("action", "button1", side="pedals", device="js9")
+
+    plan = planner.plan_diff(existing, [*list(existing.iter_bindings())[1:], moved])
+
+    assert len(existing.devices) == 8
+    assert [binding.slot.device_uid for binding in plan.to_remove] == ["js1"]
+    assert plan.to_add == [moved]
+    assert planner.apply_plan(plan).devices["js9"].side == "pedals"
+
+
 def test_plan_diff_ignores_identical_desired_bindings() -> None:
     planner = BindingPlanner(BindingPlannerContext())
 
@@ -147,7 +154,7 @@ def test_validate_plan_detects_duplicate_slot_assignments() -> None:
         ]
     )
 
-    plan = planner.plan_diff(existing, desired.left.bindings.values())
+    plan = planner.plan_diff(existing, desired.side_bindings("left"))
     report = planner.validate_plan(plan)
 
     assert report.has_errors
@@ -164,8 +171,52 @@ def test_validate_plan_detects_modifier_conflict_against_existing() -> None:
         ]
     )
 
-    plan = planner.plan_diff(existing, desired.left.bindings.values())
+    plan = planner.plan_diff(existing, desired.side_bindings("left"))
     report = planner.validate_plan(plan)
 
     assert report.has_errors
     assert any("modifier conflict" in issue.message.lower() for issue in report.issues)
+
+
+def test_profile_fingerprint_ignores_insertion_order_and_tags() -> None:
+    first = make_binding("action_one", "button1")
+    second = make_binding("action_two", "button2", modifier=True)
+    tagged = Binding(action=first.action, slot=first.slot, tags=frozenset({"favourite"}))
+
+    assert make_profile([first, second]).fingerprint == make_profile([second, first]).fingerprint
+    assert make_profile([first]).fingerprint == make_profile([tagged]).fingerprint
+
+
+def test_binding_set_fingerprint_tracks_add_replace_and_remove() -> None:
+    bindings = BindingSet(side="left")
+    empty = bindings.fingerprint
+    first = make_binding("action_one", "button1")
+    bindings.add(first)
+    with_first = bindings.fingerprint
+
+    bindings.add(make_binding("action_one", "button1", device="js2"))
+    assert bindings.fingerprint != with_first
+    bindings.add(first)
+    assert bindings.fingerprint == with_first
+
+    bindings.remove(first.key)
+    assert bindings.fingerprint == empty
+    assert BindingSet(side="left", bindings={first.key: first}).fingerprint == with_first
+
+
+def test_interned_identifiers_and_slots_share_instances() -> None:
+    action = ActionIdentifier.intern("action_one", "mc", "sc")
+    slot = InputSlot.intern("js1", "left", "button1")
+
+    assert ActionIdentifier.intern("action_one", "mc", "sc") is action
+    assert InputSlot.intern("js1", "left", "button1") is slot
+    assert action == ActionIdentifier(name="action_one", main_category="mc", sub_category="sc")
+    assert slot.with_modifier("rctrl") is InputSlot.intern("js1", "left", "button1+rctrl")
+
+
+def test_binding_key_distinguishes_activation_modes() -> None:
+    plain = make_binding("action_one", "button1")
+
+    assert plain.key == ("action_one", "button1", False, False, False)
+    assert plain.key != make_binding("action_one", "button1", hold=True).key
+    assert plain.key == make_binding("action_one", "button1", device="js2").key
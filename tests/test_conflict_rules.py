@@ -0,0 +1,158 @@
+from typing import Iterator
+
+from app.domain import (
+    ActionIdentifier,
+    Binding,
+    BindingPlan,
+    ControlProfile,
+    InputSlot,
+    ValidationIssue,
+)
+from app.services import (
+    BindingPlanner,
+    BindingPlannerContext,
+    ConflictEngine,
+    ConflictIndex,
+    ConflictRule,
+)
+from app.services.conflict_rules import (
+    DeviceGroupUniquenessRule,
+    HoldTapOverlapRule,
+    MultitapShadowingRule,
+    device_group,
+)
+
+
+def make_binding(
+    name: str,
+    slot_id: str,
+    *,
+    side: str = "left",
+    device: str = "js1",
+    modifier: bool = False,
+    hold: bool = False,
+    multitap: bool = False,
+) -> Binding:
+    return Binding(
+        action=ActionIdentifier.intern(name, "mc", "sc"),
+        slot=InputSlot.intern(device, side, slot_id),
+        modifier=modifier,
+        hold=hold,
+        multitap=multitap,
+    )
+
+
+def make_profile(bindings: list[Binding]) -> ControlProfile:
+    return ControlProfile.from_bindings("test", bindings)
+
+
+def messages(rule: ConflictRule, *bindings: Binding) -> list[str]:
+    return [issue.message for issue in rule.check(ConflictIndex(bindings))]
+
+
+def test_hold_and_tap_on_same_slot_overlap() -> None:
+    issues = messages(
+        HoldTapOverlapRule(),
+        make_binding("tap_action", "button1"),
+        make_binding("hold_action", "button1", hold=True),
+        make_binding("other_modifier", "button1", modifier=True),
+    )
+
+    assert issues == [
+        "Hold/tap overlap: slot js1:button1 triggers tap_action on press before hold action "
+        "hold_action."
+    ]
+
+
+def test_multitap_is_shadowed_by_single_tap_with_same_modifier() -> None:
+    rule = MultitapShadowingRule()
+
+    assert messages(
+        rule,
+        make_binding("single", "button2"),
+        make_binding("double", "button2", multitap=True),
+    ) == ["Multitap shadowing: slot js1:button2 fires single on the first tap of double."]
+    assert not messages(
+        rule,
+        make_binding("single", "button2", modifier=True),
+        make_binding("double", "button2", multitap=True),
+    )
+
+
+def test_action_on_both_sticks_is_reported_once() -> None:
+    report = ConflictEngine().check(
+        [
+            make_binding("boost", "button1", side="left", device="js1"),
+            make_binding("boost", "button1", side="right", device="js2"),
+            make_binding("fire", "button2", side="left", device="js1"),
+        ]
+    )
+
+    assert [(issue.level, issue.message) for issue in report.issues] == [
+        (
+            "error",
+            "Action boost is bound on both sticks, more than once in the joystick group: "
+            "js1:button1, js2:button1.",
+        )
+    ]
+
+
+def test_action_bound_once_per_device_group() -> None:
+    rule = DeviceGroupUniquenessRule()
+
+    issues = list(
+        rule.check(
+            ConflictIndex(
+                [
+                    make_binding("boost", "button1", device="js1"),
+                    make_binding("boost", "button4", device="js3", side="throttle"),
+                    make_binding("boost", "lshift", device="kb1"),
+                ]
+            )
+        )
+    )
+
+    assert [issue.level for issue in issues] == ["error"]
+    assert issues[0].message == (
+        "Action boost is bound more than once in the joystick group: js1:button1, js3:button4."
+    )
+    assert device_group("kb1") == device_group("mo1") == "keyboard/mouse"
+
+
+def test_engine_accepts_custom_rules() -> None:
+    class NoButton9(ConflictRule):
+        name = "no-button9"
+
+        def check(self, index: ConflictIndex) -> Iterator[ValidationIssue]:
+            for key, bindings in index.by_slot.items():
+                if key[2] == "button9":
+                    yield ValidationIssue(level="error", message="button9", slot=bindings[0].slot)
+
+    engine = ConflictEngine(rules=[])
+    engine.register(NoButton9())
+
+    report = engine.check([make_binding("fire", "button9")])
+
+    assert [issue.message for issue in report.issues] == ["button9"]
+
+
+def test_planner_checks_conflicts_of_resulting_profile() -> None:
+    tap = make_binding("tap_action", "button1")
+    hold = make_binding("hold_action", "button1", hold=True)
+    planner = BindingPlanner(BindingPlannerContext(default_profile=make_profile([tap])))
+
+    assert not planner.check_conflicts().issues
+    assert len(planner.check_conflicts(BindingPlan(to_add=[hold])).issues) == 1
+    assert not planner.check_conflicts(BindingPlan(to_add=[hold], to_remove=[tap])).issues
+
+
+def test_rules_index_each_binding_once() -> None:
+    action = ActionIdentifier.intern("fire", "mc", "sc")
+    bindings = [
+        Binding(action=action, slot=InputSlot.intern("js1", "left", f"button{index}"))
+        for index in range(50)
+    ]
+    index = ConflictIndex(bindings)
+
+    assert len(index.by_action["fire"]) == 50
+    assert len(index.by_slot) == 50
@@ -0,0 +1,64 @@
+import copy
+import io
+from pathlib import Path
+
+from app.io import ControlMapTemplate, write_action_maps
+from app.models.exported_configmap_xml import Action, Rebind, get_action_maps_object
+
+DEFAULT_MAP = Path(__file__).resolve().parent.parent / "app" / "data" / "SCBindsDefault.xml"
+
+
+def serialise(control_map: object) -> str:
+    buffer = io.StringIO()
+    write_action_maps(control_map, buffer)  # type: ignore[arg-type]
+    return buffer.getvalue()
+
+
+def test_working_copy_shares_untouched_structure() -> None:
+    template = ControlMapTemplate(get_action_maps_object(str(DEFAULT_MAP)))
+    working = template.working_copy()
+
+    working.set_rebinds(0, 0, [Rebind.model_validate({"@input": "js1_button1"})])
+
+    source = template.source
+    assert working.control_map is not source
+    assert working.control_map.actionmap[0] is not source.actionmap[0]
+    assert working.control_map.actionmap[0].action[0] is not source.actionmap[0].action[0]
+    assert working.control_map.actionmap[0].action[1] is source.actionmap[0].action[1]
+    assert all(
+        copied is original
+        for copied, original in zip(working.control_map.actionmap[1:], source.actionmap[1:])
+    )
+    assert working.copied_actionmaps == 1
+    assert working.copied_actions == 1
+
+
+def test_working_copy_edits_do_not_leak_into_template() -> None:
+    template = ControlMapTemplate(get_action_maps_object(str(DEFAULT_MAP)))
+    before = serialise(template.source)
+
+    working = template.working_copy()
+    working.set_rebinds(0, 0, [])
+    working.remove_action(1, 0)
+    working.append_action(2, Action.model_validate({"@name": "new_action", "rebind": []}))
+
+    assert serialise(template.source) == before
+    assert serialise(working.control_map) != before
+
+
+def test_working_copy_matches_deepcopy_edits() -> None:
+    source = get_action_maps_object(str(DEFAULT_MAP))
+    expected = copy.deepcopy(source)
+    new_rebind = Rebind.model_validate({"@input": "js2_button3", "@multiTap": 2})
+    expected.actionmap[3].action[1].rebind = [new_rebind]
+    del expected.actionmap[4].action[0]
+    expected.actionmap[4].action.append(
+        Action.model_validate({"@name": "appended", "rebind": [new_rebind]})
+    )
+
+    working = ControlMapTemplate(source).working_copy()
+    working.set_rebinds(3, 1, [new_rebind])
+    working.remove_action(4, 0)
+    working.append_action(4, Action.model_validate({"@name": "appended", "rebind": [new_rebind]}))
+
+    assert serialise(working.control_map) == serialise(expected)
@@ -0,0 +1,143 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+import pytest
+
+import app.utils.devices as devices_module
+from app.services import DeviceService
+from app.utils.devices import (
+    FakeDeviceBackend,
+    PygameDeviceBackend,
+    PygameEventPump,
+    PygameInputBackend,
+    SystemDevice,
+)
+
+
+def make_device(instance: int, name: str = "VKBsim Gladiator EVO") -> SystemDevice:
+    return SystemDevice(
+        name=name,
+        instance=instance,
+        product_guid=f"guid-{instance}",
+        product_name=name,
+        num_axes=6,
+        num_buttons=32,
+    )
+
+
+def test_start_returns_before_slow_backend_opens() -> None:
+    backend = FakeDeviceBackend([make_device(0)], open_delay=0.5)
+    service = DeviceService(backend, poll_interval=0.01)
+
+    started = time.perf_counter()
+    service.start()
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.25
+    assert service.devices() == []
+    assert not service.ready
+    assert service.wait_for_update(timeout=5)
+    assert [device.instance for device in service.devices()] == [0]
+    service.stop(timeout=5)
+
+
+def test_devices_are_served_from_cache() -> None:
+    backend = FakeDeviceBackend([make_device(0), make_device(1)])
+    service = DeviceService(backend, poll_interval=0.01)
+    service.start()
+    assert service.wait_for_update(timeout=5)
+
+    for _ in range(50):
+        assert len(service.devices()) == 2
+    service.stop(timeout=5)
+
+    assert backend.enumerate_count == 1
+
+
+def test_hotplug_refreshes_list_and_notifies_listeners() -> None:
+    backend = FakeDeviceBackend([make_device(0)])
+    service = DeviceService(backend, poll_interval=0.01)
+    updates: List[List[int]] = []
+    service.add_listener(lambda devices: updates.append([d.instance for d in devices]))
+    service.start()
+    assert service.wait_for_update(timeout=5)
+
+    backend.plug(make_device(1))
+    assert service.wait_for_update(after=1, timeout=5)
+    assert [device.instance for device in service.devices()] == [0, 1]
+
+    backend.unplug(0)
+    assert service.wait_for_update(after=2, timeout=5)
+    service.stop(timeout=5)
+
+    assert [device.instance for device in service.devices()] == [1]
+    assert updates == [[0], [0, 1], [1]]
+    assert backend.enumerate_count == 3
+
+
+def test_backend_failure_is_recorded() -> None:
+    class BrokenBackend(FakeDeviceBackend):
+        def open(self) -> None:
+            raise OSError("no joystick subsystem")
+
+    service = DeviceService(BrokenBackend(), poll_interval=0.01)
+    service.start()
+
+    assert service.wait_for_update(timeout=5)
+    assert service.ready
+    assert isinstance(service.last_error, OSError)
+    assert service.devices() == []
+
+
+def test_importing_device_modules_does_not_import_pygame() -> None:
+    code = (
+        "import sys\n"
+        "import app.utils.devices, app.services, app.components.settings_dialog\n"
+        "assert 'pygame' not in sys.modules, 'pygame imported at module load'\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_pygame_backends_share_one_event_thread(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("pygame")
+    monkeypatch.setitem(os.environ, "SDL_VIDEODRIVER", "dummy")
+    pump = PygameEventPump()
+    devices = PygameDeviceBackend(pump)
+    inputs = PygameInputBackend(pump)
+
+    devices.open()
+    inputs.open()
+    assert devices.enumerate() == pump.devices()
+    assert inputs.read_events(0.01) == []
+    pumps = [thread for thread in threading.enumerate() if thread.name == "PygameEventPump"]
+    assert len(pumps) == 1
+
+    inputs.close()
+    devices.close()
+    pumps[0].join(5)
+    assert not pumps[0].is_alive()
+
+
+def test_pygame_event_thread_leaves_the_display_alone_on_macos(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    pygame = pytest.importorskip("pygame")
+    monkeypatch.setitem(os.environ, "SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setattr(devices_module.sys, "platform", "darwin")
+    pump = PygameEventPump()
+    devices = PygameDeviceBackend(pump)
+
+    devices.open()
+    (thread,) = [thread for thread in threading.enumerate() if thread.name == "PygameEventPump"]
+    assert devices.enumerate() == pump.devices()
+    assert not pygame.display.get_init()
+    assert not devices.wait_for_hotplug(0.01)
+
+    devices.close()
+    thread.join(5)
+    assert not thread.is_alive()
@@ -0,0 +1,124 @@
+import random
+import tracemalloc
+
+from app.models.edit_history import EditHistory
+from app.models.joystick import JoyAction, JoystickConfig, MappingKey, get_joystick_buttons
+
+BUTTONS = get_joystick_buttons("VKB Default")
+NAMES = list(BUTTONS)
+
+
+def make_action(name: str, button: str, *, modifier: bool = False) -> JoyAction:
+    return JoyAction(
+        name=name,
+        input=f"js1_{BUTTONS[button].sc_config_name}",
+        category="Vehicles",
+        sub_category="spaceship_weapons",
+        modifier=modifier,
+        button=BUTTONS[button],
+    )
+
+
+def make_configs() -> tuple[JoystickConfig, JoystickConfig]:
+    left = JoystickConfig(side="left", configured_actions={})
+    right = JoystickConfig(side="right", configured_actions={})
+    for index, name in enumerate(NAMES[:20]):
+        left.set_mapping(make_action(f"initial_{index}", name))
+    return left, right
+
+
+def random_edit(rng: random.Random, left: JoystickConfig, right: JoystickConfig) -> None:
+    config = rng.choice((left, right))
+    if config.configured_actions and rng.random() < 0.4:
+        config.remove_mapping_by_key(rng.choice(list(config.configured_actions)))
+    elif rng.random() < 0.1:
+        config.unbind_action(f"action_{rng.randrange(30)}")
+    else:
+        config.set_mapping(
+            make_action(
+                f"action_{rng.randrange(30)}", rng.choice(NAMES), modifier=rng.random() < 0.5
+            )
+        )
+
+
+def test_undo_and_redo_walk_back_and_forth_through_history() -> None:
+    left, right = make_configs()
+    history = EditHistory([left, right])
+    rng = random.Random(3)
+    states = [(dict(left.configured_actions), dict(right.configured_actions))]
+    for step in range(200):
+        for _ in range(rng.randint(1, 3)):
+            random_edit(rng, left, right)
+        if history.record(f"step {step}") is not None:
+            states.append((dict(left.configured_actions), dict(right.configured_actions)))
+
+    for expected in reversed(states[:-1]):
+        assert history.undo() is not None
+        assert (left.configured_actions, right.configured_actions) == expected
+    assert history.undo() is None
+
+    for expected in states[1:]:
+        assert history.redo() is not None
+        assert (left.configured_actions, right.configured_actions) == expected
+    assert (
+        left.occupancy().occupied
+        == JoystickConfig(side="left", configured_actions=dict(left.configured_actions))
+        .occupancy()
+        .occupied
+    )
+
+
+def test_new_edit_discards_redo_and_pending_edits_are_undone_first() -> None:
+    left, right = make_configs()
+    history = EditHistory([left, right])
+    left.set_mapping(make_action("first", NAMES[30]))
+    history.record("first")
+    history.undo()
+    assert history.can_redo
+
+    left.set_mapping(make_action("second", NAMES[31]))
+    assert history.undo() is not None
+    assert MappingKey("second") not in left.configured_actions
+    assert history.redo().label == "Edit"
+    assert MappingKey("second") in left.configured_actions
+    assert MappingKey("first") not in left.configured_actions
+    assert not history.can_redo
+
+
+def test_history_steps_only_store_changed_mappings() -> None:
+    left, right = make_configs()
+    history = EditHistory([left, right])
+    actions = [make_action(f"action_{index}", NAMES[index % len(NAMES)]) for index in range(50)]
+
+    tracemalloc.start()
+    for step in range(5000):
+        left.set_mapping(actions[step % 50])
+        left.remove_mapping_by_key(actions[(step + 25) % 50].key)
+        history.record("edit")
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(history) == 5000
+    assert all(len(step.changes) <= 2 for step in history._undo)
+    assert size < 5_000_000
+
+
+def test_rollback_reverts_only_unrecorded_edits() -> None:
+    left, right = make_configs()
+    history = EditHistory([left, right])
+    kept = make_action("kept", NAMES[0])
+    left.set_mapping(kept)
+    history.record("kept")
+    snapshot = (dict(left.configured_actions), dict(right.configured_actions))
+
+    left.set_mapping(make_action("kept", NAMES[1]))
+    left.set_mapping(make_action("other", NAMES[2]))
+    right.set_mapping(make_action("right", NAMES[3]))
+    left.remove_mapping_by_key(MappingKey("other"))
+
+    assert history.rollback()
+    assert (left.configured_actions, right.configured_actions) == snapshot
+    assert left.configured_actions[kept.key] is kept
+    assert not history.has_pending
+    assert not history.rollback()
+    assert len(history) == 1
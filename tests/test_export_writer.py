@@ -0,0 +1,205 @@
+import os
+import stat
+import threading
+from pathlib import Path
+from typing import List, TextIO
+
+import pytest
+
+from app.io import WriteBehindExporter, atomic_write
+
+
+def write_text(data: str, handle: TextIO) -> None:
+    handle.write(data)
+
+
+def test_atomic_write_replaces_file_without_leftovers(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+    destination.write_text("old")
+
+    atomic_write(destination, lambda handle: handle.write("new"))
+
+    assert destination.read_text() == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["export.xml"]
+
+
+def test_atomic_write_keeps_previous_file_when_serializer_fails(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+    destination.write_text("old")
+
+    def broken(handle: TextIO) -> None:
+        handle.write("partial")
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        atomic_write(destination, broken)
+
+    assert destination.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["export.xml"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+def test_atomic_write_keeps_permissions_of_replaced_file(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+    destination.write_text("old")
+    destination.chmod(0o640)
+
+    atomic_write(destination, lambda handle: handle.write("new"))
+
+    assert stat.S_IMODE(destination.stat().st_mode) == 0o640
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+def test_atomic_write_creates_file_with_default_permissions(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    destination = tmp_path / "export.xml"
+    reference = tmp_path / "reference.xml"
+    reference.write_text("plain open")
+    # The umask is process-wide; changing it on a worker thread affects other threads
+    monkeypatch.setattr(os, "umask", lambda mask: pytest.fail("umask changed"))
+
+    atomic_write(destination, lambda handle: handle.write("new"))
+
+    assert stat.S_IMODE(destination.stat().st_mode) == stat.S_IMODE(reference.stat().st_mode)
+
+
+def test_atomic_write_newline_controls_translation(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+
+    atomic_write(destination, lambda handle: handle.write("a\r\nb\n"), newline="")
+    assert destination.read_bytes() == b"a\r\nb\n"
+
+    atomic_write(destination, lambda handle: handle.write("a\n"))
+    assert destination.read_bytes() == f"a{os.linesep}".encode()
+
+
+def test_exporter_coalesces_burst_into_single_write(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+    exporter: WriteBehindExporter[str] = WriteBehindExporter(
+        destination, write_text, quiet_period=10.0
+    )
+
+    for index in range(20):
+        exporter.submit(f"edit {index}")
+    assert exporter.flush(timeout=5)
+
+    assert destination.read_text() == "edit 19"
+    assert exporter.write_count == 1
+    exporter.shutdown()
+
+
+def test_exporter_writes_after_quiet_period(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+    written = threading.Event()
+    calls: List[str] = []
+
+    def serializer(data: str, handle: TextIO) -> None:
+        calls.append(data)
+        handle.write(data)
+        written.set()
+
+    exporter: WriteBehindExporter[str] = WriteBehindExporter(
+        destination, serializer, quiet_period=0.01
+    )
+    exporter.submit("first")
+
+    assert written.wait(timeout=5)
+    exporter.shutdown()
+    assert calls == ["first"]
+    assert destination.read_text() == "first"
+
+
+def test_shutdown_flushes_pending_and_rejects_new_work(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+    exporter: WriteBehindExporter[str] = WriteBehindExporter(
+        destination, write_text, quiet_period=10.0
+    )
+    exporter.submit("pending")
+
+    exporter.shutdown(timeout=5)
+
+    assert destination.read_text() == "pending"
+    with pytest.raises(RuntimeError):
+        exporter.submit("too late")
+
+
+def test_failed_write_is_recorded_and_does_not_stop_worker(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+
+    def serializer(data: str, handle: TextIO) -> None:
+        if data == "bad":
+            raise ValueError("cannot serialise")
+        handle.write(data)
+
+    exporter: WriteBehindExporter[str] = WriteBehindExporter(
+        destination, serializer, quiet_period=10.0
+    )
+    exporter.submit("bad")
+    exporter.flush(timeout=5)
+    assert isinstance(exporter.last_error, ValueError)
+    assert not destination.exists()
+
+    exporter.submit("good")
+    exporter.flush(timeout=5)
+    exporter.shutdown()
+    assert exporter.last_error is None
+    assert destination.read_text() == "good"
+
+
+def test_exporter_skips_snapshot_matching_written_fingerprint(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+    exporter: WriteBehindExporter[str] = WriteBehindExporter(
+        destination, write_text, quiet_period=10.0
+    )
+    assert exporter.submit("content", fingerprint=1)
+    assert exporter.flush(timeout=5)
+
+    assert not exporter.submit("content again", fingerprint=1)
+    assert exporter.flush(timeout=5)
+    exporter.shutdown()
+
+    assert destination.read_text() == "content"
+    assert exporter.write_count == 1
+    assert exporter.skipped_count == 1
+
+
+def test_exporter_drops_burst_that_returns_to_written_content(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+    exporter: WriteBehindExporter[str] = WriteBehindExporter(
+        destination, write_text, quiet_period=10.0
+    )
+    exporter.submit("original", fingerprint=1)
+    exporter.flush(timeout=5)
+
+    assert exporter.submit("edited", fingerprint=2)
+    assert exporter.submit("original", fingerprint=1)
+    assert exporter.flush(timeout=5)
+    exporter.shutdown()
+
+    assert destination.read_text() == "original"
+    assert exporter.write_count == 1
+    assert exporter.target_fingerprint == 1
+
+
+def test_exporter_rewrites_after_failed_write(tmp_path: Path) -> None:
+    destination = tmp_path / "export.xml"
+    fail = True
+
+    def serializer(data: str, handle: TextIO) -> None:
+        if fail:
+            raise OSError("disk full")
+        handle.write(data)
+
+    exporter: WriteBehindExporter[str] = WriteBehindExporter(
+        destination, serializer, quiet_period=10.0
+    )
+    exporter.submit("content", fingerprint=1)
+    exporter.flush(timeout=5)
+    assert exporter.target_fingerprint is None
+
+    fail = False
+    assert exporter.submit("content", fingerprint=1)
+    exporter.flush(timeout=5)
+    exporter.shutdown()
+    assert destination.read_text() == "content"
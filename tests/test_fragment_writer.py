@@ -0,0 +1,74 @@
+import io
+import itertools
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from app.io import ActionFragmentWriter
+from app.models.joystick import JoyAction, JoyStickButton
+
+BUTTON = JoyStickButton(
+    name="button3", sc_config_name="button3", coord_x_left={"left": 0, "right": 0}, coord_y_top=0
+)
+
+
+def make_action(name: str, *, modifier: bool = False, multitap: bool = False) -> JoyAction:
+    return JoyAction(
+        name=name,
+        input="js1_button3",
+        category="Vehicles",
+        sub_category="spaceship_weapons",
+        modifier=modifier,
+        multitap=multitap,
+        button=BUTTON,
+    )
+
+
+def element_tree_xml(action: JoyAction, modifier_key: str) -> str:
+    """Reference rendering matching the original per-action ``to_xml``."""
+    element = ET.Element("action", attrib={"name": action.name})
+    input_value = action.input
+    if action.modifier:
+        js_part, button_part = action.input.split("_", 1)
+        input_value = f"{js_part}_{modifier_key}+{button_part}"
+    attrib = {"input": input_value}
+    if action.multitap:
+        attrib["multiTap"] = "2"
+    ET.SubElement(element, "rebind", attrib=attrib)
+    return ET.tostring(element, encoding="unicode")
+
+
+@pytest.mark.parametrize("modifier, multitap", itertools.product([False, True], repeat=2))
+@pytest.mark.parametrize("name", ["v_attack1", 'odd<&>"\tname'])
+@pytest.mark.parametrize("modifier_key", ["rctrl", '100%s%%"&'])
+def test_fragments_match_element_tree(
+    name: str, modifier: bool, multitap: bool, modifier_key: str
+) -> None:
+    action = make_action(name, modifier=modifier, multitap=multitap)
+    writer = ActionFragmentWriter(modifier_key)
+
+    assert writer.render_action(action) == element_tree_xml(action, modifier_key)
+    assert action.to_xml(modifier_key) == element_tree_xml(action, modifier_key)
+
+
+def test_write_profile_groups_actions_by_section() -> None:
+    first = make_action("v_attack1")
+    second = make_action("v_attack2", modifier=True)
+    other = first.model_copy(update={"name": "v_ifcs_toggle", "sub_category": "spaceship_movement"})
+    writer = ActionFragmentWriter("lalt")
+    buffer = io.StringIO()
+
+    writer.write_profile([first, other, second], buffer)
+
+    root = ET.fromstring(f"<root>{buffer.getvalue()}</root>")
+    sections = {
+        actionmap.get("name"): [action.get("name") for action in actionmap]
+        for actionmap in root
+    }
+    assert sections == {
+        "spaceship_weapons": ["v_attack1", "v_attack2"],
+        "spaceship_movement": ["v_ifcs_toggle"],
+    }
+    assert root.find("./actionmap/action[@name='v_attack2']/rebind").get("input") == (
+        "js1_lalt+button3"
+    )
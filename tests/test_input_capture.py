@@ -0,0 +1,142 @@
+import threading
+from typing import List
+
+from app.services import CapturedInput, InputCaptureService
+from app.services.input_capture import slot_for_event
+from app.utils.devices import InputEvent, ScriptedInputBackend
+
+STICK = "VKBsim Gladiator EVO R"
+
+
+class Recorder:
+    def __init__(self, expected: int) -> None:
+        self.captured: List[CapturedInput] = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def __call__(self, captured: CapturedInput) -> None:
+        self.captured.append(captured)
+        if len(self.captured) >= self.expected:
+            self.done.set()
+
+    @property
+    def slots(self) -> List[str]:
+        return [captured.slot for captured in self.captured]
+
+
+def event(kind: str, index: int, value: object) -> InputEvent:
+    return InputEvent(0, STICK, kind, index, value, 0.0)  # type: ignore[arg-type]
+
+
+def test_slot_for_event_names_match_layout() -> None:
+    assert slot_for_event(event("button", 0, 1)) == "button1"
+    assert slot_for_event(event("button", 0, 0)) is None
+    assert slot_for_event(event("hat", 0, (1, 1))) == "hat1_up_right"
+    assert slot_for_event(event("hat", 0, (0, -1))) == "hat1_down"
+    assert slot_for_event(event("hat", 0, (0, 0))) is None
+    assert slot_for_event(event("axis", 5, 0.9)) == "rotz"
+
+
+def test_scripted_presses_reach_listener_in_order() -> None:
+    backend = ScriptedInputBackend()
+    service = InputCaptureService(backend, poll_interval=0.01)
+    recorder = Recorder(expected=3)
+    service.add_listener(recorder)
+    service.start()
+
+    backend.press(1, STICK, "button", 2)
+    backend.press(1, STICK, "button", 2, 0)
+    backend.press(1, STICK, "hat", 0, (-1, 0))
+    backend.press(1, STICK, "button", 28)
+
+    assert recorder.done.wait(timeout=5)
+    service.stop(timeout=5)
+    assert recorder.slots == ["button3", "hat1_left", "button29"]
+    assert all(captured.instance == 1 for captured in recorder.captured)
+    assert not backend.opened
+
+
+def test_axis_reports_once_per_deflection() -> None:
+    backend = ScriptedInputBackend()
+    service = InputCaptureService(backend, poll_interval=0.01, axis_threshold=0.5)
+    recorder = Recorder(expected=2)
+    service.add_listener(recorder)
+    service.start()
+
+    # Throttle resting at -1: small jitter is ignored, a push reports once, and
+    # it is re-armed only after returning near rest
+    for value in (-1.0, -0.9, -0.2, 0.5, 1.0, 0.2, -0.9, 0.0):
+        backend.press(0, STICK, "axis", 2, value)
+
+    assert recorder.done.wait(timeout=5)
+    service.stop(timeout=5)
+    assert recorder.slots == ["z", "z"]
+
+
+def test_capture_can_be_restarted() -> None:
+    backend = ScriptedInputBackend()
+    service = InputCaptureService(backend, poll_interval=0.01)
+    recorder = Recorder(expected=1)
+    service.add_listener(recorder)
+
+    service.start()
+    service.stop(timeout=5)
+    assert not service.running
+
+    service.start()
+    backend.press(0, STICK, "button", 0)
+    assert recorder.done.wait(timeout=5)
+    service.stop(timeout=5)
+    assert recorder.slots == ["button1"]
+
+
+def test_restart_waits_for_a_worker_that_did_not_stop_in_time() -> None:
+    class SlowBackend(ScriptedInputBackend):
+        def __init__(self) -> None:
+            super().__init__()
+            self.release = threading.Event()
+            self.reading = threading.Semaphore(0)
+            self.readers = 0
+            self.max_readers = 0
+
+        def read_events(self, timeout: float) -> List[InputEvent]:
+            with self._condition:
+                self.readers += 1
+                self.max_readers = max(self.max_readers, self.readers)
+            self.reading.release()
+            try:
+                self.release.wait(5)
+                return super().read_events(timeout)
+            finally:
+                with self._condition:
+                    self.readers -= 1
+
+    backend = SlowBackend()
+    service = InputCaptureService(backend, poll_interval=0.01)
+    recorder = Recorder(expected=1)
+    service.add_listener(recorder)
+    service.start()
+    assert backend.reading.acquire(timeout=5)
+
+    service.stop(timeout=0.01)
+    service.start()
+    assert not backend.reading.acquire(timeout=0.1)
+    backend.release.set()
+    backend.press(0, STICK, "button", 0)
+
+    assert recorder.done.wait(timeout=5)
+    service.stop(timeout=5)
+    assert backend.max_readers == 1
+    assert recorder.slots == ["button1"]
+
+
+def test_backend_failure_is_recorded() -> None:
+    class BrokenBackend(ScriptedInputBackend):
+        def open(self) -> None:
+            raise OSError("no joystick subsystem")
+
+    service = InputCaptureService(BrokenBackend(), poll_interval=0.01)
+    service.start()
+    service.stop(timeout=5)
+
+    assert isinstance(service.last_error, OSError)
@@ -0,0 +1,191 @@
+import json
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.joystick import (
+    BUTTON_REGISTRY,
+    JoyAction,
+    JoystickConfig,
+    MappingKey,
+    get_joystick_buttons,
+)
+from app.models.mapping_builder import MappingBuilder
+
+BUTTONS = get_joystick_buttons("VKB Default")
+NAMES = list(BUTTONS)
+
+
+def make_action(
+    name: str, button: str, *, modifier: bool = False, multitap: bool = False, hold: bool = False
+) -> JoyAction:
+    return JoyAction(
+        name=name,
+        input=f"js1_{BUTTONS[button].sc_config_name}",
+        category="Vehicles",
+        sub_category="spaceship_weapons",
+        modifier=modifier,
+        multitap=multitap,
+        hold=hold,
+        button=BUTTONS[button],
+    )
+
+
+def scan_button(config: JoystickConfig, button: str) -> dict[str, JoyAction]:
+    return {
+        key: action
+        for key, action in config.configured_actions.items()
+        if action.button.name == button
+    }
+
+
+def test_indexes_match_a_full_scan_after_random_edits() -> None:
+    config = JoystickConfig(side="left", configured_actions={})
+    rng = random.Random(11)
+    for step in range(2000):
+        flags = {key: rng.random() < 0.5 for key in ("modifier", "multitap", "hold")}
+        action = make_action(f"action_{rng.randrange(60)}", rng.choice(NAMES), **flags)
+        operation = rng.randrange(5)
+        if operation < 2:
+            config.set_mapping(action)
+        elif operation == 2:
+            config.remove_mapping_by_key(action.key)
+        elif operation == 3:
+            config.unbind_action(action.name)
+        elif step % 400 == 0:
+            config.clear_mappings()
+
+        button = rng.choice(NAMES)
+        assert config.get_all_actions_for_button_no_filter(button) == scan_button(config, button)
+        assert config.get_actions_for_button(button, **flags) == {
+            key: found
+            for key, found in scan_button(config, button).items()
+            if (found.modifier, found.multitap, found.hold)
+            == (flags["modifier"], flags["multitap"], flags["hold"])
+        }
+        assert config.has_action(action.name) == any(
+            found.name == action.name for found in config.configured_actions.values()
+        )
+
+
+def test_indexes_follow_a_replaced_mapping_dict() -> None:
+    config = JoystickConfig(side="left", configured_actions={})
+    config.set_mapping(make_action("v_eject", "button1"))
+    moved = make_action("v_exit", "button2")
+
+    config.configured_actions = {moved.key: moved}
+
+    assert config.get_all_actions_for_button_no_filter("button1") == {}
+    assert config.get_all_actions_for_button_no_filter("button2") == {moved.key: moved}
+    config.unbind_action("v_exit")
+    assert config.configured_actions == {}
+
+
+class ScannableActions(dict):
+    """``configured_actions`` whose iteration a test can make fail."""
+
+
+def test_button_queries_do_not_scan_all_mappings(monkeypatch: pytest.MonkeyPatch) -> None:
+    config = JoystickConfig.model_construct(side="left", configured_actions=ScannableActions())
+    others = [name for name in NAMES if name != "button1"]
+    for index in range(200):
+        config.set_mapping(make_action(f"action_{index}", others[index % len(others)]))
+    lonely = make_action("lonely", "button1", hold=True)
+    config.set_mapping(lonely)
+    assert config.has_action("lonely")
+
+    def fail(*_args: object) -> None:
+        raise AssertionError("configured_actions was scanned")
+
+    for method in ("__iter__", "keys", "values", "items"):
+        monkeypatch.setattr(ScannableActions, method, fail)
+
+    assert config.get_actions_for_button("button1", False, False, hold=True) == {lonely.key: lonely}
+    assert config.get_actions_for_button("button1", False, False) == {}
+    assert config.has_action("lonely") and not config.has_action("missing")
+
+
+def test_mapping_builder_keeps_one_binding_per_action() -> None:
+    left = JoystickConfig(side="left", configured_actions={})
+    right = JoystickConfig(side="right", configured_actions={})
+    left.set_mapping(make_action("stale", "button9"))
+    left.start_journal()
+    builder = MappingBuilder()
+
+    builder.bind("left", make_action("v_eject", "button1"))
+    builder.bind("right", make_action("v_eject", "button2", modifier=True))
+    builder.put("left", make_action("v_exit", "button3"))
+    builder.put("right", make_action("v_exit", "button4", hold=True))
+    builder.install(left, right)
+
+    assert [action.button.name for action in left.configured_actions.values()] == ["button3"]
+    assert sorted(action.button.name for action in right.configured_actions.values()) == [
+        "button2",
+        "button4",
+    ]
+    assert not left.is_slot_free("button3")
+    assert left.is_slot_free("button9")
+    assert left.has_action("v_exit") and not left.has_action("stale")
+    journal = left.take_journal()
+    assert journal[MappingKey("stale")][1] is None
+    assert journal[MappingKey("v_exit")][0] is None
+
+
+def test_mapping_builder_accepts_any_device_role() -> None:
+    throttle = JoystickConfig(side="throttle", configured_actions={})
+    pedals = JoystickConfig(side="pedals", configured_actions={})
+    pedals.set_mapping(make_action("stale", "button9"))
+    builder = MappingBuilder.from_configs(throttle)
+
+    builder.bind("throttle", make_action("v_eject", "button1"))
+    builder.bind("pedals", make_action("v_eject", "button2"))
+    builder.install(throttle, pedals)
+
+    assert throttle.configured_actions == {}
+    assert [action.button.name for action in pedals.configured_actions.values()] == ["button2"]
+
+
+def test_config_json_round_trips_and_migrates_string_keys() -> None:
+    config = JoystickConfig(side="left", configured_actions={})
+    config.set_mapping(make_action("v_ifcs-toggle", "button1", modifier=True))
+    config.set_mapping(make_action("v_eject", "button2", hold=True))
+
+    restored = JoystickConfig.model_validate(json.loads(json.dumps(config.model_dump())))
+    legacy = JoystickConfig.model_validate(
+        {
+            "side": "left",
+            "configured_actions": {
+                f"{action.name}-{action.modifier}-{action.multitap}-{action.hold}": (
+                    action.model_dump()
+                )
+                for action in config.configured_actions.values()
+            },
+        }
+    )
+
+    assert restored.configured_actions == config.configured_actions
+    assert legacy.configured_actions == config.configured_actions
+    assert MappingKey("v_ifcs-toggle", modifier=True) in legacy.configured_actions
+    assert legacy.get_configured_button("v_eject", hold=True).button.name == "button2"
+
+
+def test_buttons_are_shared_and_saved_by_id() -> None:
+    config = JoystickConfig(side="left", configured_actions={})
+    config.set_mapping(make_action("v_eject", "button3"))
+    embedded = make_action("v_exit", "button3").model_dump() | {
+        "button": BUTTONS["button3"].model_dump()
+    }
+
+    saved = json.loads(json.dumps(config.model_dump()))
+    restored = JoystickConfig.model_validate(saved)
+
+    assert get_joystick_buttons("VKB Default")["button3"] is BUTTONS["button3"]
+    assert saved["configured_actions"][0]["button"] == "VKB Default/button3"
+    assert restored.get_configured_button("v_eject").button is BUTTONS["button3"]
+    interned = JoyAction.model_validate(embedded).button
+    assert interned == BUTTONS["button3"] and BUTTON_REGISTRY.id_of(interned) is not None
+    with pytest.raises(ValidationError):
+        BUTTONS["button3"].coord_y_top = 0
+    with pytest.raises(ValidationError):
+        JoyAction.model_validate(saved["configured_actions"][0] | {"button": "VKB Default/nope"})
@@ -0,0 +1,70 @@
+import itertools
+import statistics
+
+from app.domain import ActionIdentifier, Binding, ControlProfile, InputSlot
+from app.models.joystick import get_joystick_buttons
+from app.services import BindingPlanner, BindingPlannerContext, LayoutSolver, layout_candidates
+
+BUTTONS = list(get_joystick_buttons("VKB Default").values())
+
+
+def make_planner(*bindings: Binding) -> BindingPlanner:
+    profile = ControlProfile.from_bindings("test", bindings)
+    return BindingPlanner(BindingPlannerContext(default_profile=profile))
+
+
+def make_actions(category: str, count: int) -> list[ActionIdentifier]:
+    return [
+        ActionIdentifier.intern(f"{category}_{index}", "vehicles", category)
+        for index in range(count)
+    ]
+
+
+def test_solver_places_thirty_actions_without_conflicts() -> None:
+    occupied = Binding(
+        action=ActionIdentifier.intern("v_attack1", "vehicles", "spaceship_weapons"),
+        slot=InputSlot.intern("js1", "left", BUTTONS[0].sc_config_name),
+    )
+    planner = make_planner(occupied)
+    actions = make_actions("mining", 12) + make_actions("salvage", 10) + make_actions("scanning", 8)
+    candidates = layout_candidates(BUTTONS, "js1", "left")
+
+    solution = LayoutSolver(planner, time_budget=0.5).solve(actions, candidates)
+
+    assert not solution.unassigned
+    assert not solution.report.has_errors
+    assert len({binding.slot for binding in solution.bindings}) == 30
+    assert occupied.slot not in {binding.slot for binding in solution.bindings}
+
+
+def test_solver_keeps_categories_closer_than_an_arbitrary_layout() -> None:
+    planner = make_planner()
+    actions = make_actions("mining", 6) + make_actions("salvage", 6)
+    candidates = layout_candidates(BUTTONS, "js1", "left")
+    by_slot = {candidate.slot: candidate for candidate in candidates}
+
+    solution = LayoutSolver(planner).solve(actions, candidates)
+
+    def spread(slots: list) -> float:
+        return statistics.mean(
+            by_slot[a].distance(by_slot[b]) for a, b in itertools.combinations(slots, 2)
+        )
+
+    for category in ("mining", "salvage"):
+        placed = [b.slot for b in solution.bindings if b.action.sub_category == category]
+        assert spread(placed) < spread([c.slot for c in candidates[: len(placed) * 4 : 4]])
+
+
+def test_solver_reports_actions_it_cannot_place() -> None:
+    bound = Binding(
+        action=ActionIdentifier.intern("mining_0", "vehicles", "mining"),
+        slot=InputSlot.intern("js2", "right", "button1"),
+    )
+    planner = make_planner(bound)
+    candidates = layout_candidates(BUTTONS[:2], "js1", "left")
+
+    solution = LayoutSolver(planner).solve(make_actions("mining", 4), candidates)
+
+    assert [action.name for action in solution.unassigned][0] == "mining_0"
+    assert len(solution.bindings) == 2
+    assert len(solution.unassigned) == 2
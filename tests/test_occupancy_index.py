@@ -0,0 +1,223 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from app.domain import (
+    ActionIdentifier,
+    Binding,
+    BindingPlan,
+    ControlProfile,
+    InputSlot,
+    ValidationIssue,
+    ValidationReport,
+)
+from app.services import BindingPlanner, BindingPlannerContext, SlotOccupancyIndex
+
+bindings_strategy = st.builds(
+    lambda name, device, side, slot, modifier, hold, multitap: Binding(
+        action=ActionIdentifier(name=name, main_category="mc", sub_category="sc"),
+        slot=InputSlot(device_uid=device, side=side, slot_id=slot),
+        modifier=modifier,
+        hold=hold,
+        multitap=multitap,
+    ),
+    st.sampled_from(["fire", "boost", "lock", "scan"]),
+    st.sampled_from(["js1", "js2"]),
+    st.sampled_from(["left", "right"]),
+    st.sampled_from(["button1", "button2", "button3"]),
+    st.booleans(),
+    st.booleans(),
+    st.booleans(),
+)
+binding_lists = st.lists(bindings_strategy, max_size=12)
+
+
+def make_profile(bindings: List[Binding]) -> ControlProfile:
+    return ControlProfile.from_bindings("test", bindings)
+
+
+def make_plan(to_add: List[Binding], to_remove: List[Binding]) -> BindingPlan:
+    return BindingPlan(to_add=list(to_add), to_remove=list(to_remove))
+
+
+def rebuild_validate(
+    default_profile: Optional[ControlProfile], plan: BindingPlan
+) -> ValidationReport:
+    """The original full-rebuild validation, kept as the reference behaviour."""
+    report = ValidationReport()
+    if not plan.to_add and not plan.to_remove:
+        report.add(ValidationIssue(level="info", message="No binding changes detected."))
+        return report
+
+    def slot_key(binding: Binding) -> Tuple[str, str, str]:
+        return binding.slot.device_uid, binding.slot.side, binding.slot.slot_id
+
+    occupancy: Dict[Tuple[str, str, str], List[Binding]] = defaultdict(list)
+    if default_profile is not None:
+        for binding in default_profile.iter_bindings():
+            occupancy[slot_key(binding)].append(binding)
+    for binding in plan.to_remove:
+        key = slot_key(binding)
+        if key not in occupancy:
+            continue
+        remaining = [existing for existing in occupancy[key] if existing.key != binding.key]
+        if remaining:
+            occupancy[key] = remaining
+        else:
+            occupancy.pop(key)
+
+    additions_by_slot: Dict[Tuple[str, str, str], List[Binding]] = defaultdict(list)
+    for binding in plan.to_add:
+        additions_by_slot[slot_key(binding)].append(binding)
+
+    for key, bindings in additions_by_slot.items():
+        slot_desc = f"{key[0]}:{key[2]}"
+        actions_list = ", ".join(sorted({binding.action.name for binding in bindings}))
+        if len(bindings) > 1:
+            if len({binding.modifier for binding in bindings}) > 1:
+                message = (
+                    f"Modifier conflict: slot {slot_desc} receives both modifier and "
+                    f"non-modifier bindings ({actions_list})."
+                )
+            else:
+                message = (
+                    f"Duplicate slot assignment: slot {slot_desc} receives multiple "
+                    f"bindings ({actions_list})."
+                )
+            report.add(ValidationIssue(level="error", message=message, slot=bindings[0].slot))
+        existing_bindings = occupancy.get(key, [])
+        if existing_bindings:
+            existing_actions = ", ".join(sorted({b.action.name for b in existing_bindings}))
+            existing_modifiers = {b.modifier for b in existing_bindings}
+            addition_modifiers = {b.modifier for b in bindings}
+            reason = (
+                "modifier conflict" if existing_modifiers ^ addition_modifiers else "slot already mapped"
+            )
+            report.add(
+                ValidationIssue(
+                    level="error",
+                    message=(
+                        f"{reason.capitalize()}: slot {slot_desc} currently mapped to "
+                        f"{existing_actions}; cannot add {actions_list}."
+                    ),
+                    slot=bindings[0].slot,
+                )
+            )
+    return report
+
+
+@settings(max_examples=200, deadline=None)
+@given(binding_lists, binding_lists, binding_lists)
+def test_indexed_validation_matches_full_rebuild(
+    profile_bindings: List[Binding], to_add: List[Binding], to_remove: List[Binding]
+) -> None:
+    profile = make_profile(profile_bindings)
+    planner = BindingPlanner(BindingPlannerContext(default_profile=profile))
+
+    report = planner.validate_plan(make_plan(to_add, to_remove))
+
+    assert report == rebuild_validate(profile, make_plan(to_add, to_remove))
+
+
+@settings(max_examples=100, deadline=None)
+@given(binding_lists, st.lists(st.tuples(binding_lists, binding_lists), max_size=5), binding_lists)
+def test_index_stays_consistent_across_applied_plans(
+    profile_bindings: List[Binding],
+    applied: List[Tuple[List[Binding], List[Binding]]],
+    probe: List[Binding],
+) -> None:
+    context = BindingPlannerContext(default_profile=make_profile(profile_bindings))
+    planner = BindingPlanner(context)
+
+    for to_add, to_remove in applied:
+        planner.apply_plan(make_plan(to_add, to_remove))
+        assert planner.validate_plan(make_plan(probe, [])) == rebuild_validate(
+            context.default_profile, make_plan(probe, [])
+        )
+
+
+def test_validation_does_not_rescan_profile(monkeypatch: pytest.MonkeyPatch) -> None:
+    binding = Binding(
+        action=ActionIdentifier(name="fire", main_category="mc", sub_category="sc"),
+        slot=InputSlot(device_uid="js1", side="left", slot_id="button1"),
+    )
+    profile = make_profile([binding])
+    planner = BindingPlanner(BindingPlannerContext(default_profile=profile))
+    planner.validate_plan(make_plan([binding], []))
+
+    def fail() -> None:
+        raise AssertionError("profile was rescanned")
+
+    monkeypatch.setattr(profile, "iter_bindings", fail)
+    planner.apply_plan(make_plan([], [binding]))
+    report = planner.validate_plan(make_plan([binding], []))
+
+    assert not report.has_errors
+    assert len(planner.occupancy) == 0
+
+
+def test_index_rebuilds_when_profile_is_replaced_or_mutated() -> None:
+    binding = Binding(
+        action=ActionIdentifier(name="fire", main_category="mc", sub_category="sc"),
+        slot=InputSlot(device_uid="js1", side="left", slot_id="button1"),
+    )
+    context = BindingPlannerContext(default_profile=make_profile([]))
+    planner = BindingPlanner(context)
+    assert len(planner.occupancy) == 0
+
+    context.default_profile.add(binding)
+    assert ("js1", "left", "button1") in planner.occupancy
+
+    context.default_profile = make_profile([])
+    assert len(planner.occupancy) == 0
+    assert isinstance(planner.occupancy, SlotOccupancyIndex)
+
+
+def test_frozen_index_rejects_changes() -> None:
+    binding = Binding(
+        action=ActionIdentifier(name="fire", main_category="mc", sub_category="sc"),
+        slot=InputSlot(device_uid="js1", side="left", slot_id="button1"),
+    )
+    index = SlotOccupancyIndex.from_bindings([binding])
+    snapshot = index.frozen()
+    index.remove(binding)
+
+    assert ("js1", "left", "button1") in snapshot
+    assert snapshot.frozen() is snapshot
+    with pytest.raises(RuntimeError):
+        snapshot.add(binding)
+
+
+@settings(max_examples=50, deadline=None)
+@given(binding_lists, st.lists(st.tuples(binding_lists, binding_lists), max_size=8))
+def test_candidate_reports_match_individual_validation(
+    profile_bindings: List[Binding], candidates: List[Tuple[List[Binding], List[Binding]]]
+) -> None:
+    profile = make_profile(profile_bindings)
+    planner = BindingPlanner(BindingPlannerContext(default_profile=profile))
+
+    reports = planner.validate_candidates([make_plan(a, r) for a, r in candidates])
+
+    assert reports == [rebuild_validate(profile, make_plan(a, r)) for a, r in candidates]
+
+
+def test_candidates_are_validated_in_worker_processes() -> None:
+    occupied = Binding(
+        action=ActionIdentifier(name="fire", main_category="mc", sub_category="sc"),
+        slot=InputSlot(device_uid="js1", side="left", slot_id="button1"),
+    )
+    planner = BindingPlanner(BindingPlannerContext(default_profile=make_profile([occupied])))
+    action = ActionIdentifier.intern("boost", "mc", "sc")
+    slots = [InputSlot.intern("js1", "left", f"button{index}") for index in range(40)]
+    plans = [make_plan([Binding(action=action, slot=slot)], []) for slot in slots]
+
+    parallel = planner.validate_candidates(plans, max_workers=2, parallel_threshold=1)
+
+    assert parallel == planner.validate_candidates(plans)
+    assert [slot.slot_id for slot, report in zip(slots, parallel) if report.has_errors] == [
+        "button1"
+    ]
+    assert planner.slots_accepting(action, slots) == slots[:1] + slots[2:]
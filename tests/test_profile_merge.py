@@ -0,0 +1,186 @@
+from pathlib import Path
+
+from app.domain import ActionIdentifier, Binding, ControlProfile, InputSlot
+from app.domain.models import FINGERPRINT_MASK
+from app.io import ActionMapsRepository
+from app.services import ConflictEngine, ProfileMerger, combine_sides
+
+
+def make_binding(
+    name: str,
+    slot_id: str,
+    *,
+    side: str = "left",
+    device: str = "js1",
+    modifier: bool = False,
+    sub_category: str = "spaceship_general",
+) -> Binding:
+    return Binding(
+        action=ActionIdentifier(name=name, main_category=sub_category, sub_category=sub_category),
+        slot=InputSlot(device_uid=device, side=side, slot_id=slot_id),
+        modifier=modifier,
+    )
+
+
+def make_profile(name: str, bindings: list[Binding]) -> ControlProfile:
+    return ControlProfile.from_bindings(name, bindings)
+
+
+def slots_by_action(profile: ControlProfile) -> dict[str, set[str]]:
+    slots: dict[str, set[str]] = {}
+    for binding in profile.iter_bindings():
+        slots.setdefault(binding.action.name, set()).add(binding.slot.slot_id)
+    return slots
+
+
+def test_non_overlapping_changes_are_combined() -> None:
+    base = make_profile(
+        "base", [make_binding("v_eject", "button1"), make_binding("v_flightready", "button2")]
+    )
+    mine = make_profile(
+        "mine",
+        [
+            make_binding("v_eject", "button1"),
+            make_binding("v_flightready", "button2"),
+            make_binding("v_toggle_landing_system", "button3"),
+        ],
+    )
+    theirs = make_profile("theirs", [make_binding("v_eject", "button1")])
+
+    result = ProfileMerger().merge(base, mine, theirs)
+
+    assert result.conflicts == 0
+    assert result.report.issues == []
+    assert slots_by_action(result.profile) == {
+        "v_eject": {"button1"},
+        "v_toggle_landing_system": {"button3"},
+    }
+
+
+def test_action_moved_on_both_sides_keeps_preferred_side() -> None:
+    base = make_profile("base", [make_binding("v_eject", "button1")])
+    mine = make_profile("mine", [make_binding("v_eject", "button4")])
+    theirs = make_profile("theirs", [make_binding("v_eject", "button5")])
+
+    mine_wins = ProfileMerger().merge(base, mine, theirs)
+    theirs_wins = ProfileMerger(prefer="theirs").merge(base, mine, theirs)
+
+    assert slots_by_action(mine_wins.profile) == {"v_eject": {"button4"}}
+    assert slots_by_action(theirs_wins.profile) == {"v_eject": {"button5"}}
+    assert mine_wins.conflicts == theirs_wins.conflicts == 1
+    assert "v_eject was rebound in both profiles" in mine_wins.report.issues[0].message
+
+
+def test_same_key_changed_differently_is_a_conflict() -> None:
+    base = make_profile("base", [make_binding("v_eject", "button1")])
+    mine = make_profile(
+        "mine", [make_binding("v_eject", "button1", sub_category="spaceship_defensive")]
+    )
+    theirs = make_profile("theirs", [])
+
+    result = ProfileMerger().merge(base, mine, theirs)
+
+    assert result.conflicts == 1
+    assert [binding.action.sub_category for binding in result.profile.iter_bindings()] == [
+        "spaceship_defensive"
+    ]
+    assert "js1:button1 in mine and unbound in theirs" in result.report.issues[0].message
+
+
+def test_conflict_engine_reports_only_issues_introduced_by_the_merge() -> None:
+    base = make_profile("base", [])
+    mine = make_profile("mine", [make_binding("v_eject", "button1")])
+    theirs = make_profile(
+        "theirs", [make_binding("v_eject", "button2", side="right", device="js2")]
+    )
+
+    result = ProfileMerger(conflict_engine=ConflictEngine()).merge(base, mine, theirs)
+
+    assert result.conflicts == 0
+    assert result.report.has_errors
+    assert any("bound on both sticks" in issue.message for issue in result.report.issues)
+
+
+EIGHT_DEVICES = ("left", "right", "throttle", "pedals", "panel", "collective", "mfd1", "mfd2")
+
+
+def test_merge_keeps_eight_devices_apart() -> None:
+    def on_device(index: int, slot_id: str = "button1") -> Binding:
+        return make_binding("v_eject", slot_id, side=EIGHT_DEVICES[index], device=f"js{index + 1}")
+
+    base = make_profile("base", [on_device(index) for index in range(8)])
+    mine = make_profile(
+        "mine", [on_device(index, "button2" if index == 2 else "button1") for index in range(8)]
+    )
+    theirs = make_profile("theirs", [on_device(index) for index in range(8) if index != 6])
+
+    result = ProfileMerger().merge(base, mine, theirs)
+
+    assert result.conflicts == 0
+    assert {
+        device_uid: [binding.slot.slot_id for binding in bindings.bindings.values()]
+        for device_uid, bindings in result.profile.devices.items()
+    } == {
+        f"js{index + 1}": ["button2" if index == 2 else "button1"]
+        for index in range(8)
+        if index != 6
+    }
+    assert [bindings.side for bindings in result.profile.devices.values()] == [
+        side for index, side in enumerate(EIGHT_DEVICES) if index != 6
+    ]
+
+
+def test_combine_sides_takes_one_stick_from_each_profile() -> None:
+    first = make_profile(
+        "first",
+        [
+            make_binding("v_eject", "button1"),
+            make_binding("v_flightready", "button2", side="right", device="js2"),
+        ],
+    )
+    second = make_profile("second", [make_binding("v_exit", "button9", side="right", device="js2")])
+
+    combined = combine_sides(first, second, "combined")
+
+    assert combined.devices["js1"].bindings == first.devices["js1"].bindings
+    assert combined.devices["js2"].bindings == second.devices["js2"].bindings
+    assert (
+        combined.fingerprint
+        == (first.devices["js1"].fingerprint + second.devices["js2"].fingerprint) & FINGERPRINT_MASK
+    )
+
+
+def test_merge_folders_loads_merges_and_exports_each_map(tmp_path: Path) -> None:
+    repository = ActionMapsRepository(
+        tmp_path, modifier_key="rctrl", joystick_sides={1: "left", 2: "right"}
+    )
+    base = make_profile("hosas", [make_binding("v_eject", "button3")])
+    mine = make_profile(
+        "hosas", [make_binding("v_eject", "button3"), make_binding("v_exit", "button4")]
+    )
+    theirs = make_profile("hosas", [make_binding("v_eject", "button7")])
+    folders = {name: tmp_path / name for name in ("base", "mine", "theirs", "merged")}
+    for folder in folders.values():
+        folder.mkdir()
+    for name, profile in (("base", base), ("mine", mine), ("theirs", theirs)):
+        assert repository.save_control_profile(profile, folders[name] / "hosas.xml").ok
+    assert repository.save_control_profile(mine, folders["mine"] / "solo.xml").ok
+
+    results = ProfileMerger().merge_folders(
+        repository,
+        folders["base"],
+        folders["mine"],
+        folders["theirs"],
+        folders["merged"],
+        max_workers=1,
+    )
+
+    assert sorted(results) == ["hosas.xml", "solo.xml"]
+    hosas = results["hosas.xml"]
+    assert hosas.conflicts == 0
+    assert hosas.export is not None and hosas.export.ok
+    merged = repository.load_control_profile(folders["merged"] / "hosas.xml")
+    left = slots_by_action(make_profile("left", merged.side_bindings("left")))
+    assert left["v_eject"] == {"button7"}
+    assert left["v_exit"] == {"button4"}
+    assert (folders["merged"] / "solo.xml").exists()
@@ -0,0 +1,232 @@
+import json
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from app.domain import ActionIdentifier, Binding, ControlProfile, InputSlot
+from app.io import ActionMapsRepository, DeviceLayoutRepository
+from app.models.exported_configmap_xml import get_action_maps_object
+
+
+def make_binding(
+    name: str,
+    slot_id: str,
+    *,
+    sub_category: str = "seat_general",
+    side: str = "left",
+    device: str = "js1",
+    modifier: bool = False,
+    multitap: bool = False,
+) -> Binding:
+    return Binding(
+        action=ActionIdentifier(name=name, main_category=sub_category, sub_category=sub_category),
+        slot=InputSlot(device_uid=device, side=side, slot_id=slot_id),
+        modifier=modifier,
+        multitap=multitap,
+    )
+
+
+def make_profile(name: str, bindings: list[Binding]) -> ControlProfile:
+    return ControlProfile.from_bindings(name, bindings)
+
+
+def rebinds_by_action(path: Path) -> dict[str, list[str]]:
+    control_map = get_action_maps_object(str(path))
+    return {
+        action.name: [rebind.input for rebind in action.rebind]
+        for actionmap in control_map.actionmap
+        for action in actionmap.action
+    }
+
+
+def test_save_control_profile_replaces_device_rebinds(tmp_path: Path) -> None:
+    repository = ActionMapsRepository(tmp_path, modifier_key="rctrl")
+    profile = make_profile(
+        "hosas",
+        [
+            make_binding("v_eject", "button3", modifier=True),
+            make_binding("v_emergency_exit", "button4", device="js2", side="right", multitap=True),
+        ],
+    )
+
+    result = repository.save_control_profile(profile, Path("hosas.xml"))
+
+    assert result.ok
+    assert result.destination == tmp_path / "hosas.xml"
+    assert result.elapsed > 0
+    rebinds = rebinds_by_action(result.destination)
+    assert "js1_rctrl+button3" in rebinds["v_eject"]
+    assert "js2_button4" in rebinds["v_emergency_exit"]
+    assert not any(
+        value.startswith(("js1_", "js2_"))
+        for name, values in rebinds.items()
+        if name not in {"v_eject", "v_emergency_exit"}
+        for value in values
+    )
+    assert [path.name for path in tmp_path.iterdir()] == ["hosas.xml"]
+
+
+def test_save_control_profile_reports_unknown_action_maps_and_conflicts(tmp_path: Path) -> None:
+    repository = ActionMapsRepository(tmp_path, modifier_key="rctrl")
+    profile = make_profile(
+        "broken",
+        [
+            make_binding("v_eject", "button1"),
+            make_binding("v_emergency_exit", "button1"),
+            make_binding("mystery", "button2", sub_category="does_not_exist"),
+        ],
+    )
+
+    result = repository.save_control_profile(profile, tmp_path / "broken.xml")
+
+    assert result.ok
+    assert result.report.has_errors
+    messages = [issue.message for issue in result.report.issues]
+    assert any("does_not_exist" in message for message in messages)
+    assert any("duplicate slot assignment" in message.lower() for message in messages)
+
+
+def test_save_control_profiles_exports_variants_in_parallel(tmp_path: Path) -> None:
+    repository = ActionMapsRepository(tmp_path, modifier_key="lalt")
+    jobs = [
+        (
+            make_profile(f"variant{index}", [make_binding("v_eject", f"button{index + 1}")]),
+            Path(f"variant{index}.xml"),
+        )
+        for index in range(3)
+    ]
+
+    results = repository.save_control_profiles(jobs, max_workers=2)
+
+    assert [result.profile_name for result in results] == ["variant0", "variant1", "variant2"]
+    for index, result in enumerate(results):
+        assert result.ok, result.error
+        assert result.elapsed > 0
+        assert not result.report.has_errors
+        assert rebinds_by_action(result.destination)["v_eject"][-1] == f"js1_button{index + 1}"
+
+
+def test_load_control_profile_round_trips_saved_bindings(tmp_path: Path) -> None:
+    repository = ActionMapsRepository(
+        tmp_path, modifier_key="rctrl", joystick_sides={1: "left", 2: "right"}
+    )
+    profile = make_profile(
+        "hosas",
+        [
+            make_binding("v_eject", "button3", modifier=True),
+            make_binding("v_emergency_exit", "button4", device="js2", side="right", multitap=True),
+        ],
+    )
+    assert repository.save_control_profile(profile, Path("hosas.xml")).ok
+
+    loaded = repository.load_control_profile(Path("hosas.xml"))
+
+    assert set(loaded.devices["js1"].bindings) == set(profile.devices["js1"].bindings)
+    assert set(profile.devices["js2"].bindings) <= set(loaded.devices["js2"].bindings)
+    assert all(binding.slot.device_uid == "js1" for binding in loaded.side_bindings("left"))
+
+
+def test_eight_device_profile_round_trips_per_device(tmp_path: Path) -> None:
+    sides = dict(enumerate(("left", "right", "throttle", "pedals", "panel", "collective"), 1))
+    sides.update({7: "mfd1", 8: "mfd2"})
+    repository = ActionMapsRepository(tmp_path, modifier_key="rctrl", joystick_sides=sides)
+    bindings = [
+        binding
+        for instance, side in sides.items()
+        for binding in (
+            make_binding("v_eject", "button3", device=f"js{instance}", side=side),
+            make_binding(
+                f"v_device{instance}_action", f"button{instance}", device=f"js{instance}", side=side
+            ),
+        )
+    ]
+    profile = make_profile("eight", bindings)
+    assert repository.save_control_profile(profile, Path("eight.xml")).ok
+
+    loaded = repository.load_control_profile(Path("eight.xml"))
+
+    assert sorted(loaded.devices) == sorted(profile.devices) == [f"js{i}" for i in range(1, 9)]
+    for device_uid, expected in profile.devices.items():
+        assert loaded.devices[device_uid].side == expected.side
+        assert set(loaded.devices[device_uid].bindings) == set(expected.bindings)
+
+
+def write_layout(path: Path, name: str, x: int) -> None:
+    devices = {
+        str(instance): {
+            "name": f"{name} {side}",
+            "side": side,
+            "configmap_instance": instance,
+            "background_image": f"{side}.png",
+            "buttons": {"button1": {"name": "button1", "x": x + instance, "y": 20}},
+        }
+        for instance, side in ((1, "left"), (2, "right"))
+    }
+    path.write_text(json.dumps({name: {"devices": devices}}))
+
+
+def test_device_layouts_load_from_json_through_the_compiled_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    root, cache = tmp_path / "layouts", tmp_path / "cache"
+    root.mkdir()
+    write_layout(root / "alpha.json", "Alpha", 100)
+    write_layout(root / "beta.json", "Beta", 200)
+
+    first = DeviceLayoutRepository(root, cache_dir=cache)
+    assert list(first.list_layouts()) == ["Alpha", "Beta"]
+    layout = first.load_layout("Beta", "right")
+    assert layout is not None and layout.device_uid == "js2"
+    assert layout.slots["button1"] == InputSlot("js2", "right", "button1")
+    assert layout.positions == {"button1": (202, 20)}
+    assert layout.metadata["background_image"] == "right.png"
+    assert first.load_layout("Gamma", "left") is None
+
+    with monkeypatch.context() as patch:
+        patch.setattr(DeviceLayoutRepository, "_compile", lambda _self, path: pytest.fail(path))
+        cached = DeviceLayoutRepository(root, cache_dir=cache)
+        assert cached.load_layouts("Beta") == first.load_layouts("Beta")
+
+    write_layout(root / "alpha.json", "Alpha", 5_000)
+    changed = DeviceLayoutRepository(root, cache_dir=cache).load_layout("Alpha", "left")
+    assert changed is not None and changed.positions["button1"] == (5_001, 20)
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_loading_a_layout_compiles_only_the_file_that_defines_it(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, cached: bool
+) -> None:
+    root = tmp_path / "layouts"
+    root.mkdir()
+    write_layout(root / "alpha.json", "Alpha", 100)
+    write_layout(root / "beta_stick.json", "Beta Stick", 200)
+    write_layout(root / "gamma.json", "Gamma", 300)
+    compiled: List[str] = []
+    compile_file = DeviceLayoutRepository._compile
+
+    def record(self: DeviceLayoutRepository, path: Path) -> Any:
+        compiled.append(path.name)
+        return compile_file(self, path)
+
+    monkeypatch.setattr(DeviceLayoutRepository, "_compile", record)
+    repository = DeviceLayoutRepository(root, cache_dir=tmp_path / "cache" if cached else None)
+
+    assert repository.load_layout("Beta Stick", "left") is not None
+    assert compiled == ["beta_stick.json"]
+    assert list(repository.list_layouts()) == ["Alpha", "Beta Stick", "Gamma"]
+    assert sorted(compiled) == ["alpha.json", "beta_stick.json", "gamma.json"]
+
+
+def test_user_cache_dir_follows_platform_conventions(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import app.globals as app_globals
+
+    monkeypatch.setattr(app_globals.sys, "platform", "linux")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert app_globals.user_cache_dir() == tmp_path / "citizenbindvkb"
+
+    monkeypatch.setattr(app_globals.sys, "platform", "win32")
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "Local"))
+    assert app_globals.user_cache_dir() == tmp_path / "Local" / "citizenbindvkb" / "Cache"
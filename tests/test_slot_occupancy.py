@@ -0,0 +1,81 @@
+import random
+
+from app.models.joystick import JoyAction, JoystickConfig, get_joystick_buttons
+from app.models.slot_occupancy import ButtonOccupancyBitmap, FreeSlot
+
+BUTTONS = get_joystick_buttons("VKB Default")
+NAMES = list(BUTTONS)
+
+
+def make_action(
+    name: str, button: str, *, modifier: bool = False, multitap: bool = False, hold: bool = False
+) -> JoyAction:
+    return JoyAction(
+        name=name,
+        input=f"js1_{BUTTONS[button].sc_config_name}",
+        category="Vehicles",
+        sub_category="spaceship_weapons",
+        modifier=modifier,
+        multitap=multitap,
+        hold=hold,
+        button=BUTTONS[button],
+    )
+
+
+def test_bitmap_counts_shared_slots() -> None:
+    bitmap = ButtonOccupancyBitmap(["a", "b", "c"])
+    bitmap.occupy("b", False, False, False)
+    bitmap.occupy("b", False, False, False)
+    bitmap.occupy("c", True, False, True)
+
+    bitmap.release("b", False, False, False)
+    assert not bitmap.is_free("b")
+    bitmap.release("b", False, False, False)
+    assert bitmap.is_free("b")
+    assert not bitmap.is_free("c", modifier=True, hold=True)
+    assert bitmap.free_slots(modifier=True, multitap=False, hold=True) == [
+        FreeSlot("a", True, False, True),
+        FreeSlot("b", True, False, True),
+    ]
+    assert len(bitmap.free_slots()) == 3 * 8 - 1
+
+
+def test_nearest_free_prefers_closest_then_earlier_button() -> None:
+    bitmap = ButtonOccupancyBitmap(["a", "b", "c", "d", "e"])
+    for name in ("b", "c", "d"):
+        bitmap.occupy(name, False, False, False)
+
+    assert bitmap.nearest_free("c") == "a"
+    assert bitmap.nearest_free("d") == "e"
+    assert bitmap.nearest_free("a") == "a"
+    for name in ("a", "e"):
+        bitmap.occupy(name, False, False, False)
+    assert bitmap.nearest_free("c") is None
+
+
+def test_config_keeps_bitmap_in_sync_with_mappings() -> None:
+    config = JoystickConfig(side="left", configured_actions={})
+    rng = random.Random(7)
+    for step in range(500):
+        button = rng.choice(NAMES)
+        flags = {key: rng.random() < 0.5 for key in ("modifier", "multitap", "hold")}
+        action = make_action(f"action_{rng.randrange(40)}", button, **flags)
+        operation = rng.randrange(4)
+        if operation == 0:
+            config.set_mapping(action)
+        elif operation == 1:
+            config.remove_mapping_by_key(action.key)
+        elif operation == 2:
+            config.unbind_action(action.name)
+        else:
+            config.clear_mapping(action.name, flags["multitap"], flags["modifier"], flags["hold"])
+        if step % 50 == 0:
+            config.occupancy()
+
+    expected = ButtonOccupancyBitmap(NAMES)
+    for action in config.configured_actions.values():
+        expected.occupy(action.button.name, action.modifier, action.multitap, action.hold)
+    assert config.occupancy().occupied == expected.occupied
+
+    config.clear_mappings()
+    assert len(config.free_slots()) == len(NAMES) * 8
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from app.io import ControlMapTemplate, SplicedControlMapWriter
+from app.models.exported_configmap_xml import Action, ActionMap, Rebind
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "app" / "data"
+EXPORT = DATA_DIR / "layout_VBK_3_24_2_exported.xml"
+
+
+@pytest.fixture
+def template() -> ControlMapTemplate:
+    writer = SplicedControlMapWriter.from_file(EXPORT)
+    return ControlMapTemplate(writer.original, EXPORT)
+
+
+def test_unchanged_map_is_written_byte_for_byte(template: ControlMapTemplate) -> None:
+    writer = template.splice_writer()
+    assert writer is not None
+
+    assert writer.render(template.working_copy().control_map) == EXPORT.read_bytes()
+
+
+def test_equal_but_rebuilt_actions_are_not_rewritten(template: ControlMapTemplate) -> None:
+    working = template.working_copy()
+    original = working.control_map.actionmap[0].action[0]
+    working.set_rebinds(0, 0, [rebind.model_copy() for rebind in original.rebind])
+
+    writer = template.splice_writer()
+    assert writer is not None
+    assert writer.render(working.control_map) == EXPORT.read_bytes()
+
+
+def test_only_changed_action_is_rewritten(template: ControlMapTemplate) -> None:
+    working = template.working_copy()
+    working.set_rebinds(0, 0, [Rebind.model_validate({"@input": "js1_button5", "@multiTap": 2})])
+
+    writer = template.splice_writer()
+    assert writer is not None
+    expected = EXPORT.read_bytes().replace(
+        b'   <rebind input="js2_button20"/>',
+        b'   <rebind input="js1_button5" multiTap="2"/>',
+        1,
+    )
+
+    assert writer.render(working.control_map) == expected
+
+
+def test_removed_and_added_elements_keep_surrounding_formatting(
+    template: ControlMapTemplate,
+) -> None:
+    working = template.working_copy()
+    removed_name = working.control_map.actionmap[1].action[0].name
+    working.remove_action(1, 0)
+    working.append_action(
+        2, Action.model_validate({"@name": "new_action", "rebind": [{"@input": "js2_button1"}]})
+    )
+    working.control_map.actionmap.append(
+        ActionMap.model_validate(
+            {"@name": "new_map", "action": [{"@name": "x", "rebind": [{"@input": "js1_x"}]}]}
+        )
+    )
+
+    writer = template.splice_writer()
+    assert writer is not None
+    output = writer.render(working.control_map)
+
+    assert f'<action name="{removed_name}">'.encode() not in output
+    assert b'  <action name="new_action">\n   <rebind input="js2_button1"/>\n  </action>' in output
+    assert b' <actionmap name="new_map">' in output
+    assert output.rstrip().endswith(b"</ActionMaps>")
+    reparsed = SplicedControlMapWriter(output, working.control_map)
+    assert len(reparsed.index.actionmaps) == len(working.control_map.actionmap)
+
+
+def test_changes_outside_actionmaps_require_full_export(template: ControlMapTemplate) -> None:
+    working = template.working_copy()
+    working.control_map.profileName = "renamed"
+
+    writer = template.splice_writer()
+    assert writer is not None
+    with pytest.raises(ValueError):
+        writer.render(working.control_map)
@@ -1,4 +1,5 @@
 # test_main.py
+import io
 import platform
 from pathlib import Path
 from typing import Any, Dict, Iterator
@@ -9,9 +10,12 @@ from app.models import exported_configmap_xml as configmap
 from app.models.joystick import JoyAction
 from PyQt6.QtWidgets import QApplication, QDialogButtonBox
 from PyQt6.QtCore import Qt
-from app.domain import ValidationIssue, ValidationReport
-from app.ui import ControlMapperApp, joystick_buttons
+from app.domain import ControlProfile, ValidationIssue, ValidationReport
+from app.ui import DEFAULT_CONTROL_MAP_FILENAME, ControlMapperApp, joystick_buttons
 from app.components.settings_dialog import SettingsDialog
+from app.services import DeviceService, InputCaptureService
+from app.services import device_service as device_service_module
+from app.utils.devices import FakeDeviceBackend, ScriptedInputBackend, SystemDevice
 
 
 WINDOWS = platform.system() == "Windows"
@@ -25,6 +29,27 @@ def override_config_path(tmp_path: Path):
     app_config.set_config_path(original_path)
 
 
+@pytest.fixture(autouse=True)
+def fake_device_service(monkeypatch: pytest.MonkeyPatch) -> Iterator[DeviceService]:
+    """Keep the UI tests away from the real pygame controller enumeration."""
+    backend = FakeDeviceBackend(
+        [
+            SystemDevice(
+                name="VKBsim Gladiator EVO L",
+                instance=0,
+                product_guid="guid-0",
+                product_name="VKBsim Gladiator EVO L",
+                num_axes=6,
+                num_buttons=32,
+            )
+        ]
+    )
+    service = DeviceService(backend, poll_interval=0.01)
+    monkeypatch.setattr(device_service_module, "_device_service", service)
+    yield service
+    service.stop(timeout=5)
+
+
 # pytestmark = pytest.mark.skipif(
 #     WINDOWS,
 #     reason="PyQt UI tests crash under Windows COM apartment (fatal exception 0x8001010d)",
@@ -333,3 +358,242 @@ def test_validation_status_label(main_window: ControlMapperApp) -> None:
     main_window.update_validation_status_indicator(report)
     assert main_window.binding_validation_report is report
     assert main_window.validation_status_label.text() == "Binding status: 2 error(s)"
+
+
+def test_export_preserves_source_formatting(main_window: ControlMapperApp) -> None:
+    """Formatting-preserving exports of an unchanged map reproduce the source file."""
+    assert main_window.control_map_template is not None
+    main_window.config.preserve_export_formatting = True
+    buffer = io.StringIO()
+
+    main_window.write_control_map_export(main_window.control_map_template.working_copy(), buffer)
+
+    assert buffer.getvalue() == DEFAULT_CONTROL_MAP_FILENAME.read_bytes().decode("utf-8")
+
+
+def test_unchanged_profile_is_not_exported_again(
+    main_window: ControlMapperApp, tmp_path: Path
+) -> None:
+    exporter = main_window.control_map_exporter
+    exporter.destination = tmp_path / "export.xml"
+
+    main_window.update_control_map()
+    main_window.update_control_map()
+    assert exporter.flush(timeout=5)
+    assert exporter.write_count == 1
+
+    main_window.config.modifier_key = "lalt"
+    main_window.update_control_map()
+    assert exporter.flush(timeout=5)
+    assert exporter.write_count == 2
+
+
+def test_nearest_free_slot_selects_unmapped_button(main_window: ControlMapperApp) -> None:
+    config = main_window.current_config
+    first = next(iter(joystick_buttons))
+    main_window.select_nearest_free_button()
+
+    selected = main_window.selected_button_label
+    assert selected is not None
+    assert config.is_slot_free(selected)
+    assert selected == config.nearest_free_button(first)
+    assert main_window.free_slots_label.text().startswith("Free slots: ")
+
+
+def test_undo_and_redo_mapping_edits(main_window: ControlMapperApp, tmp_path: Path) -> None:
+    main_window.control_map_exporter.destination = tmp_path / "export.xml"
+    config = main_window.current_config
+    before = dict(config.configured_actions)
+    button = joystick_buttons["button3"]
+    joy_action = JoyAction(
+        name="v_attack1",
+        input="js1_button3",
+        category="Vehicles",
+        sub_category="spaceship_weapons",
+        button=button,
+    )
+
+    config.set_mapping(joy_action)
+    main_window.edit_history.record("Add v_attack1")
+    main_window.update_control_map()
+    main_window.undo_edit()
+
+    assert config.configured_actions == before
+    main_window.redo_edit()
+    assert config.configured_actions[joy_action.key] is joy_action
+
+
+def test_edit_transaction_validates_and_exports_once(
+    main_window: ControlMapperApp, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    exporter = main_window.control_map_exporter
+    exporter.destination = tmp_path / "export.xml"
+    config = main_window.current_config
+    for index in range(5):
+        config.set_mapping(
+            JoyAction(
+                name=f"v_attack1_group{index}",
+                input=f"js1_button{index + 1}",
+                category="Vehicles",
+                sub_category="spaceship_weapons",
+                button=joystick_buttons[f"button{index + 1}"],
+            )
+        )
+    main_window.edit_history.record("Add five")
+    main_window.update_control_map()
+    assert exporter.flush(timeout=5)
+    writes = exporter.write_count
+
+    validations = []
+    validate_edits = main_window.validate_edits
+    monkeypatch.setattr(
+        main_window, "validate_edits", lambda: validations.append(1) or validate_edits()
+    )
+    keys = [key for key in config.configured_actions if "_group" in key.name]
+
+    with main_window.edit_transaction("Remove five") as transaction:
+        for key in keys:
+            config.remove_mapping_by_key(key)
+            main_window.update_control_map()
+
+    assert exporter.flush(timeout=5)
+    assert len(validations) == 1
+    assert exporter.write_count == writes + 1
+    assert transaction.step is not None and len(transaction.step.changes) == len(keys)
+    assert not any(key in config.configured_actions for key in keys)
+
+
+def test_edit_transaction_rolls_back_batch(main_window: ControlMapperApp, tmp_path: Path) -> None:
+    main_window.control_map_exporter.destination = tmp_path / "export.xml"
+    left = main_window.left_joystick_config
+    right = main_window.right_joystick_config
+    joy_action = JoyAction(
+        name="v_attack1",
+        input="js1_button3",
+        category="Vehicles",
+        sub_category="spaceship_weapons",
+        button=joystick_buttons["button3"],
+    )
+    left.set_mapping(joy_action)
+    main_window.edit_history.record("Add v_attack1")
+    main_window.update_control_map()
+    before = dict(left.configured_actions), dict(right.configured_actions)
+    history_length = len(main_window.edit_history)
+
+    with pytest.raises(RuntimeError):
+        with main_window.edit_transaction("Broken"):
+            left.clear_mappings()
+            raise RuntimeError("abort")
+    assert (left.configured_actions, right.configured_actions) == before
+
+    # Binding one action on both sticks breaks the one-binding-per-device-group rule.
+    duplicate = joy_action.model_copy(update={"input": "js2_button3"})
+    with main_window.edit_transaction("Duplicate", rollback_on_new_errors=True) as transaction:
+        right.set_mapping(duplicate)
+
+    assert transaction.rolled_back
+    assert transaction.report is not None and transaction.report.has_errors
+    assert (left.configured_actions, right.configured_actions) == before
+    assert len(main_window.edit_history) == history_length
+
+
+def test_settings_dialog_lists_detected_controllers(
+    qtbot: Any, fake_device_service: DeviceService
+) -> None:
+    config = app_config.Config(installation_path="/original/path")
+    dialog = SettingsDialog(config, device_service=fake_device_service)
+    qtbot.waitUntil(lambda: fake_device_service.ready, timeout=5000)
+    qtbot.waitUntil(
+        lambda: dialog.devices_list_widget.item(0).text().startswith("0: VKBsim"), timeout=5000
+    )
+
+    fake_device_service.backend.unplug(0)
+    qtbot.waitUntil(
+        lambda: dialog.devices_list_widget.item(0).text() == "No controllers found", timeout=5000
+    )
+    dialog.reject()
+
+
+def test_press_to_select_selects_pressed_button(main_window: ControlMapperApp, qtbot: Any) -> None:
+    backend = ScriptedInputBackend()
+    main_window.input_capture = InputCaptureService(backend, poll_interval=0.01)
+    main_window.capture_button.setChecked(True)
+    qtbot.waitUntil(lambda: backend.opened, timeout=5000)
+
+    backend.press(0, main_window.config.joystick_left_name_filter, "button", 4)
+    qtbot.waitUntil(lambda: main_window.selected_button_label == "button5", timeout=5000)
+    assert main_window.current_joystick == "left"
+
+    backend.press(1, main_window.config.joystick_right_name_filter, "hat", 0, (0, 1))
+    qtbot.waitUntil(lambda: main_window.selected_button_label == "hat1_up", timeout=5000)
+    assert main_window.current_joystick == "right"
+
+    main_window.capture_button.setChecked(False)
+    assert not main_window.input_capture.running
+    assert not backend.opened
+
+
+def test_live_profile_applies_only_changed_keys(
+    main_window: ControlMapperApp, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    profile = main_window.live_control_profile()
+    config = main_window.current_config
+    joy_action = JoyAction(
+        name="v_attack1_group9",
+        input="js1_button9",
+        category="Vehicles",
+        sub_category="spaceship_weapons",
+        button=joystick_buttons["button9"],
+    )
+
+    conversions = []
+    convert = main_window._joy_action_to_binding
+    monkeypatch.setattr(
+        main_window,
+        "_joy_action_to_binding",
+        lambda *args: conversions.append(args[0].name) or convert(*args),
+    )
+    config.set_mapping(joy_action)
+
+    assert main_window.live_control_profile() is profile
+    assert conversions == ["v_attack1_group9"]
+    rebuilt = ControlProfile.from_bindings(
+        "rebuilt",
+        (
+            convert(action, side_config.side)
+            for side_config in (main_window.left_joystick_config, main_window.right_joystick_config)
+            for action in side_config.configured_actions.values()
+        ),
+    )
+    assert profile.fingerprint == rebuilt.fingerprint
+
+    config.remove_mapping_by_key(joy_action.key)
+    assert main_window.live_control_profile().fingerprint != rebuilt.fingerprint
+    assert conversions == ["v_attack1_group9"]
+
+
+def test_unchanged_profile_is_not_revalidated(
+    main_window: ControlMapperApp, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    checks = []
+    check = main_window.binding_planner.conflict_engine.check
+    monkeypatch.setattr(
+        main_window.binding_planner.conflict_engine,
+        "check",
+        lambda bindings: checks.append(1) or check(bindings),
+    )
+    first = main_window.validate_edits()[2]
+    assert main_window.validate_edits()[2] is first
+    assert len(checks) == 1
+
+    main_window.current_config.set_mapping(
+        JoyAction(
+            name="v_attack1_group9",
+            input="js1_button9",
+            category="Vehicles",
+            sub_category="spaceship_weapons",
+            button=joystick_buttons["button9"],
+        )
+    )
+    main_window.validate_edits()
+    assert len(checks) == 2
@@ -0,0 +1,52 @@
+import io
+from pathlib import Path
+
+import pytest
+import xmltodict  # type: ignore[import-untyped]
+
+from app.io import write_action_maps
+from app.models.exported_configmap_xml import get_action_maps_object
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "app" / "data"
+EXPORTED_MAPS = [
+    "SCBindsDefault.xml",
+    "layout_3_24_2_final_exported.xml",
+    "layout_BK_DualVKB_3-22_exported.xml",
+    "layout_VBK_3_24_2_exported.xml",
+]
+
+
+def reference_unparse(path: Path, **kwargs: object) -> str:
+    data = get_action_maps_object(str(path))
+    xml_data = {"ActionMaps": [data.model_dump(exclude_none=True, by_alias=True)]}
+    return xmltodict.unparse(xml_data, **kwargs)
+
+
+@pytest.mark.parametrize("filename", EXPORTED_MAPS)
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"pretty": True, "indent": " ", "short_empty_elements": True},
+    ],
+    ids=["compact", "pretty"],
+)
+def test_streaming_writer_matches_xmltodict(filename: str, options: dict) -> None:
+    path = DATA_DIR / filename
+    buffer = io.StringIO()
+
+    write_action_maps(get_action_maps_object(str(path)), buffer, **options)
+
+    assert buffer.getvalue() == reference_unparse(path, **options)
+
+
+def test_streaming_writer_escapes_attribute_values() -> None:
+    data = get_action_maps_object(str(DATA_DIR / "layout_VBK_3_24_2_exported.xml"))
+    data.profileName = 'quotes " and <tags> & "more"'
+    data.actionmap[0].action[0].title = "it's"
+    buffer = io.StringIO()
+
+    write_action_maps(data, buffer)
+
+    xml_data = {"ActionMaps": [data.model_dump(exclude_none=True, by_alias=True)]}
+    assert buffer.getvalue() == xmltodict.unparse(xml_data)